@@ -0,0 +1,70 @@
+import asyncio
+import importlib
+from typing import Dict, Iterable, Type, Union
+
+from app.core.tracing import span
+from app.domain.interfaces import Agent
+
+
+class AgentRegistry:
+    """Constructs each agent once, on first use, and reuses it across requests.
+
+    Agents may be given as classes or as "module.path:ClassName" strings; strings are
+    imported on first use, so heavy agent dependencies stay out of application startup.
+    """
+
+    def __init__(self, agent_classes: Dict[str, Union[Type[Agent], str]]):
+        self._agent_classes = agent_classes
+        self._agents: Dict[str, Agent] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._agent_classes
+
+    def names(self):
+        return list(self._agent_classes)
+
+    async def get(self, name: str) -> Agent:
+        """Returns the shared agent instance, constructing and starting it if needed."""
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if name not in self._agents:  # Another request may have built it meanwhile
+                with span("agent.construct", agent=name):
+                    # Constructors may do blocking I/O, keep them off the event loop
+                    agent = await asyncio.to_thread(self._construct, name)
+                    await agent.startup()
+                self._agents[name] = agent
+        return self._agents[name]
+
+    def loaded(self):
+        return list(self._agents)
+
+    def _construct(self, name: str) -> Agent:
+        agent_class = self._agent_classes[name]
+        if isinstance(agent_class, str):
+            module_path, class_name = agent_class.split(":")
+            with span("agent.import", agent=name):
+                agent_class = getattr(importlib.import_module(module_path), class_name)
+            self._agent_classes[name] = agent_class
+        return agent_class()
+
+    async def warmup(self, names: Iterable[str]):
+        """Constructs the given agents ahead of the first request; failures are logged."""
+        for name in names:
+            try:
+                await self.get(name)
+                print(f"Agent warmed up: {name}")
+            except Exception as e:
+                print(f"Error warming up agent {name}: {e}")
+
+    async def shutdown(self):
+        for name, agent in list(self._agents.items()):
+            try:
+                await agent.shutdown()
+            except Exception as e:
+                print(f"Error shutting down agent {name}: {e}")
+        self._agents.clear()
@@ -1,10 +1,10 @@
 from typing import Optional
+from app.core.tracing import span
 from app.domain.interfaces import Agent
 from app.infrastructure.services.calendar.calendar_service import CalendarService
 import re
 from datetime import datetime, timedelta
-import groq  # Groq's API
-import os
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 
@@ -18,12 +18,22 @@ calendar_service: CalendarService
 
 
 class CalendarAgent(Agent):
+    def __init__(self):
+        self.service = None
+
+    def get_service(self):
+        """Builds the Calendar API client once and reuses it across requests."""
+        if self.service is None:
+            creds = service_account.Credentials.from_service_account_file(
+                SERVICE_ACCOUNT_FILE, scopes=SCOPES
+            )
+            self.service = build("calendar", "v3", credentials=creds)
+        return self.service
 
     async def handle_query(self, userChatQuery: str, userChatHistory: str,userContent: Optional[str] = None) -> str:
 
-        client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
         # Query Groq LLM to determine which agent to call
-        response = client.chat.completions.create(
+        response = await llm_gateway.chat(
             model="llama-3.3-70b-versatile",
             messages=(
                 [
@@ -49,9 +59,11 @@ class CalendarAgent(Agent):
                 ]
             ),
             max_tokens=10,
+            temperature=0,
+            cache_site="calendar_intent",
         )
 
-        query_lower = response.choices[0].message.content.strip().lower()
+        query_lower = response.strip().lower()
 
         # Determine the type of query (schedule, get, cancel, reschedule)
 
@@ -115,22 +127,20 @@ class CalendarAgent(Agent):
             )
 
         try:
-            creds = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_FILE, scopes=SCOPES
-            )
-            service = build("calendar", "v3", credentials=creds)
-            events_result = (
-                service.events()
-                .list(
-                    calendarId="sachinbfrnd@gmail.com",
-                    timeMin=from_date,
-                    timeMax=to_date,
-                    maxResults=10,
-                    singleEvents=True,
-                    orderBy="startTime",
+            service = self.get_service()
+            with span("google.calendar.list_events"):
+                events_result = (
+                    service.events()
+                    .list(
+                        calendarId="sachinbfrnd@gmail.com",
+                        timeMin=from_date,
+                        timeMax=to_date,
+                        maxResults=10,
+                        singleEvents=True,
+                        orderBy="startTime",
+                    )
+                    .execute()
                 )
-                .execute()
-            )
             events = events_result.get("items", [])
 
             if not events:
@@ -160,13 +170,11 @@ class CalendarAgent(Agent):
         canceled_count = 0
         for event_id in event_ids:
             try:
-                creds = service_account.Credentials.from_service_account_file(
-                    SERVICE_ACCOUNT_FILE, scopes=SCOPES
-                )
-                service = build("calendar", "v3", credentials=creds)
-                service.events().delete(
-                    calendarId="sachinbfrnd@gmail.com", eventId=event_id
-                ).execute()
+                service = self.get_service()
+                with span("google.calendar.delete_event"):
+                    service.events().delete(
+                        calendarId="sachinbfrnd@gmail.com", eventId=event_id
+                    ).execute()
                 canceled_count += 1
                 print(f"Successfully deleted event: {event_id}")
             except Exception as e:
@@ -225,23 +233,20 @@ class CalendarAgent(Agent):
                 + "Z"
             )
 
-            creds = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_FILE, scopes=SCOPES
-            )
-
-            service = build("calendar", "v3", credentials=creds)
-            events_result = (
-                service.events()
-                .list(
-                    calendarId="sachinbfrnd@gmail.com",
-                    timeMin=from_date_iso,
-                    timeMax=to_date_iso,
-                    maxResults=50,
-                    singleEvents=True,
-                    orderBy="startTime",
+            service = self.get_service()
+            with span("google.calendar.list_events"):
+                events_result = (
+                    service.events()
+                    .list(
+                        calendarId="sachinbfrnd@gmail.com",
+                        timeMin=from_date_iso,
+                        timeMax=to_date_iso,
+                        maxResults=50,
+                        singleEvents=True,
+                        orderBy="startTime",
+                    )
+                    .execute()
                 )
-                .execute()
-            )
             events = events_result.get("items", [])
             print(events)
             if not events:
@@ -272,19 +277,17 @@ class CalendarAgent(Agent):
             return "Could not parse new date or time from the query."
 
         # Load credentials
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES
-        )
-        service = build("calendar", "v3", credentials=creds)
+        service = self.get_service()
 
         try:
             # Fetch existing event details to avoid overwriting other fields
             eventss = events_ids[0]
-            event = (
-                service.events()
-                .get(calendarId="sachinbfrnd@gmail.com", eventId=eventss)
-                .execute()
-            )
+            with span("google.calendar.get_event"):
+                event = (
+                    service.events()
+                    .get(calendarId="sachinbfrnd@gmail.com", eventId=eventss)
+                    .execute()
+                )
 
             # Update event date and/or time
             if new_date:
@@ -319,11 +322,12 @@ class CalendarAgent(Agent):
                     end_time,
                 ).isoformat()
 
-            updated_event = (
-                service.events()
-                .update(calendarId="sachinbfrnd@gmail.com", eventId=eventss, body=event)
-                .execute()
-            )
+            with span("google.calendar.update_event"):
+                updated_event = (
+                    service.events()
+                    .update(calendarId="sachinbfrnd@gmail.com", eventId=eventss, body=event)
+                    .execute()
+                )
 
             return f"Event {eventss} rescheduled successfully to {event['start']['dateTime']} - {event['end']['dateTime']}"
 
@@ -343,10 +347,7 @@ class CalendarAgent(Agent):
                     "message": "Could not extract a valid date and time.",
                 }
 
-            creds = service_account.Credentials.from_service_account_file(
-                SERVICE_ACCOUNT_FILE, scopes=SCOPES
-            )
-            service = build("calendar", "v3", credentials=creds)
+            service = self.get_service()
 
             event = {
                 "summary": summary,
@@ -366,11 +367,12 @@ class CalendarAgent(Agent):
             }
             print(event)
 
-            event = (
-                service.events()
-                .insert(calendarId="sachinbfrnd@gmail.com", body=event)
-                .execute()
-            )
+            with span("google.calendar.insert_event"):
+                event = (
+                    service.events()
+                    .insert(calendarId="sachinbfrnd@gmail.com", body=event)
+                    .execute()
+                )
 
             # return {"status": "success", "event_link": event.get('htmlLink')}
             return "meeting created successfully"
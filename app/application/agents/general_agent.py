@@ -1,8 +1,7 @@
 from typing import Optional
 from dotenv import load_dotenv
 from app.domain.interfaces import Agent
-import groq
-import os
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
 from openai import OpenAI
 
 # Load environment variables from .env file
@@ -10,24 +9,31 @@ load_dotenv()
 
 
 class GeneralAgent(Agent):
-    def __init__(self):
-        self.client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
-
-    async def handle_query(self, userChatQuery: str, chatHistory: str,userContent: Optional[str] = None):
-        response = self.client.chat.completions.create(
-            model="llama-3.3-70b-versatile",  # Use the best available Groq model
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an AI assistant providing general advice.and emotional intelligence model trained on a diverse range of data with emoji .and give a respose like a human with friendly and short responses.",
-                }, 
-                {
+    def build_messages(self, userChatQuery: str, chatHistory: str, userContent: Optional[str] = None):
+        return [
+            {
+                "role": "system",
+                "content": "You are an AI assistant providing general advice.and emotional intelligence model trained on a diverse range of data with emoji .and give a respose like a human with friendly and short responses.",
+            },
+            {
                 "role": "user",
                 "content": f"User Query: {userChatQuery} \n"
                 f"Chat History: {chatHistory} \n"
                 "Additional Content: " + (userContent if userContent is not None else ""),
-                }
-             ],
+            },
+        ]
+
+    async def handle_query(self, userChatQuery: str, chatHistory: str,userContent: Optional[str] = None):
+        return await llm_gateway.chat(
+            model="llama-3.3-70b-versatile",  # Use the best available Groq model
+            messages=self.build_messages(userChatQuery, chatHistory, userContent),
             temperature=0.7,
         )
-        return response.choices[0].message.content
+
+    async def stream_query(self, userChatQuery: str, chatHistory: str, userContent: Optional[str] = None):
+        async for delta in llm_gateway.stream_chat(
+            model="llama-3.3-70b-versatile",
+            messages=self.build_messages(userChatQuery, chatHistory, userContent),
+            temperature=0.7,
+        ):
+            yield delta
@@ -6,10 +6,11 @@ from typing import Optional
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from app.core.tracing import span
 from app.domain.interfaces import Agent
 from google.oauth2 import service_account
 import os
-import groq  # Groq's API
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
 from dotenv import load_dotenv  # Import dotenv to load environment variables
 
 # Load environment variables from .env file
@@ -33,12 +34,17 @@ class GmailAgent(Agent):
             client_secret=CLIENT_SECRET,
             token_uri="https://oauth2.googleapis.com/token",
         )
+        self.service = None
 
-    async def handle_query(self, userChatQuery: str, userChatHistory: str,userContent: Optional[str] = None) -> str:
-        client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
+    def get_service(self):
+        """Builds the Gmail API client once and reuses it across requests."""
+        if self.service is None:
+            self.service = build("gmail", "v1", credentials=self.creds)
+        return self.service
 
+    async def handle_query(self, userChatQuery: str, userChatHistory: str,userContent: Optional[str] = None) -> str:
         # Query Groq LLM to determine which agent to call
-        response = client.chat.completions.create(
+        response = await llm_gateway.chat(
             model="llama-3.3-70b-versatile",
             messages=[
                 {
@@ -54,10 +60,12 @@ class GmailAgent(Agent):
                 },
             ],
             max_tokens=10,
+            temperature=0,
+            cache_site="gmail_intent",
         )
 
         # query_lower = response.choices[0].message["content"].strip().lower()
-        query_lower = response.choices[0].message.content.strip().lower()
+        query_lower = response.strip().lower()
 
         if query_lower == "read":
             return await self.read_and_reply_emails()
@@ -68,22 +76,24 @@ class GmailAgent(Agent):
 
     async def read_and_reply_emails(self) -> str:
         try:
-            service = build("gmail", "v1", credentials=self.creds)
-            results = (
-                service.users().messages().list(userId="me", maxResults=5).execute()
-            )
+            service = self.get_service()
+            with span("google.gmail.list_messages"):
+                results = (
+                    service.users().messages().list(userId="me", maxResults=5).execute()
+                )
             messages = results.get("messages", [])
 
             if not messages:
                 return "No emails found."
 
             for message in messages:
-                msg = (
-                    service.users()
-                    .messages()
-                    .get(userId="me", id=message["id"])
-                    .execute()
-                )
+                with span("google.gmail.get_message"):
+                    msg = (
+                        service.users()
+                        .messages()
+                        .get(userId="me", id=message["id"])
+                        .execute()
+                    )
                 headers = msg["payload"]["headers"]
                 subject = next(
                     (
@@ -102,7 +112,7 @@ class GmailAgent(Agent):
                 if (
                     sender != "samitalgoexercises2025@gmail.com"
                 ):  # Avoid replying to yourself
-                    reply_body = self.generate_reply(body)
+                    reply_body = await self.generate_reply(body)
                     await self.replay_send_email(sender, f"Re: {subject}", reply_body)
 
             return "Replies sent successfully."
@@ -121,12 +131,10 @@ class GmailAgent(Agent):
                     )
         return "No email body found."
 
-    def generate_reply(self, email_body: str) -> str:
+    async def generate_reply(self, email_body: str) -> str:
         """Generates a reply to the email using Groq LLM."""
-        client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
-
         # Query Groq LLM to determine which agent to call
-        response = client.chat.completions.create(
+        response = await llm_gateway.chat(
             model="llama-3.3-70b-versatile",
             messages=[
                 {
@@ -140,19 +148,20 @@ class GmailAgent(Agent):
             ],
             max_tokens=4000,
         )
-        return response.choices[0].message.content.strip()
+        return response.strip()
 
     async def replay_send_email(self, to: str, subject: str, body: str) -> str:
         """Sends an email reply using OAuth 2.0 credentials."""
         try:
             # Use the OAuth 2.0 credentials (self.creds)
-            service = build("gmail", "v1", credentials=self.creds)
+            service = self.get_service()
 
             # Create the email message
             message = {"raw": self.create_message(to, subject, body)}
 
             # Send the email
-            service.users().messages().send(userId="me", body=message).execute()
+            with span("google.gmail.send_message"):
+                service.users().messages().send(userId="me", body=message).execute()
             return f"Reply sent to {to}."
         except Exception as e:
             print(f"Error sending email: {str(e)}")
@@ -160,28 +169,27 @@ class GmailAgent(Agent):
 
     async def send_email(self, userChatQuery: str) -> str:
         """Sends an email reply using OAuth 2.0 credentials."""
-        to, subject = self.extract_email_details(
+        to, subject = await self.extract_email_details(
             userChatQuery
         )  # Extract email details from the query
-        body = self.generate_email_body(userChatQuery)  # Generate email body using LLM
+        body = await self.generate_email_body(userChatQuery)  # Generate email body using LLM
         try:
             # Use the OAuth 2.0 credentials (self.creds)
-            service = build("gmail", "v1", credentials=self.creds)
+            service = self.get_service()
 
             # Create the email message
             message = {"raw": self.create_message(to, subject, body)}
 
             # Send the email
-            service.users().messages().send(userId="me", body=message).execute()
+            with span("google.gmail.send_message"):
+                service.users().messages().send(userId="me", body=message).execute()
             return f"Reply sent to {to}."
         except Exception as e:
             print(f"Error sending email: {str(e)}")
             return f"Error sending email: {str(e)}"
 
-    def extract_email_details(self, userChatQuery: str):
-        client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
-
-        response = client.chat.completions.create(
+    async def extract_email_details(self, userChatQuery: str):
+        response = await llm_gateway.chat(
             model="llama-3.3-70b-versatile",
             messages=[
                 {
@@ -204,7 +212,7 @@ class GmailAgent(Agent):
         )
 
         try:
-            content = response.choices[0].message.content.strip()
+            content = response.strip()
 
             # Remove markdown fences if present
             content = re.sub(r"^json|$", "", content).strip()
@@ -225,14 +233,12 @@ class GmailAgent(Agent):
         message["subject"] = subject
         return base64.urlsafe_b64encode(message.as_bytes()).decode()
 
-    def generate_email_body(self, userChatQuery: str) -> str:
+    async def generate_email_body(self, userChatQuery: str) -> str:
         """
         Generate an email body using an LLM based on the user query.
         """
-        client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
-
         # Query the LLM to generate the email body
-        response = client.chat.completions.create(
+        response = await llm_gateway.chat(
             model="llama-3.3-70b-versatile",
             messages=[
                 {
@@ -251,7 +257,7 @@ class GmailAgent(Agent):
         )
 
         try:
-            body = response.choices[0].message.content.strip()
+            body = response.strip()
         except Exception as e:
             print(f"Error generating email body: {e}")
             body = "Error generating email body."
@@ -1,16 +1,10 @@
 import json
 from typing import Optional
 from app.domain.interfaces import Agent
-import groq  # Groq's API
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
 
 
 class MSExcelAgent(Agent):
-    def __init__(self):
-        # Initialize Groq client
-        self.client = groq.Client(
-            api_key="GROQ_API_KEY"
-        )
-
     def format_data(self, data: str) -> str:
         """
         Format the input JSON data into a structured summary for the LLM.
@@ -53,7 +47,7 @@ class MSExcelAgent(Agent):
         print(f"Chat history: {userChatHistory}")
 
         try:
-            response = self.client.chat.completions.create(
+            llm_response = await llm_gateway.chat(
                 model="llama-3.3-70b-versatile",  # Replace with the appropriate model
                 messages=[
                     {
@@ -66,9 +60,6 @@ class MSExcelAgent(Agent):
                     },
                 ],
             )
-            llm_response = response.choices[
-                0
-            ].message.content  # Adjust based on the actual response format
             print(f"LLM Response: {llm_response}")
             return llm_response
 
@@ -1,15 +1,9 @@
 import json
 from app.domain.interfaces import Agent
-import groq  # Groq's API
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
 
 
 class MSWordAgent(Agent):
-    def __init__(self):
-        # Initialize Groq client
-        self.client = groq.Client(
-            api_key="GROQ_API_KEY"
-        )
-
     async def handle_query(
         self, data: str, userChatQuery: str, userChatHistory: str
     ) -> str:
@@ -20,7 +14,7 @@ class MSWordAgent(Agent):
         print(f"Chat history: {userChatHistory}")
 
         try:
-            response = self.client.chat.completions.create(
+            llm_response = await llm_gateway.chat(
                 model="llama-3.3-70b-versatile",  # Replace with the appropriate model
                 messages=[
                     {
@@ -33,9 +27,6 @@ class MSWordAgent(Agent):
                     },
                 ],
             )
-            llm_response = response.choices[
-                0
-            ].message.content  # Adjust based on the actual response format
             print(f"LLM Response: {llm_response}")
             return llm_response
 
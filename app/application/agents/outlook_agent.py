@@ -1,33 +1,56 @@
+import asyncio
 from typing import Optional
 import requests
 import os
 import json
-import groq
+import time
+from app.core.tracing import span
 from app.domain.interfaces import Agent
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
+
+TOKEN_REFRESH_MARGIN = 300  # Seconds before expiry at which the Graph token is renewed
+
 
 class OutlookAgent(Agent):
     def __init__(self):
         self.client_id = os.getenv("OUTLOOK_CLIENT_ID")
         self.client_secret = os.getenv("OUTLOOK_CLIENT_SECRET")
         self.tenant_id = os.getenv("OUTLOOK_TENANT_ID")
-        self.access_token = self.get_access_token()
-
-        # Initialize Groq API client
-        self.groq_client = groq.Client(api_key="GROQ_API_KEY")
+        self.access_token = None
+        self.refresh_token = None
+        self.token_expires_at = 0.0  # time.monotonic() deadline of access_token
+        self._token_lock = asyncio.Lock()
+
+    async def startup(self):
+        """Fetches the Graph access token when the agent is first used."""
+        await self.ensure_access_token()
+
+    async def ensure_access_token(self, force: bool = False):
+        """Renews the token shortly before it expires (the agent outlives its ~1h lifetime)."""
+        async with self._token_lock:
+            if force or not self.access_token or time.monotonic() >= self.token_expires_at - TOKEN_REFRESH_MARGIN:
+                self.access_token = await asyncio.to_thread(self.get_access_token)
+        return self.access_token
 
     def get_access_token(self):
-        """Retrieve an access token using OAuth 2.0."""
+        """Retrieve an access token using OAuth 2.0, redeeming the refresh token once we have one."""
         data = {
             "client_id": self.client_id,
             "client_secret": self.client_secret,
-            "grant_type": "authorization_code",
-            "code": "M.C555_BL2.2.U.44ba755a-17c9-3282-f3aa-b45f616df2a8",
             "redirect_uri": "https://localhost:8000",
             "scope": "https://graph.microsoft.com/.default offline_access"
         }
-        response = requests.post("https://login.microsoftonline.com/common/oauth2/v2.0/token", data=data)
+        if self.refresh_token:
+            data.update(grant_type="refresh_token", refresh_token=self.refresh_token)
+        else:  # Authorization codes are single use, so this only works for the first token
+            data.update(grant_type="authorization_code", code="M.C555_BL2.2.U.44ba755a-17c9-3282-f3aa-b45f616df2a8")
+        with span("graph.get_access_token", grant=data["grant_type"]):
+            response = requests.post("https://login.microsoftonline.com/common/oauth2/v2.0/token", data=data)
         if response.status_code == 200:
-            return response.json().get("access_token")
+            token = response.json()
+            self.refresh_token = token.get("refresh_token", self.refresh_token)
+            self.token_expires_at = time.monotonic() + float(token.get("expires_in", 3600))
+            return token.get("access_token")
         else:
             raise Exception(f"Error retrieving access token: {response.json()}")
 
@@ -42,9 +65,10 @@ class OutlookAgent(Agent):
     async def read_and_reply_to_emails(self) -> str:
         """Fetch unread emails, generate replies, and send responses."""
         try:
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            response = requests.get("https://graph.microsoft.com/v1.0/me/messages?$filter=isRead eq false&$top=5",
-                                    headers=headers)
+            response = await self.list_unread_messages()
+            if response.status_code == 401:  # Revoked or expired early: renew once and retry
+                await self.ensure_access_token(force=True)
+                response = await self.list_unread_messages()
             response.raise_for_status()
             emails = response.json().get("value", [])
 
@@ -59,26 +83,35 @@ class OutlookAgent(Agent):
                 print(f"Analyzing email from {sender_email} - Subject: {subject}")
 
                 # Generate AI-powered reply
-                # reply_content = self.generate_reply(body)
+                # reply_content = await self.generate_reply(body)
                 reply_content = "Hai"
 
                 # Send the reply
-                self.send_email_reply(sender_email, subject, reply_content, email_data["id"])
+                await self.send_email_reply(sender_email, subject, reply_content, email_data["id"])
 
             return f"Processed {len(emails)} emails and sent replies."
 
         except Exception as e:
             return f"Error reading emails: {str(e)}"
 
+    async def list_unread_messages(self):
+        headers = {"Authorization": f"Bearer {await self.ensure_access_token()}"}
+        with span("graph.list_messages"):
+            return await asyncio.to_thread(
+                requests.get,
+                "https://graph.microsoft.com/v1.0/me/messages?$filter=isRead eq false&$top=5",
+                headers=headers,
+            )
+
     def extract_email_body(self, email_data):
         """Extract the email body as plain text."""
         body = email_data.get("body", {}).get("content", "")
         return body if body else "No email body available."
 
-    def generate_reply(self, email_body):
+    async def generate_reply(self, email_body):
         """Uses Groq API to analyze the email and generate a reply."""
         try:
-            response = self.groq_client.chat.completions.create(
+            response = await llm_gateway.chat(
                 model="llama-3.3-70b-versatile",
                 messages=[
                     {"role": "system", "content": "You are an AI assistant that writes professional email replies."},
@@ -86,19 +119,15 @@ class OutlookAgent(Agent):
                 ],
                 max_tokens=200
             )
-            return response.choices[0].message.content.strip()
+            return response.strip()
 
         except Exception as e:
             print(f"Error generating reply: {e}")
             return "Sorry, I couldn't generate a response at this moment."
 
-    def send_email_reply(self, recipient, original_subject, reply_body, message_id):
+    async def send_email_reply(self, recipient, original_subject, reply_body, message_id):
         """Send an email reply to the original sender."""
         try:
-            headers = {
-                "Authorization": f"Bearer {self.access_token}",
-                "Content-Type": "application/json"
-            }
             reply_data = {
                 "message": {
                     "subject": f"Re: {original_subject}",
@@ -113,9 +142,10 @@ class OutlookAgent(Agent):
                 "comment": "Replying to your email."
             }
 
-            # Send reply using Microsoft Graph API
-            url = f"https://graph.microsoft.com/v1.0/me/messages/{message_id}/reply"
-            response = requests.post(url, headers=headers, data=json.dumps(reply_data))
+            response = await self.post_reply(message_id, reply_data)
+            if response.status_code == 401:  # Revoked or expired early: renew once and retry
+                await self.ensure_access_token(force=True)
+                response = await self.post_reply(message_id, reply_data)
 
             if response.status_code == 202:
                 print(f"Reply sent successfully to {recipient}")
@@ -124,3 +154,15 @@ class OutlookAgent(Agent):
 
         except Exception as e:
             print(f"Error sending email reply: {e}")
+
+    async def post_reply(self, message_id, reply_data):
+        headers = {
+            "Authorization": f"Bearer {await self.ensure_access_token()}",
+            "Content-Type": "application/json"
+        }
+        # Send reply using Microsoft Graph API
+        url = f"https://graph.microsoft.com/v1.0/me/messages/{message_id}/reply"
+        with span("graph.send_reply"):
+            return await asyncio.to_thread(
+                requests.post, url, headers=headers, data=json.dumps(reply_data)
+            )
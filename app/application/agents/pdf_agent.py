@@ -1,25 +1,16 @@
-import os
 from typing import Optional
-import fitz  # PyMuPDF
-import groq
 from uuid import uuid4
 from fastapi import FastAPI, UploadFile, File, HTTPException, APIRouter
 from fastapi.responses import JSONResponse
 from io import BytesIO
-from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import CharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from app.domain.interfaces import Agent
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
+from app.infrastructure.services.vector.embedding_registry import embedding_registry
 
 # Initialize FastAPI and Router
 app = FastAPI()
 pdfRouter = APIRouter()
 
-# Initialize embedding model
-embedding_model = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
-
 # Store FAISS indexes and track latest file
 vector_db = {}
 latest_file_id = None  # Track the latest uploaded PDF
@@ -27,6 +18,8 @@ latest_file_id = None  # Track the latest uploaded PDF
 
 def extract_text_from_pdf(pdf_bytes: bytes) -> str:
     """Extracts text from a PDF file using PyMuPDF (fitz)."""
+    import fitz  # PyMuPDF, imported on first upload to keep startup fast
+
     text = ""
     try:
         doc = fitz.open(stream=BytesIO(pdf_bytes), filetype="pdf")
@@ -41,6 +34,11 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> str:
 def store_text_in_faiss(file_id: str, text: str):
     """Stores extracted text in FAISS for retrieval."""
     global latest_file_id
+    from langchain_community.vectorstores import FAISS
+    from langchain_text_splitters import CharacterTextSplitter
+
+    # Embedding model shared with the Chroma vector store
+    embedding_model = embedding_registry.langchain("sentence-transformers/all-MiniLM-L6-v2")
     try:
         text_splitter = CharacterTextSplitter(chunk_size=500, chunk_overlap=50)
         documents = text_splitter.create_documents([text])
@@ -78,9 +76,6 @@ async def upload_pdf(file: UploadFile = File(...)):
 
 
 class PdfAgent(Agent):
-    def __init__(self):
-        self.GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
     async def handle_query(self, userChatQuery: str, userChatHistory: str,userContent: Optional[str] = None) -> str:
         """Handles user queries and provides responses based on the latest uploaded PDF."""
         if latest_file_id is None or latest_file_id not in vector_db:
@@ -90,9 +85,7 @@ class PdfAgent(Agent):
         relevant_content = retriever.get_relevant_documents(userChatQuery)
         context = "\n".join([doc.page_content for doc in relevant_content])
 
-        client = groq.Client(api_key=self.GROQ_API_KEY)
-
-        response = client.chat.completions.create(
+        response = await llm_gateway.chat(
             model="mixtral-8x7b-32768",
             messages=[
                 {
@@ -107,7 +100,7 @@ class PdfAgent(Agent):
             max_tokens=150,
         )
 
-        return response.choices[0].message.content.strip()
+        return response.strip()
 
 
 # Include router
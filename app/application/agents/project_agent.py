@@ -1,34 +1,51 @@
+import asyncio
 import json
-import os
 import re
 from typing import Optional
+from app.core.tracing import span
 from app.domain.interfaces import Agent
-from app.infrastructure.services.vector.vector_store import retrieve_relevant_text
+from app.application.agents.retrieval_context import retrieval_context_builder
+from app.infrastructure.services.vector.vector_store import entity_ids_by_name, retrieve_hits
 from app.domain.projectApis.project_service_mongo_implementation import (
     ProjectServiceMongoImplementation,
 )
-import groq
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
 from fastapi.encoders import jsonable_encoder
 from openai import OpenAI
 
 project_service = ProjectServiceMongoImplementation()
 
+# Query keywords that narrow retrieval to the Mongo collections they name
+COLLECTION_KEYWORDS = {
+    "projects": ("project",),
+    "risks": ("risk",),
+    "tasks": ("task",),
+    "stakeholders": ("stakeholder",),
+    "issue_tracking": ("issue",),
+    "budget_allocations": ("budget", "allocation", "funding"),
+    "reports": ("report",),
+    "departments": ("department",),
+    "portfolios": ("portfolio",),
+}
+# Projects carry their own total_budget/funding_source, so budget questions search both
+BUDGET_COLLECTIONS = {"budget_allocations", "projects"}
+KNOWN_STATUSES = ("In Progress", "Pending Review", "Planned", "Completed", "Open")
+STATUS_PATTERNS = [
+    (status, re.compile(rf"\b{re.escape(status.lower())}\b")) for status in KNOWN_STATUSES
+]
 
-class ProjectAgent(Agent):
-    def __init__(self):
-        """Initialize the LLM client"""
-        self.client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
 
+class ProjectAgent(Agent):
     async def handle_query(self, userChatQuery, chatHistory,userContent: Optional[str] = None):
         """Handles user queries by detecting intent and processing accordingly."""
-        intent = self.detect_intent(userChatQuery)
+        intent = await self.detect_intent(userChatQuery)
 
         if intent == "create_project":
-            project_data = self.get_project_details(userChatQuery, chatHistory)
+            project_data = await self.get_project_details(userChatQuery, chatHistory)
 
             if not self.is_project_data_complete(project_data):
                 missing_fields = self.get_missing_fields(project_data)
-                followup_query = self.ask_followup_questions(missing_fields)
+                followup_query = await self.ask_followup_questions(missing_fields)
                 return followup_query  # Ask user for missing details
 
             wrapped_data = self.wrap_project_data(project_data)
@@ -36,9 +53,22 @@ class ProjectAgent(Agent):
             return response  # Return API response
 
         else:  # Default to retrieving project details
-            return self.retrieve_project_details(userChatQuery, chatHistory)
+            return await self.retrieve_project_details(userChatQuery, chatHistory)
+
+    async def stream_query(self, userChatQuery, chatHistory, userContent: Optional[str] = None):
+        """Streams project answers; project creation replies are returned in one piece."""
+        intent = await self.detect_intent(userChatQuery)
+
+        if intent == "create_project":
+            response = await self.handle_query(userChatQuery, chatHistory, userContent)
+            yield json.dumps(response) if isinstance(response, dict) else str(response)
+            return
+
+        prompt = await self.build_retrieval_prompt(userChatQuery, chatHistory)
+        async for delta in self.stream_llm(prompt):
+            yield delta
 
-    def detect_intent(self, user_query):
+    async def detect_intent(self, user_query):
         """Identifies whether the user wants to create a project or get details."""
         prompt = (
             f"User Query: {user_query}\n"
@@ -47,10 +77,10 @@ class ProjectAgent(Agent):
             "- 'get_project_details' if the user wants details about an existing project.\n"
             "Respond with only one of these two words."
         )
-        response = self.query_llm(prompt)
+        response = await self.query_llm(prompt, temperature=0, cache_site="project_intent")
         return response.strip().lower()
 
-    def get_project_details(self, user_query, chatHistory):
+    async def get_project_details(self, user_query, chatHistory):
         """Extracts required details for creating a project."""
         prompt = (
             f"User Query: {user_query}, Chat History: {chatHistory}\n"
@@ -68,7 +98,7 @@ class ProjectAgent(Agent):
             "- created_by\n"
             "Respond with a JSON object containing the extracted values.no extra text, just the JSON object."
         )
-        response = self.query_llm(prompt)
+        response = await self.query_llm(prompt)
         try:
             # Remove Markdown JSON code block markers (```json ... ```)
             cleaned_response = re.sub(r"```json|```", "", response).strip()
@@ -121,12 +151,12 @@ class ProjectAgent(Agent):
         ]
         return [field for field in required_fields if not project_data.get(field)]
 
-    def ask_followup_questions(self, missing_fields):
+    async def ask_followup_questions(self, missing_fields):
         prompt = (
             f"The user wants to create a project but is missing the following details: {', '.join(missing_fields)}.\n"
             "Ask a follow-up question to get the missing details."
         )
-        response = self.query_llm(prompt)
+        response = await self.query_llm(prompt)
         return response  # Return follow-up question
 
     def wrap_project_data(self, project_data):
@@ -148,41 +178,98 @@ class ProjectAgent(Agent):
     async def create_project_api(self, project_data):
         """Sends the project data to the CreateProject API and returns the response."""
         project_data = jsonable_encoder(project_data)
-        response = await project_service.CreateProject(project_data)
+        with span("mongo.create_project"):
+            response = await project_service.CreateProject(project_data)
         return response
 
-    def retrieve_project_details(self, userChatQuery, chatHistory):
+    async def retrieve_project_details(self, userChatQuery, chatHistory):
         """Handles retrieval of project details."""
-        retrieved_data = retrieve_relevant_text(userChatQuery)
-        if not isinstance(retrieved_data, list):
-            retrieved_data = [retrieved_data]
-        formatted_context = "\n".join(
-            (
-                f"- {item.get('collection_name', 'Unknown')}: {item.get('description', item.get('risk_description', item.get('name', 'No description available')))}"
-                if isinstance(item, dict)
-                else f"- {item}"
-            )
-            for item in retrieved_data
-        )
+        prompt = await self.build_retrieval_prompt(userChatQuery, chatHistory)
+        response = await self.query_llm(prompt)
+        return response
+
+    async def build_retrieval_prompt(self, userChatQuery, chatHistory):
+        """Retrieves relevant records and builds the question-answering prompt."""
+        # Embedding and Chroma lookups are blocking, keep them off the event loop
+        with span("project.retrieve"):
+            hits = await asyncio.to_thread(self.retrieve, userChatQuery)
+        with span("project.render_context", hits=len(hits)):
+            formatted_context, _ = retrieval_context_builder.build(hits)
+        if not formatted_context:
+            formatted_context = "No matching records found."
         prompt = (
             f"Question: {userChatQuery}\n"
             f"Chat History: {chatHistory}\n"
             f"Context:\n{formatted_context}\n"
             f"Answer:"
         )
-        response = self.query_llm(prompt)
-        return response
+        return prompt
+
+    def retrieve(self, userChatQuery):
+        filters = self.infer_retrieval_filters(userChatQuery)
+        return retrieve_hits(userChatQuery, **filters)
 
-    def query_llm(self, prompt):
+    def infer_retrieval_filters(self, userChatQuery):
+        """Derives Chroma metadata filters from keywords and known names, without an LLM call."""
+        query = userChatQuery.lower()
+        filters = {}
+
+        collections = {
+            collection_name
+            for collection_name, keywords in COLLECTION_KEYWORDS.items()
+            if any(re.search(rf"\b{keyword}", query) for keyword in keywords)
+        }
+
+        # A named department or portfolio qualifies the question rather than being its subject
+        for collection_name, key in (("departments", "department_id"), ("portfolios", "portfolio_id")):
+            try:
+                names = entity_ids_by_name(collection_name)
+            except Exception as e:
+                print(f"Error loading {collection_name} names: {e}")
+                continue
+            entity_id = next((names[name] for name in names if name in query), None)
+            if entity_id:
+                filters[key] = entity_id
+                collections.discard(collection_name)
+
+        if "budget_allocations" in collections:
+            collections |= BUDGET_COLLECTIONS
+        elif len(collections) > 1:
+            collections.discard("projects")  # "risks of the X project" is about risks
+        if len(collections) == 1:
+            filters["collection_name"] = collections.pop()
+        elif collections:
+            filters["collection_name"] = sorted(collections)  # Matched with $in
+
+        # Whole words only, so "unplanned" is not "Planned"
+        status = next((status for status, pattern in STATUS_PATTERNS if pattern.search(query)), None)
+        if status:
+            filters["status"] = status
+
+        return filters
+
+    def build_messages(self, prompt):
+        return [
+            {
+                "role": "system",
+                "content": "You are an AI assistant for project management.",
+            },
+            {"role": "user", "content": prompt},
+        ]
+
+    async def query_llm(self, prompt, **params):
         """Sends the prompt to LLM and returns the response."""
-        response = self.client.chat.completions.create(
+        return await llm_gateway.chat(
             model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an AI assistant for project management.",
-                },
-                {"role": "user", "content": prompt},
-            ],
+            messages=self.build_messages(prompt),
+            **params,
         )
-        return response.choices[0].message.content
+
+    async def stream_llm(self, prompt, **params):
+        """Sends the prompt to LLM and yields the response as it is generated."""
+        async for delta in llm_gateway.stream_chat(
+            model="llama-3.3-70b-versatile",
+            messages=self.build_messages(prompt),
+            **params,
+        ):
+            yield delta
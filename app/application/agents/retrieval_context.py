@@ -0,0 +1,119 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from app.application.orchestrator.tokenizer import count_tokens
+from app.core.config import Settings
+from app.infrastructure.services.vector.vector_store import RetrievalHit
+
+# Fields shown per collection, most important first; the first one is the hit's title.
+# A trailing "*" matches every flattened key with that prefix (e.g. nested contact details).
+COLLECTION_TEMPLATES: Dict[str, Tuple[str, ...]] = {
+    "projects": ("name", "status", "total_budget", "funding_source", "start_date", "end_date", "description"),
+    "programs": ("name", "start_date", "end_date", "description"),
+    "portfolios": ("name", "description"),
+    "departments": ("name", "contact_details_*"),
+    "budget_allocations": ("project_id", "allocated_budget", "spent_budget", "remaining_budget", "approval_status"),
+    "tasks": ("name", "status", "priority", "due_date", "entity_type"),
+    "stakeholders": ("name", "organization", "role", "impact_level"),
+    "risks": ("risk_description", "risk_type", "impact", "probability", "status", "mitigation_plan"),
+    "issue_tracking": ("description", "status", "resolution_notes"),
+    "lost_projects": ("reason_for_loss", "status", "recovery_plan"),
+    "reports": ("report_type", "generated_date", "data_snapshot_*"),
+    "users": ("name", "role", "email"),
+}
+
+# Never useful to the LLM: bookkeeping, ids and the duplicated full text
+OMITTED_FIELDS = {
+    "_id", "text", "content_hash", "collection_name", "created_at", "updated_at", "parent_id", "chunk",
+}
+
+
+@dataclass
+class ContextHit:
+    id: str
+    collection: str
+    score: float
+    fields: Dict[str, object] = field(default_factory=dict)
+
+
+class RetrievalContextBuilder:
+    """Turns retrieval hits into a compact, token-budgeted context block.
+
+    Each hit becomes one line with only its collection's template fields, long values are
+    clipped, and hits are added best first until the token budget is used up.
+    """
+
+    def __init__(self, token_budget: int, max_value_chars: int = 200):
+        self.token_budget = token_budget
+        self.max_value_chars = max_value_chars
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "hits_rendered": 0, "hits_dropped": 0, "tokens": 0}
+
+    def select(self, hit: RetrievalHit) -> ContextHit:
+        template = COLLECTION_TEMPLATES.get(hit.collection)
+        if template is None:
+            # Unknown collection: everything except bookkeeping and foreign keys
+            keys = [
+                key for key in hit.metadata
+                if key not in OMITTED_FIELDS and not key.endswith("_id")
+            ]
+        else:
+            keys = []
+            for name in template:
+                if name.endswith("*"):
+                    keys.extend(key for key in hit.metadata if key.startswith(name[:-1]))
+                elif name in hit.metadata:
+                    keys.append(name)
+            # For chunked documents, the fields of the chunks that matched are the point
+            keys.extend(key for key in hit.matched_fields if key not in keys)
+
+        fields = {}
+        for key in keys:
+            value = hit.metadata[key]
+            if value in (None, "", "None"):
+                continue
+            text = str(value)
+            if len(text) > self.max_value_chars:
+                text = text[: self.max_value_chars - 1] + "…"
+            fields[key] = text
+        return ContextHit(id=hit.id, collection=hit.collection, score=hit.score, fields=fields)
+
+    def render_hit(self, hit: ContextHit) -> str:
+        if not hit.fields:
+            return f"- [{hit.collection}] {hit.id}"
+        items = iter(hit.fields.items())
+        _, title = next(items)
+        details = " | ".join(f"{key}: {value}" for key, value in items)
+        return f"- [{hit.collection}] {title}" + (f" | {details}" if details else "")
+
+    def build(self, hits: List[RetrievalHit]) -> Tuple[str, List[ContextHit]]:
+        """Returns the rendered context and the hits that made it in."""
+        lines, included, used = [], [], 0
+        for hit in hits:
+            context_hit = self.select(hit)
+            line = self.render_hit(context_hit)
+            tokens = count_tokens(line) + 1  # Newline
+            if used + tokens > self.token_budget:
+                break
+            lines.append(line)
+            included.append(context_hit)
+            used += tokens
+
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["hits_rendered"] += len(included)
+            self.counters["hits_dropped"] += len(hits) - len(included)
+            self.counters["tokens"] += used
+        return "\n".join(lines), included
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+settings = Settings()
+retrieval_context_builder = RetrievalContextBuilder(
+    token_budget=settings.retrieval_context_tokens,
+    max_value_chars=settings.retrieval_context_max_value_chars,
+)
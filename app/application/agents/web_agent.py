@@ -1,19 +1,17 @@
 import json
-import os
 import re
 from typing import Optional
 from bs4 import BeautifulSoup  # For web scraping general URLs
-import groq
 import requests
 from app.domain.interfaces import Agent
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
 
 
 class WebAgent(Agent):
 
     async def handle_query(self, userChatQuery: str, userChatHistory: str,userContent: Optional[str] = None) -> str:
-        client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
         # Query Groq LLM to determine which agent to call
-        response = client.chat.completions.create(
+        response = await llm_gateway.chat(
             model="llama-3.3-70b-versatile",
             messages=[
                 {
@@ -30,9 +28,11 @@ class WebAgent(Agent):
                 },
             ],
             max_tokens=10,
+            temperature=0,
+            cache_site="web_intent",
         )
 
-        query_lower = response.choices[0].message.content.strip().lower()
+        query_lower = response.strip().lower()
 
         # Determine the type of query (summarize, points, highlight)
         if query_lower == "summarize":
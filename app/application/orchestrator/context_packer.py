@@ -0,0 +1,136 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from app.application.orchestrator.memory_store import Turn
+from app.application.orchestrator.tokenizer import chunk_text, count_tokens
+from app.infrastructure.services.vector.embedding_batcher import embedding_batcher
+from app.infrastructure.services.vector.embedding_service import embedding_model
+
+
+@dataclass
+class PackedContext:
+    query_chunks: List[str]  # One chunk unless the query alone exceeds the budget
+    history: str
+    tokens_used: int
+    tokens_saved: int  # Query + full history tokens minus what is actually sent
+    kept_turns: int
+    dropped_turns: int
+
+
+class ContextPacker:
+    """Builds one prompt context per request within a model-specific token budget.
+
+    The most recent turns are always kept, older turns are added by embedding similarity
+    to the query while they fit, and the rest are reduced to a one-line extractive summary.
+    """
+
+    def __init__(
+        self,
+        model_budgets: Dict[str, int],
+        default_budget: int,
+        recent_turns: int,
+        summary_tokens: int,
+    ):
+        self.model_budgets = model_budgets
+        self.default_budget = default_budget
+        self.recent_turns = recent_turns
+        self.summary_tokens = summary_tokens
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "tokens_used": 0, "tokens_saved": 0}
+
+    def budget_for(self, model: str) -> int:
+        return self.model_budgets.get(model, self.default_budget)
+
+    def pack(self, model: str, query: str, turns: List[Turn]) -> PackedContext:
+        budget = self.budget_for(model)
+        query_tokens = count_tokens(query)
+        history_tokens = sum(turn.tokens for turn in turns)
+
+        if query_tokens >= budget:
+            # The query alone fills the budget: send it in pieces, without history
+            packed = PackedContext(
+                query_chunks=chunk_text(query, budget),
+                history="",
+                tokens_used=query_tokens,
+                tokens_saved=history_tokens,
+                kept_turns=0,
+                dropped_turns=len(turns),
+            )
+            self._record(packed)
+            return packed
+
+        remaining = budget - query_tokens
+        kept = set()
+
+        # 1. Most recent turns, newest first
+        for index in range(len(turns) - 1, max(-1, len(turns) - 1 - self.recent_turns), -1):
+            if turns[index].tokens > remaining:
+                break
+            kept.add(index)
+            remaining -= turns[index].tokens
+
+        # 2. Older turns by relevance to the query
+        older = [index for index in range(len(turns)) if index not in kept]
+        if older and remaining > 0:
+            for index in self._rank_by_relevance(query, turns, older):
+                if turns[index].tokens <= remaining:
+                    kept.add(index)
+                    remaining -= turns[index].tokens
+
+        # 3. One-line summary of whatever did not fit
+        dropped = [turns[index] for index in range(len(turns)) if index not in kept]
+        summary = self._summarize(dropped, min(remaining, self.summary_tokens))
+
+        lines = [summary] if summary else []
+        lines.extend(turns[index].render() for index in sorted(kept))
+        history = "\n".join(lines)
+
+        tokens_used = budget - remaining + count_tokens(summary)  # Query + kept turns + summary
+        packed = PackedContext(
+            query_chunks=[query],
+            history=history,
+            tokens_used=tokens_used,
+            tokens_saved=max(0, query_tokens + history_tokens - tokens_used),
+            kept_turns=len(kept),
+            dropped_turns=len(dropped),
+        )
+        self._record(packed)
+        return packed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+    def _rank_by_relevance(self, query: str, turns: List[Turn], indexes: List[int]) -> List[int]:
+        missing = [index for index in indexes if turns[index].embedding is None]
+        if missing:
+            vectors = embedding_model.encode([turns[index].render() for index in missing])
+            for index, vector in zip(missing, vectors):
+                turns[index].embedding = vector / np.linalg.norm(vector)  # Cached on the turn
+
+        query_vector = embedding_batcher.encode(query)
+        query_vector = query_vector / np.linalg.norm(query_vector)
+        similarities = [float(turns[index].embedding @ query_vector) for index in indexes]
+        return [index for _, index in sorted(zip(similarities, indexes), reverse=True)]
+
+    def _summarize(self, dropped: List[Turn], token_limit: int) -> str:
+        if not dropped or token_limit <= 0:
+            return ""
+
+        summary = "Earlier topics:"
+        for turn in dropped:
+            topic = " ".join(turn.user.split()[:12])
+            candidate = f"{summary} {topic};"
+            if count_tokens(candidate) > token_limit:
+                break
+            summary = candidate
+        return summary if summary.endswith(";") else ""
+
+    def _record(self, packed: PackedContext):
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["tokens_used"] += packed.tokens_used
+            self.counters["tokens_saved"] += packed.tokens_saved
@@ -0,0 +1,70 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.infrastructure.services.vector.embedding_batcher import embedding_batcher
+from app.infrastructure.services.vector.embedding_service import embedding_model
+
+EXEMPLARS_FILE = os.path.join(os.path.dirname(__file__), "routing_exemplars.json")
+
+
+class EmbeddingIntentRouter:
+    """Routes a query to an agent by cosine similarity against per-agent exemplar centroids."""
+
+    def __init__(
+        self,
+        threshold: float,
+        min_margin: float,
+        exemplars_file: str = EXEMPLARS_FILE,
+    ):
+        self.threshold = threshold
+        self.min_margin = min_margin
+        self.exemplars_file = exemplars_file
+        self.labels: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+
+    def load(self):
+        """Embeds the labelled exemplars once and keeps one normalized centroid per agent."""
+        with open(self.exemplars_file, encoding="utf-8") as f:
+            exemplars: Dict[str, List[str]] = json.load(f)
+
+        labels, centroids = [], []
+        for label, examples in exemplars.items():
+            if not examples:
+                continue
+            vectors = np.asarray(embedding_model.encode(examples), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            centroid = vectors.mean(axis=0)
+            labels.append(label)
+            centroids.append(centroid / np.linalg.norm(centroid))
+
+        self.labels = labels
+        self.centroids = np.vstack(centroids)
+
+    def scores(self, query: str) -> List[Tuple[str, float]]:
+        """Returns (agent, cosine similarity) pairs, best first."""
+        if self.centroids is None:
+            self.load()
+
+        query_vector = np.asarray(embedding_batcher.encode(query), dtype=np.float32)
+        query_vector = query_vector / np.linalg.norm(query_vector)  # The cached vector is read-only
+        similarities = self.centroids @ query_vector
+
+        ranked = np.argsort(-similarities)
+        return [(self.labels[i], float(similarities[i])) for i in ranked]
+
+    def classify(self, query: str) -> Optional[str]:
+        """Returns the agent name when the match is confident enough, otherwise None."""
+        if not query or not query.strip():
+            return None
+
+        ranked = self.scores(query)
+        best_label, best_score = ranked[0]
+        runner_up_score = ranked[1][1] if len(ranked) > 1 else -1.0
+
+        if best_score < self.threshold or best_score - runner_up_score < self.min_margin:
+            return None  # Not confident, let the LLM decide
+
+        return best_label
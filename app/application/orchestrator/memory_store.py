@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Optional
+
+from app.application.orchestrator.tokenizer import count_tokens, truncate_tokens
+
+DEFAULT_SESSION_ID = "default"
+
+
+@dataclass
+class Turn:
+    user: str
+    assistant: str
+    tokens: int  # Counted once when the turn is saved
+    created_at: float = field(default_factory=time.time)
+    embedding: Optional[Any] = field(default=None, repr=False)  # Filled by the context packer
+
+    def render(self) -> str:
+        return f"User: {self.user}\nAssistant: {self.assistant}"
+
+
+class SessionMemory:
+    """Sliding window of the most recent turns of one session, kept within a token budget."""
+
+    def __init__(self, token_budget: int):
+        self.token_budget = token_budget
+        self.turns: Deque[Turn] = deque()
+        self.tokens = 0
+        self.last_access = time.time()
+        self._rendered: Optional[str] = None
+
+    def add(self, turn: Turn):
+        self.turns.append(turn)
+        self.tokens += turn.tokens
+        self._rendered = None
+
+        # Drop the oldest turns once the window is over budget
+        while self.tokens > self.token_budget and len(self.turns) > 1:
+            self.tokens -= self.turns.popleft().tokens
+
+    def render(self) -> str:
+        if self._rendered is None:
+            self._rendered = "\n".join(turn.render() for turn in self.turns)
+        return self._rendered
+
+
+class SessionMemoryStore:
+    """Per-session conversation memory with LRU eviction of idle sessions.
+
+    An optional backend (see `SQLiteMemoryBackend`) persists turns so that evicted
+    sessions and restarts do not lose history; only the in-budget window is reloaded.
+    """
+
+    def __init__(
+        self,
+        token_budget: int,
+        max_sessions: int,
+        idle_ttl: float,
+        backend=None,
+    ):
+        self.token_budget = token_budget
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.backend = backend
+        self._sessions: "OrderedDict[str, SessionMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_history(self, session_id: str) -> str:
+        """Returns the session's history window rendered as text."""
+        with self._lock:
+            return self._get_session(session_id).render()
+
+    def get_turns(self, session_id: str):
+        """Returns the turns currently in the session's window, oldest first."""
+        with self._lock:
+            return list(self._get_session(session_id).turns)
+
+    def save_turn(self, session_id: str, user_message: str, assistant_message: str):
+        """Appends a turn to the session, truncating it if it alone exceeds the budget."""
+        turn = Turn(user=user_message, assistant=assistant_message, tokens=0)
+        turn.tokens = count_tokens(turn.render())
+        if turn.tokens > self.token_budget:
+            turn.assistant = truncate_tokens(turn.assistant, self.token_budget // 2)
+            turn.user = truncate_tokens(turn.user, self.token_budget // 2)
+            turn.tokens = count_tokens(turn.render())
+
+        with self._lock:
+            self._get_session(session_id).add(turn)
+
+        if self.backend:
+            self.backend.append_turn(
+                session_id, turn.user, turn.assistant, turn.tokens, turn.created_at
+            )
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.backend:
+            self.backend.delete_session(session_id)
+
+    def _get_session(self, session_id: str) -> SessionMemory:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._load_session(session_id)
+            self._sessions[session_id] = session
+        else:
+            self._sessions.move_to_end(session_id)
+
+        session.last_access = time.time()
+        self._evict()
+        return session
+
+    def _load_session(self, session_id: str) -> SessionMemory:
+        session = SessionMemory(self.token_budget)
+        if self.backend:
+            for user, assistant, tokens, created_at in self.backend.load_turns(
+                session_id, self.token_budget
+            ):
+                session.add(Turn(user, assistant, tokens, created_at))
+        return session
+
+    def _evict(self):
+        """Drops idle sessions and, past `max_sessions`, the least recently used ones."""
+        now = time.time()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            idle = now - session.last_access > self.idle_ttl
+            if not idle and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
@@ -0,0 +1,31 @@
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto one in-flight computation."""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.counters = {"executed": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        """Runs fn() unless a call with the same key is already running, then shares its result."""
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+            self.counters["executed"] += 1
+        else:
+            self.counters["coalesced"] += 1
+
+        # Shield so one caller disconnecting does not cancel the shared computation
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {**self.counters, "in_flight": len(self._calls)}
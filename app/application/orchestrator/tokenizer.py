@@ -0,0 +1,44 @@
+from functools import lru_cache
+
+import tiktoken
+
+# Tokenizer setup
+TOKEN_LIMIT = 4000  # Keep buffer under Groq’s 5000-token limit
+
+
+@lru_cache(maxsize=None)
+def get_encoder():
+    """Loads the tokenizer on first use (it reads/downloads the BPE ranks)."""
+    return tiktoken.get_encoding("cl100k_base")  # Use the right tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """Returns the number of tokens in text."""
+    return len(get_encoder().encode(text)) if text else 0
+
+
+def truncate_tokens(text: str, token_limit: int) -> str:
+    """Keeps only the last `token_limit` tokens of text."""
+    encoder = get_encoder()
+    tokens = encoder.encode(text)
+    if len(tokens) <= token_limit:
+        return text
+    return encoder.decode(tokens[-token_limit:])
+
+
+def chunk_text(text: str, token_limit: int = TOKEN_LIMIT):
+    """Splits text into chunks based on token limits."""
+    if not isinstance(text, str):  # Ensure input is a string
+        text = str(text)  # Convert non-string input to string
+
+    if not text.strip():  # Avoid empty input
+        return []
+
+    encoder = get_encoder()
+    tokens = encoder.encode(text)
+    chunks = [
+        encoder.decode(tokens[i : i + token_limit])
+        for i in range(0, len(tokens), token_limit)
+    ]
+
+    return chunks
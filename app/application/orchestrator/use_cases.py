@@ -1,155 +1,270 @@
-import os
+import asyncio
+import hashlib
 import json
 from typing import Optional
-import groq  # Assuming you are using Groq's API
-import tiktoken
 from dotenv import load_dotenv
-from langchain.memory import ConversationBufferMemory
-from app.application.agents.ms_excel_agent import MSExcelAgent
-from app.application.agents.ms_word_agent import MSWordAgent
-from app.application.agents.gmail_agent import GmailAgent
-from app.application.agents.medical_agent import MedicalAgent
-from app.application.agents.outlook_agent import OutlookAgent
-from app.application.agents.pdf_agent import PdfAgent
-from app.application.agents.social_media_agent import SocialMediaAgent
-from app.application.agents.calendar_agent import CalendarAgent
-from app.application.agents.general_agent import GeneralAgent
-from app.application.agents.web_agent import WebAgent
-from app.application.agents.project_agent import ProjectAgent
-from app.core.di import Container
-from openai import OpenAI
+from app.application.agents.agent_registry import AgentRegistry
+from app.core.config import Settings
+from app.core.tracing import span
+from app.application.orchestrator.intent_router import EmbeddingIntentRouter
+from app.application.orchestrator.memory_store import (
+    DEFAULT_SESSION_ID,
+    SessionMemoryStore,
+)
+from app.application.orchestrator.single_flight import SingleFlight
+from app.application.orchestrator.context_packer import ContextPacker
+from app.infrastructure.db.sqlite_memory import SQLiteMemoryBackend
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
 
 load_dotenv()
 
-# Tokenizer setup
-TOKEN_LIMIT = 4000  # Keep buffer under Groq’s 5000-token limit
-encoder = tiktoken.get_encoding("cl100k_base")  # Use the right tokenizer
+settings = Settings()
 
 # Conversation Memory Setup
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+memory_store = SessionMemoryStore(
+    token_budget=settings.memory_token_budget,
+    max_sessions=settings.memory_max_sessions,
+    idle_ttl=settings.memory_idle_ttl,
+    backend=(
+        SQLiteMemoryBackend(settings.memory_sqlite_path)
+        if settings.memory_backend == "SQLite"
+        else None
+    ),
+)
 
+# Builds one query + history context per request instead of chunk pairs
+context_packer = ContextPacker(
+    model_budgets=settings.context_model_budgets,
+    default_budget=settings.context_default_budget,
+    recent_turns=settings.context_recent_turns,
+    summary_tokens=settings.context_summary_tokens,
+)
 
-def chunk_text(text: str, token_limit: int = TOKEN_LIMIT):
-    """Splits text into chunks based on token limits."""
-    if not isinstance(text, str):  # Ensure input is a string
-        text = str(text)  # Convert non-string input to string
+# Concurrent identical chat requests share one orchestrator run
+chat_flight = SingleFlight()
 
-    if not text.strip():  # Avoid empty input
-        return []
+# Model whose context budget applies to the packed prompt
+AGENT_MODEL = "llama-3.3-70b-versatile"
 
-    tokens = encoder.encode(text)
-    chunks = [
-        encoder.decode(tokens[i : i + token_limit])
-        for i in range(0, len(tokens), token_limit)
-    ]
+# 🔗 Map decision to corresponding agent (imported lazily, see AgentRegistry)
+AGENT_MAPPING = {
+    "medical": "app.application.agents.medical_agent:MedicalAgent",
+    "project": "app.application.agents.project_agent:ProjectAgent",
+    "social_media": "app.application.agents.social_media_agent:SocialMediaAgent",
+    "calendar": "app.application.agents.calendar_agent:CalendarAgent",
+    "general": "app.application.agents.general_agent:GeneralAgent",
+    "web_agent": "app.application.agents.web_agent:WebAgent",
+    "pdf_agent": "app.application.agents.pdf_agent:PdfAgent",
+    "gmail": "app.application.agents.gmail_agent:GmailAgent",
+    "outlook": "app.application.agents.outlook_agent:OutlookAgent",
+    "ms_excel_agent_in_agent": "app.application.agents.ms_excel_agent:MSExcelAgent",
+    "ms_word_agent_in_agent": "app.application.agents.ms_word_agent:MSWordAgent",
+}
 
-    return chunks
+# Agents are imported and constructed on first use and shared across requests
+agent_registry = AgentRegistry(AGENT_MAPPING)
+
+# Local router that answers confident cases without calling the LLM
+intent_router = EmbeddingIntentRouter(
+    threshold=settings.intent_router_threshold,
+    min_margin=settings.intent_router_min_margin,
+)
+
+
+ROUTING_SYSTEM_PROMPT = (
+    "You are a smart AI assistant that engages in **conversational** discussions. "
+    "Your goal is to understand user queries, recall past conversations, and provide responses in a **natural and interactive way**."
+    "\n\n"
+    "🔹 You must route queries to the correct agent while maintaining the conversation flow."
+    "🔹 Always consider the **user’s past messages** to provide relevant responses."
+    "🔹 If the user continues a previous topic, stay on track and do not repeat previous explanations."
+    "🔹 Your tone should be friendly, engaging, and interactive."
+    "🔹 You can ask questions to user for all the respones or when they tell someting incomplete."
+    "\n\n"
+    "Available agents and their roles:\n"
+    "📌 'project' → Handles business projects, strategies, execution, and risk management.\n"
+    "📌 'medical' → Provides health-related insights, symptom analysis, and medical recommendations.\n"
+    "📌 'social_media' → Assists with social media planning, branding, and content strategy.\n"
+    "📌 'calendar' → Manages meeting schedules and event organization.\n"
+    "📌 'general' → Covers all other casual or undefined queries.\n"
+    "📌 'web_agent' → (specializes in web scraping).\n "
+    "📌 'pdf_agent' → (specializes in PDF processing).\n "
+    "📌 'gmail' → (specializes in gmail management).\n "
+    "📌 'outlook' → (specializes in email management).\n "
+    "📌 'ms_excel_agent_in_agent' → (specializes in microfoft excel processing).\n "
+    "📌 'ms_word_agent_in_agent' → (specializes in microfoft word processing).\n "
+    "\n\n"
+    "If the user’s message follows up on a past topic, assume continuity and respond accordingly."
+)
+
+
+class RoutingError(Exception):
+    """Raised when no agent could be selected for a query."""
+
+
+def coalescing_key(
+    userChatQuery: str, sessionId: Optional[str], userContent: Optional[str]
+) -> str:
+    """Builds the single-flight key from the normalized query and the session context."""
+    normalized_query = " ".join(userChatQuery.lower().split())
+    content_hash = hashlib.sha256((userContent or "").encode("utf-8")).hexdigest()
+    return f"{sessionId or DEFAULT_SESSION_ID}|{content_hash}|{normalized_query}"
+
+
+async def route_query_coalesced(
+    userChatQuery: str,
+    sessionId: Optional[str] = None,
+    userContent: Optional[str] = None,
+):
+    """Runs Orchestrator.route_query, sharing the result with identical in-flight requests."""
+    key = coalescing_key(userChatQuery, sessionId, userContent)
+    return await chat_flight.do(
+        key,
+        lambda: Orchestrator(userChatQuery, userContent, sessionId).route_query(),
+    )
 
 
 class Orchestrator:
-    def __init__(self, userChatQuery: str, userContent: Optional[str] = None):
+    def __init__(
+        self,
+        userChatQuery: str,
+        userContent: Optional[str] = None,
+        sessionId: Optional[str] = None,
+    ):
         self.userChatQuery = userChatQuery
         self.userContent = userContent
-        self.chatHistory = memory.load_memory_variables({})["chat_history"]
-        self.client = groq.Client(api_key=os.getenv("GROQ_API_KEY"))
+        self.sessionId = sessionId or DEFAULT_SESSION_ID
+        self.chatTurns = None  # Loaded by pack_context, off the event loop
+
+    async def classify_locally(self):
+        """Returns the agent chosen by the embedding router, or None to fall back to the LLM."""
+        if not settings.intent_router_enabled:
+            return None
+        try:
+            with span("routing.local") as current:
+                decision = await asyncio.to_thread(intent_router.classify, self.userChatQuery)
+                current.attributes["decision"] = decision
+                return decision
+        except Exception as e:
+            print(f"Error in local intent routing: {e}")
+            return None
+
+    async def classify_chunks(self, query_chunks, history_chunks):
+        """Runs one routing call per (query chunk, history chunk) pair concurrently.
+
+        Calls are capped by `routing_max_concurrency`; a call that fails or exceeds
+        `routing_call_timeout` is skipped so the remaining votes still count.
+        """
+        semaphore = asyncio.Semaphore(settings.routing_max_concurrency)
+
+        async def classify(query_chunk, history_chunk):
+            async with semaphore:
+                try:
+                    with span("routing.llm"):
+                        return await asyncio.wait_for(
+                            self.classify_chunk(query_chunk, history_chunk),
+                            timeout=settings.routing_call_timeout,
+                        )
+                except asyncio.TimeoutError:
+                    print("Error in API request: routing call timed out")
+                except Exception as e:
+                    print(f"Error in API request: {e}")  # Log error
+                return None
+
+        decisions = await asyncio.gather(
+            *(
+                classify(query_chunk, history_chunk)
+                for query_chunk in query_chunks
+                for history_chunk in history_chunks or [""]  # Ensure history exists
+            )
+        )
+        return [decision for decision in decisions if decision]
+
+    async def classify_chunk(self, query_chunk: str, history_chunk: str):
+        """Asks the LLM which agent should handle a single query/history chunk pair."""
+        response = await llm_gateway.chat(
+            model="llama-3.3-70b-versatile",  # Use the best available Groq model
+            # model="mistralai/mistral-small-24b-instruct-2501:free",
+            messages=[
+                {
+                    "role": "system",
+                    "content": ROUTING_SYSTEM_PROMPT,
+                },
+                {
+                    "role": "user",
+                    "content": f"User Query: {query_chunk} \n"
+                    f"Chat History: {history_chunk} \n"
+                    "Which agent should handle this query? Return only the agent name without any explanation.",
+                },
+            ],
+            max_tokens=10,
+            temperature=0,
+            cache_site="routing",
+        )
+        return response.strip().lower()
+
+    async def pack_context(self):
+        """Packs the query and the relevant history into one model-sized context."""
+        # SQLite-backed memory reads (and tokenizes) on disk; keep it off the event loop
+        with span("memory.load"):
+            self.chatTurns = await asyncio.to_thread(memory_store.get_turns, self.sessionId)
+        with span("context.pack", turns=len(self.chatTurns)) as current:
+            packed = await asyncio.to_thread(
+                context_packer.pack, AGENT_MODEL, self.userChatQuery, self.chatTurns
+            )
+            current.attributes.update(
+                tokens_used=packed.tokens_used, tokens_saved=packed.tokens_saved
+            )
+        print(
+            f"Context packed: {packed.tokens_used} tokens used, {packed.tokens_saved} saved "
+            f"({packed.kept_turns} turns kept, {packed.dropped_turns} dropped)"
+        )
+        return packed
+
+    async def select_agent(self, query_chunks, history_chunks):
+        """Picks the agent name for this query."""
+        # ⚡ Try the local embedding router before paying for an LLM round trip
+        decision = await self.classify_locally()
+
+        if not decision:
+            responses = await self.classify_chunks(query_chunks, history_chunks)
+
+            if not responses:  # Prevent empty `max()` call
+                raise RoutingError("Error: No valid response received from Groq API.")
+
+            # Use the most frequent decision
+            decision = max(set(responses), key=responses.count)
+
+        if decision not in agent_registry:
+            raise RoutingError("Error: Agent not found.")
+
+        return decision
 
     async def route_query(self):
         """Routes user query to the correct agent while integrating Voice, Memory, and Sentiment Analysis."""
 
-        # 🚀 Chunk input if it's too long
-        query_chunks = chunk_text(self.userChatQuery)
-        history_chunks = chunk_text(self.chatHistory)
-
-        if not query_chunks:  # Ensure there's valid input
+        if not self.userChatQuery or not self.userChatQuery.strip():  # Ensure there's valid input
             return "Error: Empty query provided."
 
-        responses = []
+        # 🚀 One context within the model budget (query split only if it alone is too long)
+        packed = await self.pack_context()
+        query_chunks = packed.query_chunks
+        history_chunks = [packed.history] if packed.history else []
 
-        for query_chunk in query_chunks:
-            for history_chunk in history_chunks or [""]:  # Ensure history exists
-                try:
-                    response = self.client.chat.completions.create(
-                        model="llama-3.3-70b-versatile",  # Use the best available Groq model
-                        # model="mistralai/mistral-small-24b-instruct-2501:free",
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": "You are a smart AI assistant that engages in **conversational** discussions. "
-                                "Your goal is to understand user queries, recall past conversations, and provide responses in a **natural and interactive way**."
-                                "\n\n"
-                                "🔹 You must route queries to the correct agent while maintaining the conversation flow."
-                                "🔹 Always consider the **user’s past messages** to provide relevant responses."
-                                "🔹 If the user continues a previous topic, stay on track and do not repeat previous explanations."
-                                "🔹 Your tone should be friendly, engaging, and interactive."
-                                "🔹 You can ask questions to user for all the respones or when they tell someting incomplete."
-                                "\n\n"
-                                "Available agents and their roles:\n"
-                                "📌 'project' → Handles business projects, strategies, execution, and risk management.\n"
-                                "📌 'medical' → Provides health-related insights, symptom analysis, and medical recommendations.\n"
-                                "📌 'social_media' → Assists with social media planning, branding, and content strategy.\n"
-                                "📌 'calendar' → Manages meeting schedules and event organization.\n"
-                                "📌 'general' → Covers all other casual or undefined queries.\n"
-                                "📌 'web_agent' → (specializes in web scraping).\n "
-                                "📌 'pdf_agent' → (specializes in PDF processing).\n "
-                                "📌 'gmail' → (specializes in gmail management).\n "
-                                "📌 'outlook' → (specializes in email management).\n "
-                                "📌 'ms_excel_agent_in_agent' → (specializes in microfoft excel processing).\n "
-                                "📌 'ms_word_agent_in_agent' → (specializes in microfoft word processing).\n "
-                                "\n\n"
-                                "If the user’s message follows up on a past topic, assume continuity and respond accordingly.",
-                            },
-                            {
-                                "role": "user",
-                                "content": f"User Query: {query_chunk} \n"
-                                f"Chat History: {history_chunk} \n"
-                                "Which agent should handle this query? Return only the agent name without any explanation.",
-                            },
-                        ],
-                        max_tokens=10,
-                    )
-                    decision = response.choices[0].message.content.strip().lower()
-                    if decision:  # Ensure response is valid
-                        responses.append(decision)
+        try:
+            decision = await self.select_agent(query_chunks, history_chunks)
+        except RoutingError as e:
+            return str(e)
 
-                except Exception as e:
-                    print(f"Error in API request: {e}")  # Log error
-                    continue  # Skip to next chunk if an error occurs
-
-        if not responses:  # Prevent empty `max()` call
-            return "Error: No valid response received from Groq API."
-
-        # Use the most frequent decision
-        decision = max(set(responses), key=responses.count)
-
-        # 🔗 Map decision to corresponding agent
-        agent_mapping = {
-            "medical": MedicalAgent,
-            "project": ProjectAgent,
-            "social_media": SocialMediaAgent,
-            "calendar": CalendarAgent,
-            "general": GeneralAgent,
-            "web_agent": WebAgent,
-            "pdf_agent": PdfAgent,
-            "gmail": GmailAgent,
-            "outlook": OutlookAgent,
-            "ms_excel_agent_in_agent": MSExcelAgent,
-            "ms_word_agent_in_agent": MSWordAgent,
-        }
-
-        agent_class = agent_mapping.get(decision)
-
-        if not agent_class:
-            return "Error: Agent not found."
-
-        # 📌 Instantiate the chosen agent
-        agent = agent_class()
-
-        # 🚀 Chunk user query & history for agent processing
+        # 📌 Reuse the chosen agent (constructed on first use)
+        agent = await agent_registry.get(decision)
+
+        # 🚀 One agent call per query chunk, each with the packed history
         agent_responses = []
         for query_chunk in query_chunks:
-            for history_chunk in history_chunks or [""]:
-                agent_response = await agent.handle_query(query_chunk, history_chunk, self.userContent)
-                agent_responses.append(agent_response)
+            with span("agent.handle_query", agent=decision):
+                agent_response = await agent.handle_query(query_chunk, packed.history, self.userContent)
+            agent_responses.append(agent_response)
 
         final_response = " ".join(
             json.dumps(resp) if isinstance(resp, dict) else str(resp)
@@ -157,6 +272,45 @@ class Orchestrator:
         )
 
         # 📝 Update Memory with user query and agent response
-        memory.save_context({"input": self.userChatQuery}, {"output": final_response})
+        with span("memory.save"):
+            await asyncio.to_thread(
+                memory_store.save_turn, self.sessionId, self.userChatQuery, final_response
+            )
 
         return final_response  # Returns the full response, not just the agent name
+
+    async def stream_route_query(self):
+        """Streams (event, payload) pairs: the routing decision first, then agent tokens."""
+        if not self.userChatQuery or not self.userChatQuery.strip():
+            yield "error", {"message": "Error: Empty query provided."}
+            return
+
+        packed = await self.pack_context()
+        query_chunks = packed.query_chunks
+        history_chunks = [packed.history] if packed.history else []
+
+        try:
+            decision = await self.select_agent(query_chunks, history_chunks)
+        except RoutingError as e:
+            yield "error", {"message": str(e)}
+            return
+
+        yield "routing", {"agent": decision}
+
+        agent = await agent_registry.get(decision)
+        parts = []
+        for query_chunk in query_chunks:
+            if parts:
+                parts.append(" ")  # Same separator as route_query
+                yield "token", {"text": " "}
+            async for delta in agent.stream_query(query_chunk, packed.history, self.userContent):
+                parts.append(delta)
+                yield "token", {"text": delta}
+
+        final_response = "".join(parts)
+        with span("memory.save"):
+            await asyncio.to_thread(
+                memory_store.save_turn, self.sessionId, self.userChatQuery, final_response
+            )
+
+        yield "done", {}
@@ -1,6 +1,120 @@
+from typing import Optional
+
+
 class Settings:
     db_type: str = "MongoDB"  # MongoDB or SQLite
     calendar_service: str = "Google"  # Google or Microsoft
+    # Browser origins allowed to call the API (the browser plugin and Office add-ins need it);
+    # admin write endpoints additionally require ADMIN_API_TOKEN
+    cors_allow_origins: list = ["*"]
+
+    # Orchestrator routing
+    routing_max_concurrency: int = 4  # Parallel routing calls per request
+    routing_call_timeout: float = 10.0  # Seconds before a routing call is dropped
+    intent_router_enabled: bool = True  # Try the local embedding router before the LLM
+    intent_router_threshold: float = 0.45  # Minimum cosine similarity to the best centroid
+    intent_router_min_margin: float = 0.05  # Required lead over the runner-up agent
+
+    # Conversation memory
+    memory_backend: str = "memory"  # memory or SQLite
+    memory_sqlite_path: str = "chat_memory.db"
+    memory_token_budget: int = 8000  # Turns kept per session for the context packer to choose from
+    memory_max_sessions: int = 1000  # Least recently used sessions are evicted past this
+    memory_idle_ttl: float = 3600.0  # Seconds before an idle session is evicted
+
+    # Startup: subsystems warmed after the server starts accepting requests (see /ready).
+    # Anything not listed, or not yet warm, initializes lazily on first use.
+    startup_warmup: list = ["embedding_model", "vector_store", "intent_router", "agents"]
+    startup_warmup_background: bool = True  # False blocks startup until warm-up finishes
+
+    # Agents
+    agent_warmup: list = []  # Agents built at startup, e.g. ["general", "project"]
+
+    # Tracing
+    tracing_exporters: list = ["ring"]  # Any of "log", "ring", "otel"
+    tracing_ring_size: int = 2000  # Spans kept in memory for /admin/traces
+
+    # Context packing (query + history tokens sent per request)
+    context_default_budget: int = 2500
+    context_model_budgets: dict = {"llama-3.3-70b-versatile": 2500}
+    context_recent_turns: int = 2  # Always kept when they fit
+    context_summary_tokens: int = 150  # Budget for the summary of dropped turns
+
+    # Shared LLM gateway (Groq)
+    llm_max_concurrency: int = 16  # In-flight calls across all models
+    llm_default_model_concurrency: int = 8  # In-flight calls per model
+    llm_model_concurrency: dict = {"llama-3.3-70b-versatile": 8}
+    llm_requests_per_minute: int = 30
+    llm_tokens_per_minute: int = 6000
+    llm_max_retries: int = 4  # Retries for 429/5xx/connection errors
+    llm_backoff_base: float = 0.5  # Seconds, doubled per attempt with full jitter
+    llm_backoff_max: float = 8.0
+    llm_timeout: float = 30.0  # Seconds per HTTP request
+
+    # LLM response cache
+    llm_cache_max_entries: int = 2048  # In-memory LRU tier
+    llm_cache_sqlite_path: Optional[str] = None  # e.g. "llm_cache.db" to enable the disk tier
+    llm_cache_nondeterministic: bool = False  # Also cache calls with temperature > 0
+    llm_cache_ttls: dict = {  # Seconds per call site, sites not listed are never cached
+        "routing": 600,
+        "project_intent": 3600,
+        "calendar_intent": 3600,
+        "gmail_intent": 3600,
+        "web_intent": 3600,
+    }
+
+    # Embedding model: "torch" (sentence-transformers) or "onnx_int8" (ONNX Runtime, CPU)
+    embedding_backend: str = "torch"
+    embedding_model_name: str = "all-MiniLM-L6-v2"
+    embedding_onnx_file: str = "onnx/model_quint8_avx2.onnx"  # Quantized graph in the model repo
+    embedding_chunk_max_tokens: int = 256  # Model wordpieces; longer documents are split into chunks
+
+    # Vector store: "chroma" (persistent, HNSW), "faiss" or "numpy" (exact brute force).
+    # faiss and numpy keep vectors in memory and persist them under vector_index_path.
+    vector_backend: str = "chroma"
+    chroma_path: str = "./chroma_db"
+    chroma_collection_name: str = "district_project_management"
+    # Chroma HNSW parameters, applied when the collection is created or compacted;
+    # None keeps Chroma's default (M 16, construction_ef 100, search_ef 10)
+    chroma_hnsw_m: Optional[int] = None
+    chroma_hnsw_construction_ef: Optional[int] = None
+    chroma_hnsw_search_ef: Optional[int] = None
+    vector_index_path: str = "./chroma_db/vector_index"
+    faiss_index_type: str = "hnsw"  # "flat" (exact), "hnsw" or "ivf"
+    faiss_hnsw_m: int = 32  # Graph neighbours per node
+    faiss_hnsw_ef_search: int = 64  # Candidates explored per query, higher = better recall
+    faiss_hnsw_ef_construction: int = 128  # Candidates explored per insert, fixed at build
+    faiss_ivf_nlist: int = 1024  # Coarse clusters, trained once nlist * 39 vectors exist
+    faiss_ivf_nprobe: int = 16  # Clusters scanned per query
+
+    # Retrieval: "vector" (vector store only) or "hybrid" (BM25 + vector, reciprocal rank fusion)
+    retrieval_mode: str = "hybrid"
+    retrieval_candidates: int = 30  # Hits taken from each ranking before fusion
+    retrieval_rrf_k: int = 60
+    bm25_index_path: str = "./chroma_db/bm25_index.json"
+    # Held by the process that writes the indexes above; other server workers serve them read-only
+    index_lock_path: str = "./chroma_db/index.lock"
+    retrieval_context_tokens: int = 1200  # Budget for retrieved documents in the prompt
+    retrieval_context_max_value_chars: int = 200  # Longer field values are clipped
+    retrieval_cache_max_embeddings: int = 4096  # Query vectors kept by normalized text, 0 disables
+    retrieval_cache_max_results: int = 1024  # Result lists kept per index version, 0 disables
+    retrieval_cache_result_ttl: float = 300.0  # Seconds a cached result list is served, 0 = no limit
+    # Published by the index writer once a write is on disk; read-only workers reload on change
+    retrieval_cache_version_path: str = "./chroma_db/index_version"
+
+    # Vector index sync: "poll" reads each collection from its watermark every interval,
+    # "change_stream" also follows a MongoDB change stream (replica sets only)
+    embedding_sync_mode: str = "poll"
+    embedding_sync_interval: float = 30.0  # Seconds between polling passes
+    embedding_reconcile_interval: float = 3600.0  # Seconds between content-hash reconciles
+    embedding_sync_state_path: str = "./chroma_db/sync_state.json"
+    reindex_state_path: str = "./chroma_db/reindex_state.json"  # Bulk reindex checkpoint
+    embedding_index_batch_size: int = 256  # Documents embedded per forward pass by the indexer
+    embedding_index_max_wait: float = 1.0  # Seconds the indexer waits to fill a batch
+
+    # Query embedding micro-batching
+    embedding_batch_max_size: int = 32  # Query texts encoded per forward pass
+    embedding_batch_max_wait_ms: float = 5.0  # How long the first query waits for company
 
     def get_db_type(self):
         return self.db_type
@@ -0,0 +1,54 @@
+import asyncio
+import inspect
+import time
+from typing import Callable, Dict
+
+
+class Readiness:
+    """Tracks warm-up of heavy subsystems so /ready can report when the app is fully warm.
+
+    Each subsystem is "pending" until its warm-up starts, then "warming", then "ready" or
+    "failed". Subsystems that are never warmed up still initialize lazily on first use.
+    """
+
+    def __init__(self):
+        self.subsystems: Dict[str, dict] = {}
+        self.started_at = time.time()
+
+    def register(self, name: str):
+        self.subsystems.setdefault(name, {"status": "pending"})
+
+    async def warm(self, name: str, warmup: Callable):
+        """Runs one warm-up; blocking callables go to a worker thread."""
+        self.register(name)
+        self.subsystems[name] = {"status": "warming"}
+        started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(warmup):
+                await warmup()
+            else:
+                await asyncio.to_thread(warmup)
+        except Exception as e:
+            print(f"Error warming up {name}: {e}")
+            self.subsystems[name] = {"status": "failed", "error": f"{e.__class__.__name__}: {e}"}
+            return
+        self.subsystems[name] = {
+            "status": "ready",
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "ready_after_s": round(time.time() - self.started_at, 3),
+        }
+
+    async def warm_all(self, warmups: Dict[str, Callable]):
+        for name in warmups:
+            self.register(name)
+        for name, warmup in warmups.items():
+            await self.warm(name, warmup)
+
+    def is_ready(self) -> bool:
+        return all(entry["status"] == "ready" for entry in self.subsystems.values())
+
+    def status(self) -> dict:
+        return {"ready": self.is_ready(), "subsystems": dict(self.subsystems)}
+
+
+readiness = Readiness()
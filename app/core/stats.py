@@ -0,0 +1,7 @@
+def percentile(values, pct):
+    """Nearest-rank percentile (pct in 0-100) of a sequence of numbers; 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
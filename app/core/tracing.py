@@ -0,0 +1,219 @@
+import contextvars
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: float  # Epoch seconds
+    duration_ms: float = 0.0
+    attributes: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """All spans recorded while handling one request."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()  # Spans also finish in worker threads
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def server_timing(self) -> str:
+        """Renders spans as a Server-Timing header value, summing repeated span names."""
+        totals: "OrderedDict[str, list]" = OrderedDict()
+        with self._lock:
+            for span in self.spans:
+                total = totals.setdefault(span.name, [0.0, 0])
+                total[0] += span.duration_ms
+                total[1] += 1
+
+        entries = []
+        for name, (duration_ms, count) in totals.items():
+            entry = f"{name};dur={duration_ms:.1f}"
+            if count > 1:
+                entry += f';desc="{count} calls"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+class LogExporter:
+    def export(self, span: Span):
+        status = f" error={span.error}" if span.error else ""
+        print(f"[trace {span.trace_id[:8]}] {span.name} {span.duration_ms:.1f}ms {span.attributes}{status}")
+
+
+class RingBufferExporter:
+    """Keeps the most recent spans in memory for the admin API."""
+
+    def __init__(self, size: int):
+        self.spans = deque(maxlen=size)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def recent(self, limit: int = 100, min_duration_ms: float = 0.0) -> List[dict]:
+        spans = [span for span in list(self.spans) if span.duration_ms >= min_duration_ms]
+        return [span.to_dict() for span in spans[-limit:]]
+
+
+class OpenTelemetryExporter:
+    """Mirrors spans into the OpenTelemetry API (requires opentelemetry-api).
+
+    OTel spans are started when our span starts, as children of the OTel span of our parent
+    (or of the ambient OTel context for root spans), so the exported tree keeps its shape;
+    they are ended, with the final attributes and error, when our span finishes.
+    """
+
+    def __init__(self, service_name: str = "algoorange-api"):
+        from opentelemetry import trace  # Optional dependency, only needed for this exporter
+
+        self.trace = trace
+        self.tracer = trace.get_tracer(service_name)
+        self._live: Dict[str, object] = {}  # Our span_id -> open OTel span
+        self._lock = threading.Lock()
+
+    def start(self, span: Span):
+        with self._lock:
+            parent = self._live.get(span.parent_id) if span.parent_id else None
+        otel_span = self.tracer.start_span(
+            span.name,
+            context=self.trace.set_span_in_context(parent) if parent is not None else None,
+            start_time=int(span.start_time * 1e9),
+            attributes={"trace_id": span.trace_id, "span_id": span.span_id},  # As in /admin/traces
+        )
+        with self._lock:
+            self._live[span.span_id] = otel_span
+
+    def export(self, span: Span):
+        with self._lock:
+            otel_span = self._live.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes({key: str(value) for key, value in span.attributes.items()})
+        if span.error:
+            otel_span.set_status(self.trace.Status(self.trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int(span.start_time * 1e9) + int(span.duration_ms * 1e6))
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_exporters: list = []
+
+
+def configure(exporter_names: List[str], ring_size: int = 1000):
+    """Selects exporters by name: "log", "ring" and/or "otel"."""
+    _exporters.clear()
+    for name in exporter_names:
+        if name == "log":
+            _exporters.append(LogExporter())
+        elif name == "ring":
+            _exporters.append(RingBufferExporter(ring_size))
+        elif name == "otel":
+            try:
+                _exporters.append(OpenTelemetryExporter())
+            except ImportError:
+                print("OpenTelemetry exporter requested but opentelemetry-api is not installed")
+        else:
+            raise ValueError(f"Unsupported trace exporter: {name}")
+
+
+def ring_buffer() -> Optional[RingBufferExporter]:
+    return next((e for e in _exporters if isinstance(e, RingBufferExporter)), None)
+
+
+@contextmanager
+def trace(name: str):
+    """Starts a new trace for one request; spans opened inside it are collected on it."""
+    current = Trace(name)
+    trace_token = _current_trace.set(current)
+    span_token = _current_span.set(None)
+    try:
+        yield current
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def resume(current: Trace):
+    """Re-enters a trace whose request handler already returned, e.g. for a streamed body."""
+    trace_token = _current_trace.set(current)
+    span_token = _current_span.set(None)
+    try:
+        yield current
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Times a block of work as a child of the current span (works in sync and async code)."""
+    current_trace = _current_trace.get()
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=current_trace.trace_id if current_trace else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        start_time=time.time(),
+        attributes=attributes,
+    )
+    for exporter in _exporters:
+        if hasattr(exporter, "start"):  # Exporters that need the span while it is open
+            try:
+                exporter.start(current)
+            except Exception as e:
+                print(f"Error starting span {current.name}: {e}")
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{e.__class__.__name__}: {e}"
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - started) * 1000
+        _current_span.reset(token)
+        if current_trace:
+            current_trace.add(current)
+        for exporter in _exporters:
+            try:
+                exporter.export(current)
+            except Exception as e:
+                print(f"Error exporting span {current.name}: {e}")
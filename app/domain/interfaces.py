@@ -1,8 +1,22 @@
+import json
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 
 class Agent(ABC):
     @abstractmethod
     async def handle_query(self, query: str,userContent: Optional[str] = None) -> str:
         pass
+
+    async def startup(self):
+        """Called once when the agent is first constructed; open clients or fetch tokens here."""
+
+    async def shutdown(self):
+        """Called on application shutdown to release anything opened in startup."""
+
+    async def stream_query(
+        self, userChatQuery: str, chatHistory: str, userContent: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Streams the response; agents without token streaming yield the full answer once."""
+        response = await self.handle_query(userChatQuery, chatHistory, userContent)
+        yield json.dumps(response) if isinstance(response, dict) else str(response)
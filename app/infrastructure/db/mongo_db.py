@@ -1,3 +1,4 @@
+from bson import ObjectId
 from pymongo import MongoClient
 from motor.motor_asyncio import AsyncIOMotorClient
 
@@ -36,3 +37,46 @@ class MongoDB:
                 all_documents.append(doc)
 
         return all_documents
+
+    def list_collection_names(self):
+        return self.db.list_collection_names()
+
+    def get_documents_since(
+        self, collection_name: str, last_id=None, last_updated_at=None, batch_size=500
+    ):
+        """Yields documents inserted after `last_id` or updated after `last_updated_at`.
+
+        Documents come in `_id` order with `_id` as a string and `collection_name` set,
+        like `get_all_data`, but only the delta is read from the server.
+        """
+        conditions = []
+        if last_id:
+            conditions.append(
+                {"_id": {"$gt": ObjectId(last_id) if ObjectId.is_valid(last_id) else last_id}}
+            )
+        if last_updated_at:
+            conditions.append({"updated_at": {"$gt": last_updated_at}})
+        query = {"$or": conditions} if conditions else {}
+
+        cursor = self.db[collection_name].find(query).sort("_id", 1).batch_size(batch_size)
+        for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            doc["collection_name"] = collection_name
+            yield doc
+
+    def watch_changes(self):
+        """Opens a database-wide change stream (requires a replica set)."""
+        return self.db.watch(full_document="updateLookup")
+
+    def get_documents_by_ids(self, collection_name: str, ids):
+        """Fetches the given documents, normalised the same way as `get_all_data`."""
+        object_ids = [ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id for doc_id in ids]
+        documents = []
+        for doc in self.db[collection_name].find({"_id": {"$in": object_ids}}):
+            doc["_id"] = str(doc["_id"])
+            doc["collection_name"] = collection_name
+            documents.append(doc)
+        return documents
+
+    def estimated_count(self, collection_name: str) -> int:
+        return self.db[collection_name].estimated_document_count()
@@ -0,0 +1,56 @@
+import sqlite3
+import threading
+
+
+class SQLiteMemoryBackend:
+    """Persists conversation turns per session in a local SQLite file."""
+
+    def __init__(self, path: str = "chat_memory.db"):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS chat_turns ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "session_id TEXT NOT NULL, "
+                "user_message TEXT NOT NULL, "
+                "assistant_message TEXT NOT NULL, "
+                "tokens INTEGER NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chat_turns_session "
+                "ON chat_turns (session_id, id)"
+            )
+
+    def append_turn(self, session_id, user_message, assistant_message, tokens, created_at):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO chat_turns "
+                "(session_id, user_message, assistant_message, tokens, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, user_message, assistant_message, tokens, created_at),
+            )
+
+    def load_turns(self, session_id: str, token_budget: int):
+        """Returns the most recent turns that fit in token_budget, oldest first."""
+        with self._lock:
+            cursor = self.connection.execute(
+                "SELECT user_message, assistant_message, tokens, created_at "
+                "FROM chat_turns WHERE session_id = ? ORDER BY id DESC",
+                (session_id,),
+            )
+            turns, used = [], 0
+            for row in cursor:
+                if turns and used + row[2] > token_budget:
+                    break
+                turns.append(row)
+                used += row[2]
+            cursor.close()
+        return list(reversed(turns))
+
+    def delete_session(self, session_id: str):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM chat_turns WHERE session_id = ?", (session_id,)
+            )
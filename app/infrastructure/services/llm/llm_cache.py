@@ -0,0 +1,102 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class LLMResponseCache:
+    """Exact-match cache of LLM responses keyed on (model, messages, sampling params).
+
+    Entries live in an in-memory LRU tier and, when `sqlite_path` is set, in a SQLite
+    tier that survives restarts. Every entry carries its own expiry time.
+    """
+
+    def __init__(self, max_entries: int, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+
+        self.connection = None
+        if sqlite_path:
+            self.connection = sqlite3.connect(sqlite_path, check_same_thread=False)
+            with self.connection:
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_llm_cache_expiry ON llm_cache (expires_at)"
+                )
+
+    @staticmethod
+    def make_key(model: str, messages: List[dict], params: dict) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "params": params},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                self.counters["memory_hits"] += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]  # Expired
+
+            if self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[1] > now:
+                    self._store_in_memory(key, row[0], row[1])
+                    self.counters["hits"] += 1
+                    self.counters["disk_hits"] += 1
+                    return row[0]
+
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str, ttl: float):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store_in_memory(key, value, expires_at)
+            if self.connection is not None:
+                with self.connection:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, value, expires_at),
+                    )
+                    self.connection.execute(
+                        "DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)
+                    )
+
+    def record_bypass(self):
+        with self._lock:
+            self.counters["bypassed"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+                "memory_entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_enabled": self.connection is not None,
+            }
+
+    def _store_in_memory(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import groq
+import httpx
+from dotenv import load_dotenv
+
+from app.core.config import Settings
+from app.core.tracing import span
+from app.infrastructure.services.llm.llm_cache import LLMResponseCache
+
+load_dotenv()
+
+settings = Settings()
+
+RETRYABLE_ERRORS = (
+    groq.RateLimitError,
+    groq.InternalServerError,
+    groq.APIConnectionError,  # Includes APITimeoutError
+)
+
+
+class TokenBucket:
+    """Async token bucket that refills continuously at `capacity` per minute."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1):
+        """Waits until `amount` tokens are available and takes them (FIFO across waiters)."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Charges (positive) or refunds (negative) tokens after the real cost is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class LLMGateway:
+    """Single async entry point for Groq chat completions.
+
+    Shares one pooled HTTP client, caps concurrency globally and per model, paces calls
+    against requests-per-minute and tokens-per-minute buckets, and retries 429/5xx and
+    connection errors with jittered exponential backoff (honouring `retry-after`).
+
+    `chat` calls that name a `cache_site` listed in `llm_cache_ttls` are answered from
+    the response cache when an identical deterministic call was made recently.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._client: Optional[groq.AsyncClient] = None
+        self._global_limit = asyncio.Semaphore(settings.llm_max_concurrency)
+        self._model_limits: Dict[str, asyncio.Semaphore] = {}
+        self.request_bucket = TokenBucket(settings.llm_requests_per_minute)
+        self.token_bucket = TokenBucket(settings.llm_tokens_per_minute)
+        self.cache = LLMResponseCache(
+            max_entries=settings.llm_cache_max_entries,
+            sqlite_path=settings.llm_cache_sqlite_path,
+        )
+
+    @property
+    def client(self) -> groq.AsyncClient:
+        if self._client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.settings.llm_max_concurrency,
+                    max_keepalive_connections=self.settings.llm_max_concurrency,
+                ),
+                timeout=self.settings.llm_timeout,
+            )
+            self._client = groq.AsyncClient(
+                api_key=os.getenv("GROQ_API_KEY"),
+                http_client=http_client,
+                max_retries=0,  # Retries are scheduled here, against the rate limits
+            )
+        return self._client
+
+    def _model_limit(self, model: str) -> asyncio.Semaphore:
+        if model not in self._model_limits:
+            limit = self.settings.llm_model_concurrency.get(
+                model, self.settings.llm_default_model_concurrency
+            )
+            self._model_limits[model] = asyncio.Semaphore(limit)
+        return self._model_limits[model]
+
+    @staticmethod
+    def estimate_tokens(messages: List[dict], max_tokens: Optional[int]) -> int:
+        """Cheap prompt + completion estimate (~4 characters per token)."""
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+        return prompt_chars // 4 + (max_tokens or 512)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        ceiling = min(self.settings.llm_backoff_max, self.settings.llm_backoff_base * 2**attempt)
+        return random.uniform(0, ceiling)  # Full jitter
+
+    async def complete(self, model: str, messages: List[dict], **params):
+        """Runs a chat completion and returns the raw Groq response."""
+        estimated_tokens = self.estimate_tokens(messages, params.get("max_tokens"))
+
+        for attempt in range(self.settings.llm_max_retries + 1):
+            with span("llm.rate_limit_wait", model=model):
+                await self.request_bucket.acquire()
+                await self.token_bucket.acquire(estimated_tokens)
+            try:
+                async with self._global_limit, self._model_limit(model):
+                    with span("llm.request", model=model, attempt=attempt):
+                        response = await self.client.chat.completions.create(
+                            model=model, messages=messages, **params
+                        )
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.settings.llm_max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                print(f"LLM call to {model} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            usage = getattr(response, "usage", None)
+            if usage and usage.total_tokens:
+                self.token_bucket.adjust(usage.total_tokens - estimated_tokens)
+            return response
+
+    def is_deterministic(self, params: dict) -> bool:
+        # Groq samples with temperature 1 when none is given
+        return params.get("temperature", 1) == 0 or self.settings.llm_cache_nondeterministic
+
+    async def chat(
+        self, model: str, messages: List[dict], cache_site: Optional[str] = None, **params
+    ) -> str:
+        """Runs a chat completion and returns the message content.
+
+        `cache_site` names the call site whose TTL in `llm_cache_ttls` applies; calls
+        without one, or with temperature > 0, always go to the API.
+        """
+        with span("llm.chat", model=model, cache_site=cache_site) as current:
+            ttl = self.settings.llm_cache_ttls.get(cache_site) if cache_site else None
+            if ttl and not self.is_deterministic(params):
+                self.cache.record_bypass()
+                ttl = None
+
+            if ttl:
+                key = self.cache.make_key(model, messages, params)
+                cached = self.cache.get(key)
+                current.attributes["cache"] = "hit" if cached is not None else "miss"
+                if cached is not None:
+                    return cached
+
+            response = await self.complete(model, messages, **params)
+            content = response.choices[0].message.content
+
+            if ttl and content:
+                self.cache.set(key, content, ttl)
+            return content
+
+    async def stream_chat(self, model: str, messages: List[dict], **params) -> AsyncIterator[str]:
+        """Streams the completion as content deltas, as Groq produces them.
+
+        Failures are retried only until the stream has been opened; once tokens have been
+        handed to the caller an error is raised instead of replaying the answer.
+        """
+        estimated_tokens = self.estimate_tokens(messages, params.get("max_tokens"))
+
+        for attempt in range(self.settings.llm_max_retries + 1):
+            # Rate-limit waits and backoff happen outside the semaphores, as in complete()
+            with span("llm.rate_limit_wait", model=model):
+                await self.request_bucket.acquire()
+                await self.token_bucket.acquire(estimated_tokens)
+            try:
+                # The semaphores bound opening the stream only, not a slow client reading it.
+                # Only the opening is timed; spans must not stay open across yields
+                async with self._global_limit, self._model_limit(model):
+                    with span("llm.stream_open", model=model, attempt=attempt):
+                        stream = await self.client.chat.completions.create(
+                            model=model, messages=messages, stream=True, **params
+                        )
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.settings.llm_max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                print(f"LLM stream to {model} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if usage and usage.total_tokens:
+                self.token_bucket.adjust(usage.total_tokens - estimated_tokens)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+llm_gateway = LLMGateway(settings)
@@ -0,0 +1,210 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.tracing import span
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+FILTER_KEYS = ("collection_name", "department_id", "status", "portfolio_id")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """In-memory Okapi BM25 over the same flattened document text that is embedded.
+
+    Kept in step with Chroma by the embedding service (every upsert/delete updates it) and
+    persisted as JSON next to the Chroma files. The metadata fields used for retrieval
+    filters are stored per document so lexical search honours the same filters.
+
+    Single writer: the file is rewritten whole from this process's copy, so only the process
+    holding the index lock (see index_lock.py) may update it; read-only workers reload() it
+    when the writer publishes a new index version. Updates lost to a crash between saves are
+    repaired by the reconcile, which compares these ids with the vector store's.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75, save_interval: float = 10.0):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.save_interval = save_interval
+        self.documents: Dict[str, dict] = {}  # id -> {"tf": {term: count}, "length": n, "filters": {...}}
+        self.postings: Dict[str, Dict[str, int]] = {}  # term -> {id: count}
+        self.total_length = 0
+        self.loaded = False
+        self._dirty = False
+        self._last_save = 0.0
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # One writer of the file at a time
+
+    def upsert_many(self, ids: List[str], texts: List[str], metadata: List[dict]):
+        with self._lock:
+            self._ensure_loaded()
+            self._upsert(ids, texts, metadata)
+        self.maybe_save()  # Outside the lock: save() takes _save_lock before _lock
+
+    def delete_many(self, ids: List[str]):
+        with self._lock:
+            self._ensure_loaded()
+            for doc_id in ids:
+                self._remove(doc_id)
+            self._dirty = True
+        self.maybe_save()
+
+    def ids(self) -> Set[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return set(self.documents)
+
+    def search(self, query: str, n_results: int = 10, filters: Optional[dict] = None) -> List[Tuple[str, float]]:
+        """Returns (id, score) pairs, best first, for documents matching every filter."""
+        with self._lock:
+            self._ensure_loaded()
+            if not self.documents:
+                return []
+
+            doc_count = len(self.documents)
+            avg_length = self.total_length / doc_count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, count in postings.items():
+                    length = self.documents[doc_id]["length"]
+                    norm = count + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * count * (self.k1 + 1) / norm
+
+            if filters:
+                scores = {
+                    doc_id: score
+                    for doc_id, score in scores.items()
+                    if self._matches(self.documents[doc_id]["filters"], filters)
+                }
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def rebuild(self, ids: List[str], texts: List[str], metadata: List[dict], save: bool = True):
+        with self._lock:
+            self.documents, self.postings, self.total_length = {}, {}, 0
+            self.loaded = True
+            self._upsert(ids, texts, metadata)
+        if save:
+            self.save()
+
+    def reload(self):
+        """Drops the in-memory copy so the next access reads the file again."""
+        with self._lock:
+            self.documents, self.postings, self.total_length = {}, {}, 0
+            self.loaded = False
+            self._dirty = False
+
+    def maybe_save(self):
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        """Writes the index if it changed since the last save, without blocking searches."""
+        with self._save_lock:
+            with self._lock:
+                if not self.loaded or not self._dirty:
+                    return
+                # Entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+                documents = dict(self.documents)
+                self._dirty = False
+                self._last_save = time.monotonic()
+            try:
+                with span("bm25.save", documents=len(documents)):
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    tmp_path = f"{self.path}.tmp"
+                    with open(tmp_path, "w") as f:
+                        json.dump({"documents": documents}, f)
+                    os.replace(tmp_path, self.path)
+            except OSError:
+                with self._lock:
+                    self._dirty = True  # Try again on the next write or at shutdown
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "documents": len(self.documents),
+                "terms": len(self.postings),
+                "dirty": self._dirty,
+            }
+
+    def _ensure_loaded(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        if not os.path.exists(self.path):
+            return
+        with span("bm25.load"):
+            try:
+                with open(self.path) as f:
+                    documents = json.load(f)["documents"]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable BM25 index {self.path}: {e}")
+                return
+            for doc_id, entry in documents.items():
+                self.documents[doc_id] = entry
+                self.total_length += entry["length"]
+                for term, count in entry["tf"].items():
+                    self.postings.setdefault(term, {})[doc_id] = count
+
+    def _upsert(self, ids: List[str], texts: List[str], metadata: List[dict]):
+        for doc_id, text, meta in zip(ids, texts, metadata):
+            self._remove(doc_id)
+            term_counts = Counter(tokenize(text))
+            self.documents[doc_id] = {
+                "tf": dict(term_counts),
+                "length": sum(term_counts.values()),
+                "filters": {key: meta[key] for key in FILTER_KEYS if key in meta},
+            }
+            self.total_length += self.documents[doc_id]["length"]
+            for term, count in term_counts.items():
+                self.postings.setdefault(term, {})[doc_id] = count
+        self._dirty = True
+
+    def _remove(self, doc_id: str):
+        entry = self.documents.pop(doc_id, None)
+        if entry is None:
+            return
+        self.total_length -= entry["length"]
+        for term in entry["tf"]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    @staticmethod
+    def _matches(doc_filters: dict, filters: dict) -> bool:
+        for key, expected in filters.items():
+            if expected is None or expected == []:
+                continue
+            value = doc_filters.get(key)
+            if isinstance(expected, (list, tuple, set)):
+                if value not in expected:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuses ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
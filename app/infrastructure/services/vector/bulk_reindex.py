@@ -0,0 +1,255 @@
+"""Bulk rebuild of the vector store and BM25 indexes from MongoDB.
+
+Usage:
+    python -m app.infrastructure.services.vector.bulk_reindex [--workers N] [--batch-size 256]
+        [--collections projects risks ...] [--fresh]
+
+Documents are streamed from Mongo in `_id` order, encoded in large batches across a process
+pool (one model copy per worker) and upserted in the same large batches. Progress is saved
+every 30 seconds together with the vector store, so an interrupted run resumes close to
+where it stopped; --fresh ignores the saved progress. Entries of a collection that was indexed
+start to finish and are no longer produced by Mongo are removed at the end of that collection;
+a --fresh run over every collection also removes entries of collections that no longer exist.
+
+The CLI refuses to run while the server holds the index lock (see index_lock.py): the server
+would later overwrite the rebuilt files with its own state. Use POST /admin/embeddings/reindex
+to reindex a running server.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from app.core.config import Settings
+from app.core.tracing import span
+from .embedding_backends import create_embedding_backend
+from .document_chunker import parent_id_of
+from .embedding_service import (
+    db,
+    delete_ids,
+    get_vector_store,
+    persist_vector_store,
+    prepare_chunks,
+    store_vectors,
+)
+from .index_lock import IndexLockedError, index_lock
+
+_worker_model = None
+
+
+def _init_worker(backend: str, model_name: str, onnx_file: str, threads: int):
+    """Loads the model once per worker process, limited to its share of the cores."""
+    global _worker_model
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = create_embedding_backend(backend, model_name, onnx_file)
+
+
+def _encode(texts: List[str], batch_size: int):
+    return _worker_model.encode(texts, batch_size=batch_size)
+
+
+class BulkReindexer:
+    def __init__(self, settings: Settings, state_path: str):
+        self.settings = settings
+        self.state_path = state_path
+        self.progress = {"status": "idle"}
+        self._thread: Optional[threading.Thread] = None
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, **options) -> bool:
+        """Runs a reindex on a background thread; returns False if one is already running."""
+        if self.is_running():
+            return False
+        self._thread = threading.Thread(
+            target=self.run, kwargs=options, name="bulk-reindex", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def run(self, **options):
+        try:
+            return self._run(**options)
+        except Exception as e:
+            self.progress["status"] = "failed"
+            self.progress["error"] = f"{e.__class__.__name__}: {e}"
+            print(f"Reindex failed, rerun to resume: {e}")
+            raise
+
+    def _run(
+        self,
+        workers: Optional[int] = None,
+        batch_size: int = 256,
+        collections: Optional[List[str]] = None,
+        fresh: bool = False,
+        log_interval: float = 5.0,
+        checkpoint_interval: float = 30.0,
+    ):
+        workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        state = {} if fresh else self._load_state()
+        every_collection = not collections
+        collections = collections or db.list_collection_names()
+        done = set(state.get("done", []))
+        pending = [name for name in collections if name not in done]
+
+        total = sum(db.estimated_count(name) for name in pending)
+        self.progress = {
+            "status": "running",
+            "workers": workers,
+            "batch_size": batch_size,
+            "collections": pending,
+            "processed": 0,
+            "estimated_total": total,
+            "docs_per_second": 0.0,
+            "resumed_from": state.get("current"),
+        }
+        started = last_log = last_checkpoint = time.monotonic()
+        threads = max(1, (os.cpu_count() or workers) // workers)
+
+        context = multiprocessing.get_context("spawn")  # Fresh interpreters, no forked torch state
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                self.settings.embedding_backend,
+                self.settings.embedding_model_name,
+                self.settings.embedding_onnx_file,
+                threads,
+            ),
+        ) as pool, span("bulk_reindex.run", workers=workers):
+            for collection_name in pending:
+                current = state.get("current") or {}
+                last_id = current.get("last_id") if current.get("collection") == collection_name else None
+                in_flight = deque()
+                written = set()  # Only complete when the collection is indexed from its start
+
+                def drain(limit):
+                    nonlocal last_log, last_checkpoint
+                    # Upsert in submission order so the checkpoint only ever moves forward
+                    while len(in_flight) > limit:
+                        ids, texts, metadata, future = in_flight.popleft()
+                        store_vectors(ids, texts, metadata, future.result())
+                        written.update(ids)
+                        state["current"] = {"collection": collection_name, "last_id": parent_id_of(ids[-1])}
+                        # In-memory stores are flushed with each checkpoint, so not every batch
+                        if time.monotonic() - last_checkpoint >= checkpoint_interval:
+                            last_checkpoint = time.monotonic()
+                            persist_vector_store()
+                            self._save_state(state)
+
+                        self.progress["processed"] += len({parent_id_of(doc_id) for doc_id in ids})
+                        elapsed = time.monotonic() - started
+                        self.progress["docs_per_second"] = round(self.progress["processed"] / elapsed, 1)
+                        if time.monotonic() - last_log >= log_interval:
+                            last_log = time.monotonic()
+                            self._log()
+
+                batch = []
+                for doc in db.get_documents_since(collection_name, last_id=last_id, batch_size=batch_size * 4):
+                    # Whole documents per batch, so the checkpoint never falls between chunks
+                    batch.extend(prepare_chunks(doc))
+                    if len(batch) >= batch_size:
+                        self._submit(pool, in_flight, batch, batch_size)
+                        batch = []
+                        drain(workers * 2)  # Keep every worker busy with one batch queued behind it
+                if batch:
+                    self._submit(pool, in_flight, batch, batch_size)
+                drain(0)
+                if last_id is None:
+                    self._remove_stale({"collection_name": collection_name}, written)
+
+                persist_vector_store()
+                done.add(collection_name)
+                state = {"done": sorted(done), "current": None}
+                self._save_state(state)
+
+        if fresh and every_collection:
+            self._remove_stale({"collection_name": {"$nin": collections}}, set())
+            persist_vector_store()
+
+        self.progress["status"] = "finished"
+        self.progress["elapsed_seconds"] = round(time.monotonic() - started, 1)
+        self._log()
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)  # Next run starts from scratch
+        return self.progress
+
+    def _remove_stale(self, where: dict, written: set):
+        """Deletes entries matching `where` that this run did not write."""
+        stale = [doc_id for doc_id in get_vector_store().get(where=where)["ids"] if doc_id not in written]
+        with span("bulk_reindex.remove_stale", size=len(stale)):
+            delete_ids(stale)
+        self.progress["removed"] = self.progress.get("removed", 0) + len(stale)
+
+    def _submit(self, pool, in_flight, batch, batch_size):
+        ids, texts, metadata = (list(column) for column in zip(*batch))
+        in_flight.append((ids, texts, metadata, pool.submit(_encode, texts, batch_size)))
+
+    def _log(self):
+        progress = self.progress
+        total = progress["estimated_total"] or 1
+        rate = progress["docs_per_second"] or 1
+        remaining = max(0, progress["estimated_total"] - progress["processed"]) / rate
+        print(
+            f"Reindex: {progress['processed']}/{progress['estimated_total']} "
+            f"({progress['processed'] / total:.0%}) at {progress['docs_per_second']} docs/s, "
+            f"~{remaining:.0f}s left"
+        )
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state: dict):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+
+settings = Settings()
+bulk_reindexer = BulkReindexer(settings, settings.reindex_state_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--collections", nargs="*", default=None)
+    parser.add_argument("--fresh", action="store_true", help="Ignore saved progress")
+    args = parser.parse_args()
+
+    try:
+        index_lock.acquire("bulk_reindex")
+    except IndexLockedError as e:
+        raise SystemExit(str(e))
+    try:
+        bulk_reindexer.run(
+            workers=args.workers,
+            batch_size=args.batch_size,
+            collections=args.collections,
+            fresh=args.fresh,
+        )
+    finally:
+        persist_vector_store()  # Saves BM25 too
+        index_lock.release()
+
+
+if __name__ == "__main__":
+    main()
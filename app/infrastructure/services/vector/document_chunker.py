@@ -0,0 +1,164 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+CHUNK_SEPARATOR = "#"  # Chunk ids are "<parent id>#<group>[-<n>]"; Mongo ids never contain it
+
+# Repeated in every chunk (metadata, and text bar ID_FIELDS) so each one identifies its parent
+# document and honours the same retrieval filters
+HEADER_FIELDS = (
+    "_id", "collection_name", "name", "status", "department_id", "portfolio_id",
+    "program_id", "project_id",
+)
+
+# Raw ObjectIds mean nothing to the model and cost ~12 wordpieces each, so these (and any other
+# ObjectId-shaped value) are kept in metadata for filtering but left out of the embedded text
+ID_FIELDS = {"_id", "department_id", "portfolio_id", "program_id", "project_id"}
+OBJECT_ID = re.compile(r"[0-9a-f]{24}")
+
+SPECIAL_TOKENS = 2  # [CLS] and [SEP], added by the tokenizer to every input
+
+# Field groups per collection, in order. A trailing "*" matches every flattened key with that
+# prefix (e.g. nested milestones). Fields matched by no group go into a final "details" group.
+CHUNK_RULES: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {
+    "projects": (
+        ("overview", ("description", "start_date", "end_date", "priority")),
+        ("budget", ("total_budget", "funding_source", "budget_*")),
+        ("milestones", ("milestones*",)),
+        ("stakeholders", ("stakeholders*",)),
+    ),
+    "programs": (
+        ("overview", ("description", "start_date", "end_date")),
+        ("projects", ("projects*",)),
+    ),
+    "reports": (
+        ("summary", ("report_type", "generated_date")),
+        ("data", ("data_snapshot_*",)),
+    ),
+    "risks": (
+        ("assessment", ("risk_description", "risk_type", "impact", "probability")),
+        ("mitigation", ("mitigation_plan",)),
+    ),
+    "issue_tracking": (
+        ("issue", ("description",)),
+        ("resolution", ("resolution_notes", "resolution")),
+    ),
+}
+
+# Bookkeeping that is neither embedded nor worth a chunk of its own
+SKIPPED_FIELDS = {"content_hash", "created_at", "updated_at"}
+
+
+@dataclass
+class Chunk:
+    id: str
+    text: str
+    metadata: dict
+
+
+def parent_id_of(chunk_id: str) -> str:
+    return chunk_id.split(CHUNK_SEPARATOR, 1)[0]
+
+
+class DocumentChunker:
+    """Splits large flattened documents into field-group chunks that fit the embedding model.
+
+    Lengths are measured with `count_tokens`, normally the embedding model's own tokenizer
+    (MiniLM truncates at 256 wordpieces); without one, whitespace words are counted instead.
+    Documents whose text fits in `max_tokens` stay a single entry with the document's own id.
+    Larger ones become one chunk per non-empty field group (see CHUNK_RULES), with groups that
+    are still too long split at field boundaries and, for a single oversized value, at word
+    boundaries. Every chunk repeats the header fields and records `parent_id` and `chunk` in
+    its metadata.
+    """
+
+    def __init__(self, max_tokens: int = 256, count_tokens: Optional[Callable[[str], int]] = None):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or (lambda text: len(text.split()))
+
+    def chunk(self, doc_id: str, metadata: Dict[str, object]) -> List[Chunk]:
+        text = _render(metadata.items())
+        if self.count_tokens(text) + SPECIAL_TOKENS <= self.max_tokens:
+            return [Chunk(id=doc_id, text=text, metadata={**metadata, "parent_id": doc_id})]
+
+        header = {key: metadata[key] for key in HEADER_FIELDS if key in metadata}
+        header_text = _render(header.items())
+        budget = max(20, self.max_tokens - SPECIAL_TOKENS - self.count_tokens(header_text))
+
+        chunks = []
+        for group, fields in self._groups(metadata):
+            for part, piece in enumerate(self._split(fields, budget)):
+                name = group if part == 0 else f"{group}-{part}"
+                chunks.append(
+                    Chunk(
+                        id=f"{doc_id}{CHUNK_SEPARATOR}{name}",
+                        text=f"{header_text} {_render(piece)}".strip(),
+                        metadata={**header, **dict(piece), "parent_id": doc_id, "chunk": name},
+                    )
+                )
+        return chunks
+
+    def _groups(self, metadata) -> List[Tuple[str, List[Tuple[str, object]]]]:
+        body = [
+            (key, value) for key, value in metadata.items()
+            if key not in HEADER_FIELDS and key not in SKIPPED_FIELDS
+        ]
+        groups, claimed = [], set()
+        for group, patterns in CHUNK_RULES.get(metadata.get("collection_name"), ()):
+            fields = [
+                (key, value) for key, value in body
+                if key not in claimed and any(_matches(key, pattern) for pattern in patterns)
+            ]
+            claimed.update(key for key, _ in fields)
+            if fields:
+                groups.append((group, fields))
+        rest = [(key, value) for key, value in body if key not in claimed]
+        if rest:
+            groups.append(("details", rest))
+        return groups
+
+    def _split(self, fields, budget) -> List[List[Tuple[str, object]]]:
+        pieces, current, used = [], [], 0
+        for key, value in fields:
+            tokens = self.count_tokens(_render([(key, value)]))
+            if tokens > budget:
+                # One oversized value (e.g. a long description): cut it into word windows
+                if current:
+                    pieces.append(current)
+                    current, used = [], 0
+                pieces.extend([(key, window)] for window in self._windows(key, value, budget))
+                continue
+            if current and used + tokens > budget:
+                pieces.append(current)
+                current, used = [], 0
+            current.append((key, value))
+            used += tokens
+        if current:
+            pieces.append(current)
+        return pieces
+
+    def _windows(self, key, value, budget) -> List[str]:
+        # Wordpieces never cross whitespace, so a window's length is the sum over its words
+        budget = max(1, budget - self.count_tokens(f"{key}:"))
+        windows, current, used = [], [], 0
+        for word in str(value).split():
+            tokens = self.count_tokens(word)
+            if current and used + tokens > budget:
+                windows.append(" ".join(current))
+                current, used = [], 0
+            current.append(word)
+            used += tokens
+        if current:
+            windows.append(" ".join(current))
+        return windows
+
+
+def _render(items) -> str:
+    return " ".join(
+        f"{key}: {value}" for key, value in items
+        if key not in ID_FIELDS and not (isinstance(value, str) and OBJECT_ID.fullmatch(value))
+    )
+
+
+def _matches(key: str, pattern: str) -> bool:
+    return key.startswith(pattern[:-1]) if pattern.endswith("*") else key == pattern
@@ -0,0 +1,91 @@
+from abc import ABC, abstractmethod
+from typing import List, Union
+
+import numpy as np
+
+
+class EmbeddingBackend(ABC):
+    """Sentence embedding model with the `encode` contract the vector code relies on:
+    a single string returns a 1-D vector, a list of strings returns a 2-D array."""
+
+    name: str
+
+    @abstractmethod
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        pass
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        pass
+
+    @abstractmethod
+    def count_tokens(self, text: str) -> int:
+        """Length of `text` in the model's own tokens, excluding special tokens."""
+
+
+class TorchBackend(EmbeddingBackend):
+    """Full-precision PyTorch inference through sentence-transformers (the original setup)."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, batch_size=32):
+        return self.model.encode(texts, batch_size=batch_size)
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def count_tokens(self, text):
+        return len(self.model.tokenizer.tokenize(text))
+
+
+class OnnxInt8Backend(EmbeddingBackend):
+    """Dynamically int8-quantized ONNX export of the same model, run with ONNX Runtime on CPU.
+
+    Uses a quantized graph published in the model repository (`onnx/model_quint8_avx2.onnx`
+    by default, see Settings.embedding_onnx_file; the `onnx/model_qint8_*.onnx` variants target
+    ARM64 and AVX-512) through sentence-transformers' ONNX backend, so tokenization and pooling
+    are unchanged.
+    Requires `optimum[onnxruntime]`.
+    """
+
+    name = "onnx_int8"
+
+    def __init__(self, model_name: str, file_name: str = "onnx/model_quint8_avx2.onnx"):
+        try:
+            from sentence_transformers import SentenceTransformer
+
+            self.model = SentenceTransformer(
+                model_name, backend="onnx", model_kwargs={"file_name": file_name}
+            )
+        except ImportError as e:
+            raise ImportError(
+                "The onnx_int8 embedding backend needs optimum[onnxruntime] installed"
+            ) from e
+        self.model_name = model_name
+        self.file_name = file_name
+
+    def encode(self, texts, batch_size=32):
+        return self.model.encode(texts, batch_size=batch_size)
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def count_tokens(self, text):
+        return len(self.model.tokenizer.tokenize(text))
+
+
+def create_embedding_backend(backend: str, model_name: str, onnx_file_name: str) -> EmbeddingBackend:
+    if backend == "torch":
+        return TorchBackend(model_name)
+    elif backend == "onnx_int8":
+        return OnnxInt8Backend(model_name, onnx_file_name)
+    raise ValueError(f"Unsupported embedding backend: {backend}")
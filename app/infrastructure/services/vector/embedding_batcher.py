@@ -0,0 +1,117 @@
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import Settings
+from app.core.tracing import span
+from .embedding_service import embedding_model
+from .retrieval_cache import retrieval_cache
+
+
+class EmbeddingBatcher:
+    """Coalesces single-text encode calls from concurrent requests into one forward pass.
+
+    Callers block on their own future; a dedicated thread takes the first pending text,
+    waits up to `max_wait` seconds for more (up to `max_batch`), encodes them together and
+    hands each caller its own row. With a `cache`, repeated texts (after normalization) are
+    answered from it without reaching the model at all.
+    """
+
+    def __init__(self, model, max_batch: int = 32, max_wait: float = 0.005, cache=None):
+        self.model = model
+        self.cache = cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue: "queue.Queue[Tuple[str, Future, contextvars.Context]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.counters = {"texts": 0, "batches": 0, "max_batch_seen": 0}
+
+    def encode(self, text: str) -> np.ndarray:
+        """Returns the embedding for one text; blocks the calling thread until it is ready."""
+        return self.encode_many([text])[0]
+
+    def encode_many(self, texts: List[str]) -> List[np.ndarray]:
+        cached = [self.cache.get_embedding(text) if self.cache else None for text in texts]
+        futures = [self.submit(text) if vector is None else None for text, vector in zip(texts, cached)]
+        vectors = []
+        for text, vector, future in zip(texts, cached, futures):
+            if future is not None:
+                vector = future.result()
+                if self.cache:
+                    self.cache.put_embedding(text, vector)
+            vectors.append(vector)
+        return vectors
+
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        future: Future = Future()
+        # The caller's context (current trace and span) travels with the text to the worker
+        self.queue.put_nowait((text, future, contextvars.copy_context()))
+        return future
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        counters["avg_batch"] = (
+            round(counters["texts"] / counters["batches"], 2) if counters["batches"] else 0.0
+        )
+        counters["queue_depth"] = self.queue.qsize()
+        return counters
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name="embedding-batcher", daemon=True
+                    )
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            texts = [text for text, _, _ in batch]
+            try:
+                # Recorded in the trace of the request that opened the batch
+                vectors = batch[0][2].run(self._encode_batch, texts)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+            with self._lock:
+                self.counters["texts"] += len(batch)
+                self.counters["batches"] += 1
+                self.counters["max_batch_seen"] = max(self.counters["max_batch_seen"], len(batch))
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        with span("embedding.encode_batch", size=len(texts), source="batcher"):
+            return self.model.encode(texts)
+
+
+settings = Settings()
+embedding_batcher = EmbeddingBatcher(
+    embedding_model,
+    max_batch=settings.embedding_batch_max_size,
+    max_wait=settings.embedding_batch_max_wait_ms / 1000,
+    cache=retrieval_cache,
+)
@@ -0,0 +1,170 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.core.config import Settings
+from app.core.tracing import span
+from .embedding_service import db, delete_documents, index_documents
+
+
+@dataclass
+class IndexJob:
+    collection_name: str
+    doc_id: str
+    document: Optional[dict] = None  # Fetched from Mongo by the worker when not supplied
+    enqueued_at: float = field(default_factory=time.time)
+    done: Future = field(default_factory=Future)
+
+
+class EmbeddingIndexer:
+    """Embeds changed documents on a background thread, in large batches.
+
+    API writes enqueue the ids they touched and return immediately; the reconciler
+    (EmbeddingSync) submits whatever it finds changed in Mongo. The worker waits up to
+    `max_wait` seconds to fill a batch of `batch_size`, so bursts are embedded together.
+    """
+
+    def __init__(self, batch_size: int = 256, max_wait: float = 1.0):
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue: "queue.Queue[IndexJob]" = queue.Queue()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.counters = {
+            "indexed": 0,
+            "unchanged": 0,  # Skipped because their content hash matched the index
+            "deleted": 0,
+            "failed": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "last_batch_lag": 0.0,  # Seconds from enqueue to indexed, oldest job in the batch
+        }
+
+    def enqueue(self, collection_name: str, doc_id: str) -> Future:
+        """Queues one document for (re-)embedding; safe to call from the event loop.
+
+        Without a running worker (a read-only server worker, see index_lock.py) nothing is
+        queued: the index writer's sync finds the change in Mongo instead.
+        """
+        job = IndexJob(collection_name, str(doc_id))
+        if not (self._worker and self._worker.is_alive()):
+            job.done.set_result(False)
+            return job.done
+        self.queue.put_nowait(job)
+        return job.done
+
+    def submit(self, documents: List[dict]) -> List[Future]:
+        """Queues already-fetched documents (with `_id` and `collection_name` set)."""
+        futures = []
+        for doc in documents:
+            job = IndexJob(doc["collection_name"], str(doc["_id"]), document=doc)
+            self.queue.put_nowait(job)
+            futures.append(job.done)
+        return futures
+
+    def start(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="embedding-indexer", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._worker:
+            self._worker.join(timeout)
+            self._worker = None
+        # Fail whatever is still queued so nobody waits on a future that will never resolve
+        stopped = RuntimeError("Embedding indexer stopped before this document was indexed")
+        while True:
+            try:
+                job = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if not job.done.done():
+                job.done.set_exception(stopped)
+
+    def stats(self) -> dict:
+        with self.queue.mutex:
+            oldest = self.queue.queue[0].enqueued_at if self.queue.queue else None
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "running": bool(self._worker and self._worker.is_alive()),
+            "queue_depth": self.queue.qsize(),
+            "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            **counters,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                jobs = [self.queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.max_wait
+            while len(jobs) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    jobs.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._process(jobs)
+
+    def _process(self, jobs: List[IndexJob]):
+        # The latest job per document wins; earlier duplicates share its outcome
+        latest: Dict[tuple, IndexJob] = {}
+        for job in jobs:
+            latest[(job.collection_name, job.doc_id)] = job
+
+        try:
+            with span("embedding_indexer.batch", size=len(latest)):
+                documents = [job.document for job in latest.values() if job.document is not None]
+                missing: Dict[str, List[str]] = {}
+                for job in latest.values():
+                    if job.document is None:
+                        missing.setdefault(job.collection_name, []).append(job.doc_id)
+
+                deleted = []
+                for collection_name, ids in missing.items():
+                    fetched = db.get_documents_by_ids(collection_name, ids)
+                    documents.extend(fetched)
+                    found = {doc["_id"] for doc in fetched}
+                    deleted.extend(doc_id for doc_id in ids if doc_id not in found)
+
+                indexed = index_documents(documents, batch_size=self.batch_size)
+                delete_documents(deleted)
+        except Exception as e:
+            print(f"Embedding indexer batch failed: {e}")
+            with self._lock:
+                self.counters["failed"] += len(jobs)
+            for job in jobs:
+                job.done.set_exception(e)
+            return
+
+        with self._lock:
+            self.counters["indexed"] += indexed
+            self.counters["unchanged"] += len(documents) - indexed
+            self.counters["deleted"] += len(deleted)
+            self.counters["batches"] += 1
+            self.counters["last_batch_size"] = len(latest)
+            self.counters["last_batch_lag"] = round(
+                time.time() - min(job.enqueued_at for job in jobs), 3
+            )
+        for job in jobs:
+            job.done.set_result(True)
+
+
+settings = Settings()
+embedding_indexer = EmbeddingIndexer(
+    batch_size=settings.embedding_index_batch_size,
+    max_wait=settings.embedding_index_max_wait,
+)
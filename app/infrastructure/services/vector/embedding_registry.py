@@ -0,0 +1,77 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import Settings
+from app.core.tracing import span
+from .embedding_backends import EmbeddingBackend, create_embedding_backend
+
+HUB_PREFIX = "sentence-transformers/"
+
+
+class EmbeddingModelRegistry:
+    """Loads each embedding model once per process, on first use, and shares it.
+
+    The vector store, intent router, context packer and the PDF agent's FAISS index all
+    use the same MiniLM weights; handing out one instance keeps a single copy in memory.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self._models: Dict[Tuple[str, str], EmbeddingBackend] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: Optional[str] = None, backend: Optional[str] = None) -> EmbeddingBackend:
+        """Returns the loaded model, constructing it on the first call."""
+        key = self._key(model_name, backend)
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    with span("embedding.load_model", backend=key[0], model=key[1]):
+                        model = create_embedding_backend(
+                            key[0], key[1], self.settings.embedding_onnx_file
+                        )
+                    self._models[key] = model
+        return model
+
+    def model(self, model_name: Optional[str] = None, backend: Optional[str] = None) -> "LazyEmbeddingModel":
+        """Returns a handle usable at import time; the model loads on its first encode."""
+        return LazyEmbeddingModel(self, *self._key(model_name, backend))
+
+    def langchain(self, model_name: Optional[str] = None, backend: Optional[str] = None):
+        """Returns a LangChain `Embeddings` adapter backed by the shared model."""
+        from .langchain_embeddings import SharedLangChainEmbeddings  # Keeps langchain optional here
+
+        return SharedLangChainEmbeddings(self.model(model_name, backend))
+
+    def loaded(self) -> List[dict]:
+        with self._lock:
+            return [{"backend": backend, "model": name} for backend, name in self._models]
+
+    def _key(self, model_name: Optional[str], backend: Optional[str]) -> Tuple[str, str]:
+        model_name = model_name or self.settings.embedding_model_name
+        if model_name.startswith(HUB_PREFIX):
+            model_name = model_name[len(HUB_PREFIX):]  # Same weights, whichever way it is named
+        return backend or self.settings.embedding_backend, model_name
+
+
+class LazyEmbeddingModel(EmbeddingBackend):
+    def __init__(self, registry: EmbeddingModelRegistry, backend: str, model_name: str):
+        self.registry = registry
+        self.name = backend
+        self.model_name = model_name
+
+    def encode(self, texts, batch_size=32):
+        return self.registry.get(self.model_name, self.name).encode(texts, batch_size=batch_size)
+
+    @property
+    def dimension(self):
+        return self.registry.get(self.model_name, self.name).dimension
+
+    def count_tokens(self, text):
+        return self.registry.get(self.model_name, self.name).count_tokens(text)
+
+
+settings = Settings()
+embedding_registry = EmbeddingModelRegistry(settings)
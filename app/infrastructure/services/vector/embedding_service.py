@@ -1,71 +1,321 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+import time
+from app.core.config import Settings
 from app.infrastructure.db.mongo_db import MongoDB
-import json
+from app.core.tracing import span
+from .bm25_index import BM25Index
+from .document_chunker import DocumentChunker
+from .embedding_registry import embedding_registry
+from .retrieval_cache import retrieval_cache
+from .vector_backends import create_vector_store
+import hashlib
 
-# Load the embedding model
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+# Shared embedding model (PyTorch or quantized ONNX, see Settings.embedding_backend),
+# loaded by the registry on first encode
+embedding_model = embedding_registry.model()
 
 # Initialize MongoDB
 db = MongoDB()
 
-# Connect to ChromaDB
-chroma_client = chromadb.PersistentClient(path="./chroma_db")
-# Ensure ChromaDB uses cosine similarity for correct distance calculations
-chroma_collection = chroma_client.get_or_create_collection(
-    name="district_project_management",  # Removed embedding_function argument
-    metadata={"hnsw:space": "cosine"},
-)
+settings = Settings()
+
+# Large documents are embedded as several field-group chunks (see document_chunker.py),
+# measured in the embedding model's own wordpieces
+document_chunker = DocumentChunker(settings.embedding_chunk_max_tokens, embedding_model.count_tokens)
+
+_vector_store = None
+_vector_store_lock = threading.Lock()
+
+# Lexical index over the same document text, updated alongside every vector store write
+bm25_index = BM25Index(settings.bm25_index_path)
+_bm25_bootstrapped = False
+_bm25_lock = threading.Lock()
+
+# Only the worker holding the index lock writes the indexes; the others serve them read-only
+# and reopen them when the writer publishes a new index version (see index_lock.py)
+INDEX_REFRESH_INTERVAL = 1.0  # Seconds between checks for a newly published version
+_read_only = False
+_last_refresh = 0.0
+_refresh_lock = threading.Lock()
+
+
+def set_read_only(read_only):
+    global _read_only
+    _read_only = read_only
+
+
+def get_vector_store():
+    """Opens the configured vector store (see Settings.vector_backend) on first use."""
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                with span("vector_store.open", backend=settings.vector_backend):
+                    _vector_store = create_vector_store(settings)
+    return _vector_store
+
+
+def persist_vector_store():
+    """Flushes in-memory vector stores and the BM25 index to disk, then publishes the index
+    version they hold to read-only workers. Chroma writes through and only publishes."""
+    if _read_only:
+        return
+    version = retrieval_cache.index_version  # Later writes are published by the next call
+    if _vector_store is not None:
+        _vector_store.persist()
+    bm25_index.save()
+    retrieval_cache.publish_index_version(version)
+
+
+def refresh_index():
+    """In a read-only worker, reopens the indexes once the writer has published a new version.
+
+    Checks at most every INDEX_REFRESH_INTERVAL seconds; does nothing in the index writer.
+    """
+    global _vector_store, _bm25_bootstrapped, _last_refresh
+    if not _read_only or time.monotonic() - _last_refresh < INDEX_REFRESH_INTERVAL:
+        return
+    with _refresh_lock:
+        if time.monotonic() - _last_refresh < INDEX_REFRESH_INTERVAL:
+            return
+        _last_refresh = time.monotonic()
+        version = retrieval_cache.shared_index_version()
+        if version is None or version == retrieval_cache.index_version:
+            return
+        with span("vector_store.reload", backend=settings.vector_backend):
+            with _vector_store_lock:
+                store, _vector_store = _vector_store, None  # Reopened from disk on next use
+            if store is not None:
+                store.close()
+            with _bm25_lock:
+                bm25_index.reload()
+                _bm25_bootstrapped = False
+        retrieval_cache.adopt_index_version(version)
+
+
+def _check_writable():
+    if _read_only:
+        raise RuntimeError(
+            "This worker serves the vector indexes read-only; only the index writer "
+            "(see index_lock.py) may change them"
+        )
+
+
+def get_bm25_index():
+    """Returns the BM25 index, building it once from the vector store if no saved copy exists yet."""
+    global _bm25_bootstrapped
+    if not _bm25_bootstrapped:
+        with _bm25_lock:
+            if not _bm25_bootstrapped:
+                store = get_vector_store() if not os.path.exists(bm25_index.path) else None
+                if store is not None and store.count() > 0:
+                    with span("bm25.bootstrap"):
+                        existing = store.get(include_documents=True)
+                        bm25_index.rebuild(
+                            existing["ids"],
+                            _stored_texts(existing),
+                            existing["metadatas"],
+                            save=not _read_only,  # Readers keep it in memory until the writer saves
+                        )
+                _bm25_bootstrapped = True
+    return bm25_index
+
+
+def _stored_texts(entries):
+    return [
+        document or (meta or {}).get("text", "")  # Older entries kept text in metadata
+        for document, meta in zip(entries["documents"], entries["metadatas"])
+    ]
+
+
+def reconcile_bm25(store_ids):
+    """Makes the BM25 index hold exactly `store_ids`, taking missing text from the vector store.
+
+    BM25 is only written alongside vector store writes and saved every few seconds, so a crash
+    (or another process writing the store) can leave it behind; the vector store is the
+    source of truth. Returns the number of BM25 entries added or removed.
+    """
+    index = get_bm25_index()
+    lexical_ids = index.ids()
+    missing = [doc_id for doc_id in store_ids if doc_id not in lexical_ids]
+    extra = [doc_id for doc_id in lexical_ids if doc_id not in store_ids]
+    with span("bm25.reconcile", missing=len(missing), extra=len(extra)):
+        if missing:
+            existing = get_vector_store().get(ids=missing, include_documents=True)
+            index.upsert_many(existing["ids"], _stored_texts(existing), existing["metadatas"])
+        if extra:
+            index.delete_many(extra)
+    return len(missing) + len(extra)
 
 
 def update_embeddings(batch_size=10):
-    """Fetch documents and update embeddings with proper text formatting."""
-    existing_ids = (
-        set(chroma_collection.get()["ids"]) if chroma_collection.count() > 0 else set()
-    )
-    all_documents = db.get_all_data()
+    """Full reconcile: re-embeds chunks whose content hash changed and removes ids that no
+    longer exist in MongoDB (or chunks a document no longer has). Unchanged chunks are not
+    re-encoded. Finally brings the BM25 index back in line with the vector store's ids."""
+    with span("vector_store.get_hashes"):
+        indexed_hashes = get_indexed_hashes()
+    with span("mongo.get_all_data"):
+        all_documents = db.get_all_data()
 
     texts, ids, metadata = [], [], []
+    live_ids = set()
+    embedded_ids = set()
 
     for doc in all_documents:
-        doc_id = str(doc["_id"])
-        doc_metadata = flatten_dict(doc)
+        for doc_id, doc_text, doc_metadata in prepare_chunks(doc):
+            live_ids.add(doc_id)
 
-        # Convert metadata into natural language format
-        doc_text = " ".join([f"{k}: {v}" for k, v in doc_metadata.items()])
+            if indexed_hashes.get(doc_id) == doc_metadata["content_hash"]:
+                continue  # Already embedded with this exact content
 
-        if doc_id not in existing_ids:
             texts.append(doc_text)
             ids.append(doc_id)
             metadata.append(doc_metadata)
 
-        # Store data in batches
-        if len(texts) >= batch_size:
-            _store_batch(ids, texts, metadata)
-            texts, ids, metadata = [], [], []
+            # Store data in batches
+            if len(texts) >= batch_size:
+                _store_batch(ids, texts, metadata)
+                embedded_ids.update(ids)
+                texts, ids, metadata = [], [], []
 
     if texts:  # Store any remaining data
         _store_batch(ids, texts, metadata)
+        embedded_ids.update(ids)
+
+    # Tombstone entries whose Mongo document (or chunk) no longer exists
+    stale_ids = [doc_id for doc_id in indexed_hashes if doc_id not in live_ids]
+    delete_ids(stale_ids)
+    persist_vector_store()
+
+    store_ids = (set(indexed_hashes) | embedded_ids).difference(stale_ids)
+    return {
+        "embedded": len(embedded_ids),
+        "deleted": len(stale_ids),
+        "unchanged": len(live_ids) - len(embedded_ids),
+        "bm25_repaired": reconcile_bm25(store_ids),
+    }
+
+
+def prepare_chunks(doc):
+    """Returns (vector store id, text, metadata with content hash) for each chunk of a document.
+
+    Most documents are a single chunk whose id is the document's `_id`; large ones are split
+    into field groups whose metadata carries the parent's id in `parent_id`.
+    """
+    # Convert metadata into natural language format, one "k: v" run per chunk
+    chunks = document_chunker.chunk(str(doc["_id"]), flatten_dict(doc))
+    for chunk in chunks:
+        chunk.metadata["content_hash"] = content_hash(chunk.text)
+    return [(chunk.id, chunk.text, chunk.metadata) for chunk in chunks]
+
+
+def content_hash(text):
+    # Includes the backend so switching it re-embeds documents on the next reconcile
+    return hashlib.sha256(f"{embedding_model.name}\n{text}".encode("utf-8")).hexdigest()
+
+
+def get_indexed_hashes(ids=None):
+    """Maps indexed ids to the content hash they were embedded with (None for legacy entries)."""
+    if ids is not None and not ids:
+        return {}
+    result = get_vector_store().get(ids=ids)
+    return {
+        doc_id: meta.get("content_hash")
+        for doc_id, meta in zip(result["ids"], result["metadatas"])
+    }
+
+
+def get_indexed_chunks(parent_ids):
+    """Maps every indexed id belonging to the given documents to its content hash."""
+    if not parent_ids:
+        return {}
+    store = get_vector_store()
+    chunked = store.get(where={"parent_id": {"$in": list(parent_ids)}})
+    hashes = get_indexed_hashes(list(parent_ids))  # Entries indexed before chunking lack parent_id
+    hashes.update(
+        (doc_id, meta.get("content_hash"))
+        for doc_id, meta in zip(chunked["ids"], chunked["metadatas"])
+    )
+    return hashes
+
+
+def index_documents(documents, batch_size=10):
+    """Embeds and upserts the given documents, skipping chunks whose content hash is unchanged
+    and removing chunks a document no longer has.
+
+    Returns the number of chunks actually re-embedded.
+    """
+    embedded = 0
+    parent_ids, batch = [], []
+
+    def flush():
+        nonlocal embedded
+        with span("vector_store.get_hashes", size=len(batch)):
+            indexed_hashes = get_indexed_chunks(parent_ids)
+        changed = [
+            entry for entry in batch
+            if indexed_hashes.get(entry[0]) != entry[2]["content_hash"]
+        ]
+        if changed:
+            ids, texts, metadata = (list(column) for column in zip(*changed))
+            _store_batch(ids, texts, metadata)
+            embedded += len(changed)
+        current_ids = {doc_id for doc_id, _, _ in batch}
+        delete_ids([doc_id for doc_id in indexed_hashes if doc_id not in current_ids])
+
+    # Batches hold whole documents so a document's old chunks are compared in one go
+    for doc in documents:
+        parent_ids.append(str(doc["_id"]))
+        batch.extend(prepare_chunks(doc))
+        if len(batch) >= batch_size:
+            flush()
+            parent_ids, batch = [], []
+
+    if batch:
+        flush()
+    return embedded
+
+
+def delete_documents(ids):
+    """Removes documents, given by MongoDB `_id`, together with all of their chunks."""
+    if ids:
+        parent_ids = [str(doc_id) for doc_id in ids]
+        delete_ids(list(get_indexed_chunks(parent_ids)) or parent_ids)
+
+
+def delete_ids(ids):
+    """Removes entries, given by vector store id (chunk ids included), from both indexes."""
+    if ids:
+        _check_writable()
+        with span("vector_store.delete", size=len(ids)):
+            get_vector_store().delete(ids)
+            get_bm25_index().delete_many(ids)
+        retrieval_cache.bump_index_version()
+
+
+def store_vectors(ids, texts, metadata, vectors):
+    """Upserts already-encoded documents into the vector store and the BM25 index."""
+    _check_writable()
+    # Upsert, so re-synced documents replace their old embedding.
+    # The full text goes in `documents` rather than being duplicated into the metadata.
+    with span("vector_store.upsert", size=len(ids), backend=settings.vector_backend):
+        get_vector_store().upsert(ids, vectors, metadata, texts)
+    with span("bm25.upsert", size=len(ids)):
+        get_bm25_index().upsert_many(ids, texts, metadata)
+    retrieval_cache.bump_index_version()  # Cached retrieval results are now stale
 
 
 def _store_batch(ids, texts, metadata):
-    """Encodes text and stores embeddings in ChromaDB in batches."""
+    """Encodes text and stores embeddings in the vector store in batches."""
     if not ids or not texts or not metadata:
         return
 
-    vectors = embedding_model.encode(texts).tolist()
+    with span("embedding.encode_batch", size=len(texts)):
+        vectors = embedding_model.encode(texts).tolist()
 
-    # Ensure metadata includes full document details
-    for i in range(len(metadata)):
-        metadata[i]["text"] = texts[i]  # Add full text to metadata
-
-    # Store in ChromaDB
-    chroma_collection.add(ids=ids, embeddings=vectors, metadatas=metadata)
-
-    for i in range(len(ids)):
-        print(
-            f"Stored in ChromaDB: ID={ids[i]}, Metadata={json.dumps(metadata[i], indent=2)}"
-        )
+    store_vectors(ids, texts, metadata, vectors)
+    print(f"Stored {len(ids)} documents in the {settings.vector_backend} vector store")
 
 
 def flatten_dict(d, parent_key="", sep="_"):
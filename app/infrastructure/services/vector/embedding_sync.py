@@ -0,0 +1,248 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import wait
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from app.core.config import Settings
+from app.core.tracing import span
+from .embedding_indexer import embedding_indexer
+from .embedding_service import db, delete_documents, persist_vector_store, update_embeddings
+
+
+class WatermarkStore:
+    """Per-collection last-seen `_id` / `updated_at`, persisted next to the vector index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.state = self._load()
+
+    def get(self, collection_name: str) -> dict:
+        with self._lock:
+            return dict(self.state.get(collection_name, {}))
+
+    def update(self, collection_name: str, last_id=None, last_updated_at=None):
+        with self._lock:
+            entry = self.state.setdefault(collection_name, {})
+            if last_id is not None:
+                entry["last_id"] = last_id
+            if last_updated_at is not None:
+                entry["last_updated_at"] = last_updated_at.isoformat()
+            self._save()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return json.loads(json.dumps(self.state))
+
+    def reset(self):
+        with self._lock:
+            self.state = {}
+            self._save()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable sync state {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+def _id_key(doc_id: Optional[str]):
+    """Sort key matching Mongo's ordering for the ids we compare (ObjectIds before strings)."""
+    if doc_id is None:
+        return (-1, "")
+    return (0, ObjectId(doc_id)) if ObjectId.is_valid(doc_id) else (1, doc_id)
+
+
+class EmbeddingSync:
+    """Reconciles the vector store with MongoDB without rescanning it.
+
+    In "poll" mode each collection is read from its watermark onwards, so only documents
+    inserted (higher `_id`) or modified (newer `updated_at`) since the last pass are embedded.
+    In "change_stream" mode a Mongo change stream pushes inserts, updates and deletes as they
+    happen; polling still runs at the configured interval to catch anything missed while the
+    stream was down, and takes over entirely when the server does not support change streams.
+    """
+
+    def __init__(
+        self,
+        state_path: str,
+        mode: str = "poll",
+        interval: float = 30.0,
+        reconcile_interval: float = 3600.0,
+    ):
+        if mode not in ("poll", "change_stream"):
+            raise ValueError(f"Unsupported embedding sync mode: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.reconcile_interval = reconcile_interval
+        self.last_reconcile: Optional[dict] = None
+        self.watermarks = WatermarkStore(state_path)
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._watcher: Optional[threading.Thread] = None
+        self.counters = {"passes": 0, "indexed": 0, "deleted": 0, "stream_events": 0}
+
+    def sync_collection(self, collection_name: str) -> int:
+        watermark = self.watermarks.get(collection_name)
+        last_updated_at = watermark.get("last_updated_at")
+
+        with span("embedding_sync.collection", collection=collection_name):
+            documents = list(
+                db.get_documents_since(
+                    collection_name,
+                    last_id=watermark.get("last_id"),
+                    last_updated_at=(
+                        datetime.fromisoformat(last_updated_at) if last_updated_at else None
+                    ),
+                )
+            )
+            if not documents:
+                return 0
+
+            # Embedding happens on the indexer thread; wait so a failure keeps the watermark
+            self._wait(embedding_indexer.submit(documents))
+            persist_vector_store()  # In-memory backends must reach disk before the watermark
+
+        last_id = max([doc["_id"] for doc in documents] + [watermark.get("last_id")], key=_id_key)
+        update_times = [
+            doc["updated_at"] for doc in documents if isinstance(doc.get("updated_at"), datetime)
+        ]
+        # Only advance the watermark once the batch is safely in the vector store
+        self.watermarks.update(
+            collection_name,
+            last_id=last_id,
+            last_updated_at=max(update_times) if update_times else None,
+        )
+        return len(documents)
+
+    def _wait(self, futures, poll: float = 1.0):
+        """Waits for indexer futures, giving up (without advancing anything) once stopped."""
+        pending = set(futures)
+        while pending:
+            if self._stop.is_set():
+                raise RuntimeError("Embedding sync stopped before the batch was indexed")
+            done, pending = wait(pending, timeout=poll)
+            for future in done:
+                future.result()
+
+    def sync_once(self) -> int:
+        """Indexes every document added or changed since the previous pass."""
+        with self._sync_lock, span("embedding_sync.pass"):
+            indexed = sum(
+                self.sync_collection(name) for name in db.list_collection_names()
+            )
+            self.counters["passes"] += 1
+            self.counters["indexed"] += indexed
+            persist_vector_store()  # Publishes what the indexer stored for API and change-stream writes
+        return indexed
+
+    def reconcile(self) -> dict:
+        """Compares content hashes of every document against the index.
+
+        Catches edits that did not bump `updated_at` and deletions missed while no change
+        stream was running; only changed documents are re-embedded.
+        """
+        with self._sync_lock, span("embedding_sync.reconcile"):
+            result = update_embeddings(batch_size=embedding_indexer.batch_size)
+            self.counters["indexed"] += result["embedded"]
+            self.counters["deleted"] += result["deleted"]
+            self.last_reconcile = {**result, "finished_at": time.time()}
+        return result
+
+    def watch(self):
+        """Applies change-stream events until stopped; returns if streams are unsupported."""
+        try:
+            with db.watch_changes() as stream:
+                print("Embedding sync: following MongoDB change stream")
+                while not self._stop.is_set():
+                    change = stream.try_next()
+                    if change is None:
+                        self._stop.wait(1.0)
+                        continue
+                    self._apply_change(change)
+        except PyMongoError as e:
+            print(f"Embedding sync: change stream unavailable ({e}), using polling only")
+
+    def _apply_change(self, change: dict):
+        operation = change.get("operationType")
+        collection_name = change.get("ns", {}).get("coll")
+        doc_id = str(change.get("documentKey", {}).get("_id"))
+
+        with self._sync_lock, span("embedding_sync.change", operation=operation):
+            if operation in ("insert", "update", "replace") and change.get("fullDocument"):
+                doc = change["fullDocument"]
+                doc["_id"] = str(doc["_id"])
+                doc["collection_name"] = collection_name
+                embedding_indexer.submit([doc])
+                self.counters["indexed"] += 1
+            elif operation == "delete":
+                delete_documents([doc_id])
+                self.counters["deleted"] += 1
+            self.counters["stream_events"] += 1
+
+    async def run(self):
+        """Polls for changes every `interval` seconds, reconciling every `reconcile_interval`."""
+        next_reconcile = time.monotonic() + self.reconcile_interval
+        while True:
+            try:
+                await asyncio.to_thread(self.sync_once)
+                if time.monotonic() >= next_reconcile:
+                    next_reconcile = time.monotonic() + self.reconcile_interval
+                    await asyncio.to_thread(self.reconcile)
+            except Exception as e:
+                print(f"Embedding sync failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        if self.mode == "change_stream":
+            self._watcher = threading.Thread(target=self.watch, name="embedding-sync-watch", daemon=True)
+            self._watcher.start()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "watching": bool(self._watcher and self._watcher.is_alive()),
+            **self.counters,
+            "last_reconcile": self.last_reconcile,
+            "watermarks": self.watermarks.snapshot(),
+        }
+
+
+settings = Settings()
+embedding_sync = EmbeddingSync(
+    settings.embedding_sync_state_path,
+    mode=settings.embedding_sync_mode,
+    interval=settings.embedding_sync_interval,
+    reconcile_interval=settings.embedding_reconcile_interval,
+)
@@ -0,0 +1,317 @@
+"""HNSW parameter sweep and compaction for the Chroma collection.
+
+Usage:
+    python -m app.infrastructure.services.vector.hnsw_tuning sweep [--m 8 16 32]
+        [--construction-ef 100 200] [--search-ef 10 50 100 200] [--queries 200] [--min-recall 0.95]
+    python -m app.infrastructure.services.vector.hnsw_tuning compact [--m 16]
+        [--construction-ef 200] [--search-ef 100]
+
+sweep copies the live collection's vectors into scratch in-memory collections, one per
+(M, construction_ef, search_ef) combination, and measures build time, query p50/p99 and
+recall@10 against brute-force ground truth. Queries are stored vectors with a little noise,
+so they sit near real documents like real questions do. The recommended configuration is
+the fastest one (by p99) that reaches --min-recall.
+
+compact rebuilds the collection with the given (or configured) HNSW parameters, dropping the
+deleted and superseded entries the old index still carries, and swaps it in by name. Both
+are also available under /admin/embeddings/hnsw; compact through the admin endpoint while
+the server is running, since the CLI cannot re-point the server's open collection.
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import Settings
+from app.core.stats import percentile
+from app.core.tracing import span
+from .embedding_service import get_vector_store
+from .index_lock import IndexLockedError, index_lock
+from .retrieval_cache import retrieval_cache
+from .vector_backends import ChromaVectorStore, chroma_hnsw_metadata
+
+DEFAULT_M = (8, 16, 32)
+DEFAULT_CONSTRUCTION_EF = (100, 200)
+DEFAULT_SEARCH_EF = (10, 50, 100, 200)
+
+
+def hnsw_metadata(m: int, construction_ef: int, search_ef: int) -> dict:
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+
+
+class HnswTuner:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.progress = {"status": "idle"}
+        self.last_sweep: Optional[dict] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, action: str, **options) -> bool:
+        """Runs "sweep" or "compact" on a background thread; False if one is already running."""
+        if self.is_running():
+            return False
+        target = self.sweep if action == "sweep" else self.compact
+        self._thread = threading.Thread(
+            target=self._run, args=(action, target), kwargs=options, name="hnsw-tuning", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def _run(self, action, target, **options):
+        try:
+            target(**options)
+        except Exception as e:
+            self.progress = {"status": "failed", "action": action, "error": f"{e.__class__.__name__}: {e}"}
+            print(f"HNSW {action} failed: {e}")
+
+    def sweep(
+        self,
+        m_values: Sequence[int] = DEFAULT_M,
+        construction_ef_values: Sequence[int] = DEFAULT_CONSTRUCTION_EF,
+        search_ef_values: Sequence[int] = DEFAULT_SEARCH_EF,
+        queries: int = 200,
+        min_recall: float = 0.95,
+        k: int = 10,
+    ) -> dict:
+        import chromadb
+
+        ids, vectors, _, _ = self._export(include_documents=False)
+        if len(ids) <= k:
+            raise ValueError(f"The collection has {len(ids)} entries; a sweep needs more than {k}")
+
+        rng = np.random.default_rng(0)
+        query_vectors = vectors[rng.integers(len(ids), size=queries)]
+        query_vectors = query_vectors + 0.05 * rng.standard_normal(query_vectors.shape).astype(np.float32)
+        query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        truth = _exact_top_k(vectors, query_vectors, k)
+
+        grid = [
+            (m, construction_ef, search_ef)
+            for m in m_values
+            for construction_ef in construction_ef_values
+            for search_ef in search_ef_values
+        ]
+        self.progress = {"status": "running", "action": "sweep", "documents": len(ids), "done": 0, "total": len(grid)}
+        client = chromadb.EphemeralClient()
+        row_of = {doc_id: row for row, doc_id in enumerate(ids)}
+        results = []
+        with span("hnsw.sweep", documents=len(ids), configurations=len(grid)):
+            for m, construction_ef, search_ef in grid:
+                name = f"hnsw-sweep-{uuid.uuid4().hex[:8]}"
+                collection = client.create_collection(
+                    name=name, metadata=hnsw_metadata(m, construction_ef, search_ef)
+                )
+                try:
+                    start = time.perf_counter()
+                    _add_in_batches(collection, ids, vectors)
+                    build_seconds = time.perf_counter() - start
+
+                    latencies, recalls = [], []
+                    for query, expected in zip(query_vectors, truth):
+                        start = time.perf_counter()
+                        found = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        rows = {row_of[doc_id] for doc_id in found["ids"][0]}
+                        recalls.append(len(rows & set(expected.tolist())) / k)
+                finally:
+                    client.delete_collection(name)
+
+                result = {
+                    "m": m,
+                    "construction_ef": construction_ef,
+                    "search_ef": search_ef,
+                    "build_seconds": round(build_seconds, 2),
+                    "p50_ms": round(percentile(latencies, 50), 3),
+                    "p99_ms": round(percentile(latencies, 99), 3),
+                    "recall": round(float(np.mean(recalls)), 4),
+                }
+                results.append(result)
+                self.progress["done"] += 1
+                print(
+                    f"HNSW M={m} construction_ef={construction_ef} search_ef={search_ef}: "
+                    f"recall@{k} {result['recall']:.3f}, p50 {result['p50_ms']:.2f} ms, "
+                    f"p99 {result['p99_ms']:.2f} ms, build {result['build_seconds']:.1f}s"
+                )
+
+        self.last_sweep = {
+            "documents": len(ids),
+            "queries": queries,
+            "min_recall": min_recall,
+            "current": chroma_hnsw_metadata(self.settings),
+            "results": results,
+            "recommended": self.recommend(results, min_recall),
+            "finished_at": time.time(),
+        }
+        self.progress = {"status": "finished", "action": "sweep", "documents": len(ids)}
+        return self.last_sweep
+
+    @staticmethod
+    def recommend(results: List[dict], min_recall: float) -> dict:
+        """Fastest configuration (p99, then smaller M) meeting min_recall, else the most accurate."""
+        meeting = [result for result in results if result["recall"] >= min_recall]
+        if meeting:
+            best = min(meeting, key=lambda result: (result["p99_ms"], result["m"], result["construction_ef"]))
+            reason = f"lowest p99 latency with recall >= {min_recall}"
+        else:
+            best = max(results, key=lambda result: (result["recall"], -result["p99_ms"]))
+            reason = f"no configuration reached recall {min_recall}; highest recall"
+        return {
+            **best,
+            "reason": reason,
+            "settings": {
+                "chroma_hnsw_m": best["m"],
+                "chroma_hnsw_construction_ef": best["construction_ef"],
+                "chroma_hnsw_search_ef": best["search_ef"],
+            },
+        }
+
+    def compact(
+        self,
+        m: Optional[int] = None,
+        construction_ef: Optional[int] = None,
+        search_ef: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> dict:
+        """Rebuilds the collection from its live entries with the given HNSW parameters.
+
+        The copy is built under a temporary name and swapped in by renaming, so queries keep
+        working throughout. Writes that land on the old collection during the copy are lost
+        from the new one; the content-hash reconcile after the swap re-adds them.
+        """
+        store = self._chroma_store()
+        name = store.collection.name
+        metadata = {"hnsw:space": "cosine", **chroma_hnsw_metadata(self.settings)}
+        for key, value in (("hnsw:M", m), ("hnsw:construction_ef", construction_ef), ("hnsw:search_ef", search_ef)):
+            if value is not None:
+                metadata[key] = value
+
+        self.progress = {"status": "running", "action": "compact", "parameters": metadata}
+        started = time.monotonic()
+        with span("hnsw.compact", collection=name):
+            ids, vectors, metadatas, documents = self._export(include_documents=True)
+            old = store.collection
+            new = store.client.create_collection(name=f"{name}__compacting", metadata=metadata)
+            _add_in_batches(new, ids, vectors, metadatas, documents, batch_size)
+
+            old.modify(name=f"{name}__old")
+            new.modify(name=name)
+            store.collection = new
+            store.client.delete_collection(f"{name}__old")
+        retrieval_cache.bump_index_version()
+
+        from .embedding_sync import embedding_sync
+
+        reconciled = embedding_sync.reconcile()
+        self.progress = {
+            "status": "finished",
+            "action": "compact",
+            "parameters": metadata,
+            "documents": len(ids),
+            "reconciled": reconciled,
+            "elapsed_seconds": round(time.monotonic() - started, 1),
+        }
+        print(f"Compacted {name}: {len(ids)} entries with {metadata}")
+        return self.progress
+
+    def _chroma_store(self) -> ChromaVectorStore:
+        store = get_vector_store()
+        if not isinstance(store, ChromaVectorStore):
+            raise ValueError(f"HNSW tuning applies to the chroma backend, not {store.name}")
+        return store
+
+    def _export(self, include_documents: bool, page_size: int = 5000):
+        """Reads every entry of the live collection, in pages."""
+        collection = self._chroma_store().collection
+        include = ["embeddings", "metadatas"] + (["documents"] if include_documents else [])
+        ids, vectors, metadatas, documents = [], [], [], []
+        with span("hnsw.export", collection=collection.name):
+            for offset in range(0, collection.count(), page_size):
+                page = collection.get(include=include, limit=page_size, offset=offset)
+                ids.extend(page["ids"])
+                vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+                metadatas.extend(page["metadatas"])
+                documents.extend(page.get("documents") or [])
+        vectors = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        if len(vectors):
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return ids, vectors, metadatas, documents
+
+
+def _exact_top_k(vectors, queries, k, chunk_size=16):
+    """Brute-force cosine ground truth (vectors are normalized), a few queries at a time."""
+    truth = []
+    for start in range(0, len(queries), chunk_size):
+        scores = queries[start:start + chunk_size] @ vectors.T
+        truth.append(np.argpartition(-scores, k - 1, axis=1)[:, :k])
+    return np.concatenate(truth)
+
+
+def _add_in_batches(collection, ids, vectors, metadatas=None, documents=None, batch_size=1000):
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        collection.add(
+            ids=ids[start:end],
+            embeddings=vectors[start:end].tolist(),
+            metadatas=metadatas[start:end] if metadatas else None,
+            documents=documents[start:end] if documents else None,
+        )
+
+
+settings = Settings()
+hnsw_tuner = HnswTuner(settings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    sweep_parser = subparsers.add_parser("sweep", help="Recall/latency sweep over HNSW parameters")
+    sweep_parser.add_argument("--m", type=int, nargs="+", default=list(DEFAULT_M))
+    sweep_parser.add_argument("--construction-ef", type=int, nargs="+", default=list(DEFAULT_CONSTRUCTION_EF))
+    sweep_parser.add_argument("--search-ef", type=int, nargs="+", default=list(DEFAULT_SEARCH_EF))
+    sweep_parser.add_argument("--queries", type=int, default=200)
+    sweep_parser.add_argument("--min-recall", type=float, default=0.95)
+
+    compact_parser = subparsers.add_parser("compact", help="Rebuild the collection with new parameters")
+    compact_parser.add_argument("--m", type=int, default=None)
+    compact_parser.add_argument("--construction-ef", type=int, default=None)
+    compact_parser.add_argument("--search-ef", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.action == "sweep":
+        result = hnsw_tuner.sweep(
+            m_values=args.m,
+            construction_ef_values=args.construction_ef,
+            search_ef_values=args.search_ef,
+            queries=args.queries,
+            min_recall=args.min_recall,
+        )
+        print("\nRecommended:")
+        print(json.dumps(result["recommended"], indent=2))
+    else:
+        # Swaps the collection under the server's feet, so only while no server holds the index
+        try:
+            index_lock.acquire("hnsw_compact")
+        except IndexLockedError as e:
+            raise SystemExit(str(e))
+        try:
+            hnsw_tuner.compact(m=args.m, construction_ef=args.construction_ef, search_ef=args.search_ef)
+        finally:
+            index_lock.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import fcntl
+import os
+from typing import Optional
+
+from app.core.config import Settings
+
+
+class IndexLockedError(RuntimeError):
+    pass
+
+
+class IndexLock:
+    """Exclusive claim on the on-disk indexes (BM25 JSON, NumPy/FAISS files) by one process.
+
+    The BM25 and in-memory vector stores are rewritten whole from the owning process's copy,
+    so two writers (two uvicorn workers, or the bulk reindex CLI next to a running server)
+    would silently overwrite each other. Server workers therefore elect one writer: the worker
+    that wins the lock at startup runs the indexer and sync, and the others serve read-only,
+    reloading the files whenever the writer publishes a new index version (see
+    embedding_service.refresh_index). The claim is an flock, released by the kernel when the
+    process exits, so a crash never leaves a stale lock behind.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, owner: str):
+        """Claims the indexes for `owner`, or raises IndexLockedError naming the holder."""
+        if not self.try_acquire(owner):
+            raise IndexLockedError(
+                f"The vector indexes under {os.path.dirname(self.path) or '.'} are in use by "
+                f"{self.holder() or 'another process'}; stop the server before a bulk reindex "
+                "(or use POST /admin/embeddings/reindex)"
+            )
+
+    def try_acquire(self, owner: str) -> bool:
+        """Claims the indexes for `owner` if nobody else holds them; never blocks."""
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{owner} (pid {os.getpid()})".encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def holder(self) -> Optional[str]:
+        try:
+            with open(self.path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+
+settings = Settings()
+index_lock = IndexLock(settings.index_lock_path)
@@ -0,0 +1,19 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from .embedding_backends import EmbeddingBackend
+
+
+class SharedLangChainEmbeddings(Embeddings):
+    """LangChain `Embeddings` over a shared backend, a drop-in for `HuggingFaceEmbeddings`
+    (which also returns unnormalized sentence-transformers vectors by default)."""
+
+    def __init__(self, model: EmbeddingBackend):
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(text).tolist()
@@ -0,0 +1,181 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from app.core.config import Settings
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    # MiniLM is uncased, so case and spacing differences don't change the embedding
+    return WHITESPACE.sub(" ", text).strip().lower()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return self._entries[key]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key: Hashable, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+class RetrievalCache:
+    """Caches query embeddings and retrieval results for repeated questions.
+
+    Query vectors are keyed on normalized query text and stay valid until evicted. Results
+    are keyed on (query, filters, k, mode, index version). Every vector store write replaces
+    the local index version. The index writer publishes it to a file next to the index once
+    the write is on disk, and read-only workers adopt the published version after reloading
+    the index (see embedding_service.refresh_index), which invalidates their results too;
+    results also expire after `result_ttl` seconds as a backstop for changes made outside the app.
+    """
+
+    def __init__(
+        self,
+        max_embeddings: int,
+        max_results: int,
+        version_path: Optional[str] = None,
+        result_ttl: float = 0.0,
+    ):
+        self.embeddings = LRUCache(max_embeddings)
+        self.results = LRUCache(max_results)
+        self.version_path = version_path
+        self.result_ttl = result_ttl
+        self._version = uuid.uuid4().hex
+        self._published: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def index_version(self) -> str:
+        return self._version
+
+    def bump_index_version(self):
+        with self._lock:
+            self._version = uuid.uuid4().hex  # Unique, so two processes can never reuse a version
+        self.results.clear()  # Unreachable under the new version anyway; free them now
+
+    def publish_index_version(self, version: Optional[str] = None):
+        """Announces `version` (default: the current one) to read-only workers.
+
+        Called by the index writer once the index files reflect that version.
+        """
+        version = version or self._version
+        if not self.version_path or version == self._published:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.version_path) or ".", exist_ok=True)
+            tmp_path = f"{self.version_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(version)
+            os.replace(tmp_path, self.version_path)
+            self._published = version
+        except OSError as e:
+            print(f"Could not publish retrieval index version to {self.version_path}: {e}")
+
+    def shared_index_version(self) -> Optional[str]:
+        """The version last published by the index writer, if any."""
+        if not self.version_path:
+            return None
+        try:
+            with open(self.version_path) as f:
+                return f.read() or None
+        except OSError:
+            return None
+
+    def adopt_index_version(self, version: str):
+        """Switches a read-only worker to the writer's version after it reloaded the index."""
+        with self._lock:
+            self._version = version
+        self.results.clear()
+
+    def result_key(self, query: str, filters: dict, n_results: int, mode: str) -> tuple:
+        active = {key: value for key, value in filters.items() if value not in (None, [])}
+        return (
+            normalize_query(query),
+            json.dumps(active, sort_keys=True, default=str),
+            n_results,
+            mode,
+            self.index_version,
+        )
+
+    def get_embedding(self, query: str):
+        return self.embeddings.get(normalize_query(query))
+
+    def put_embedding(self, query: str, vector):
+        vector = vector.copy()
+        vector.flags.writeable = False  # Shared between requests; callers must not modify it
+        self.embeddings.put(normalize_query(query), vector)
+
+    def get_results(self, key: tuple) -> Optional[list]:
+        entry = self.results.get(key)
+        if entry is None:
+            return None
+        stored_at, hits = entry
+        if self.result_ttl and time.monotonic() - stored_at > self.result_ttl:
+            return None
+        return list(hits)
+
+    def put_results(self, key: tuple, hits: list):
+        if key[-1] == self.index_version:  # The index may have changed while searching
+            self.results.put(key, (time.monotonic(), list(hits)))
+
+    def clear(self):
+        self.embeddings.clear()
+        self.results.clear()
+
+    def stats(self) -> dict:
+        return {
+            "index_version": self.index_version,
+            "embeddings": self.embeddings.stats(),
+            "results": self.results.stats(),
+        }
+
+
+settings = Settings()
+retrieval_cache = RetrievalCache(
+    max_embeddings=settings.retrieval_cache_max_embeddings,
+    max_results=settings.retrieval_cache_max_results,
+    version_path=settings.retrieval_cache_version_path,
+    result_ttl=settings.retrieval_cache_result_ttl,
+)
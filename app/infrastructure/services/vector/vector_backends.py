@@ -0,0 +1,514 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.tracing import span
+from .bm25_index import FILTER_KEYS
+
+# Metadata kept as integer-coded columns by the in-memory stores: the retrieval filters and
+# the chunk -> document link
+COLUMN_KEYS = FILTER_KEYS + ("parent_id",)
+
+QueryResult = List[Tuple[str, float, dict]]  # (id, cosine similarity, metadata), best first
+
+
+def matches_where(metadata: dict, where: Optional[dict]) -> bool:
+    """Evaluates the subset of Chroma's `where` syntax that build_where() produces."""
+    if not where:
+        return True
+    if "$and" in where:
+        return all(matches_where(metadata, clause) for clause in where["$and"])
+    for key, condition in where.items():
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$nin" in condition and value in condition["$nin"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class VectorStore(ABC):
+    """Storage and nearest-neighbour search for document embeddings (cosine similarity)."""
+
+    name: str
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings, metadatas: List[dict], documents: List[str]):
+        pass
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        pass
+
+    @abstractmethod
+    def query(self, embedding, n_results: int, where: Optional[dict] = None) -> QueryResult:
+        pass
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, include_documents: bool = False) -> dict:
+        """Returns {"ids": [...], "metadatas": [...], "documents": [...] (if requested)}."""
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    def persist(self):
+        """Flushes in-memory state to disk; a no-op for stores that write through."""
+
+    def close(self):
+        """Releases the store so a fresh instance reads the files another process wrote."""
+
+
+class ChromaVectorStore(VectorStore):
+    name = "chroma"
+
+    def __init__(self, path: str, collection_name: str, hnsw: Optional[dict] = None):
+        import chromadb  # Imported here so other backends don't pay for it
+
+        with span("chroma.open"):
+            self.client = chromadb.PersistentClient(path=path)
+            # Ensure ChromaDB uses cosine similarity for correct distance calculations.
+            # HNSW parameters only apply when the collection is created (see hnsw_tuning.py).
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name, metadata={"hnsw:space": "cosine", **(hnsw or {})}
+            )
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.collection.upsert(
+            ids=ids, embeddings=_as_list(embeddings), metadatas=metadatas, documents=documents
+        )
+
+    def delete(self, ids):
+        self.collection.delete(ids=ids)
+
+    def query(self, embedding, n_results, where=None):
+        results = self.collection.query(
+            query_embeddings=[_as_list(embedding)],
+            n_results=n_results,
+            where=where,
+            include=["metadatas", "distances"],
+        )
+        if not results or not results.get("ids"):
+            return []
+        return [
+            (doc_id, 1.0 - distance, metadata or {})  # Cosine space: distance = 1 - similarity
+            for doc_id, distance, metadata in zip(
+                results["ids"][0], results["distances"][0], results["metadatas"][0]
+            )
+        ]
+
+    def get(self, ids=None, where=None, include_documents=False):
+        if ids is not None and not ids:
+            return {"ids": [], "metadatas": [], "documents": []}
+        include = ["metadatas", "documents"] if include_documents else ["metadatas"]
+        results = self.collection.get(ids=ids, where=where, include=include)
+        return {
+            "ids": results["ids"],
+            "metadatas": [metadata or {} for metadata in results["metadatas"]],
+            "documents": results.get("documents") or [],
+        }
+
+    def count(self):
+        return self.collection.count()
+
+    def close(self):
+        # Chroma caches one client (and its HNSW segments) per path for the whole process
+        self.client.clear_system_cache()
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact brute-force search over an in-memory matrix, persisted as .npy + JSON.
+
+    Rows are never moved on delete or update; the old row is tombstoned and the matrix is
+    compacted once tombstones pass a quarter of the rows. The COLUMN_KEYS fields are kept as
+    integer-coded columns, so filtered queries select candidate rows with a vector
+    comparison instead of reading every document's metadata.
+    """
+
+    name = "numpy"
+
+    def __init__(self, path: str, dimension: Optional[int] = None):
+        self.path = path
+        self.dimension = dimension
+        self.vectors = np.zeros((0, dimension or 0), dtype=np.float32)
+        self.live = np.zeros(0, dtype=bool)
+        self.columns = {key: np.zeros(0, dtype=np.int32) for key in COLUMN_KEYS}
+        self.codes: Dict[str, Dict[object, int]] = {key: {} for key in COLUMN_KEYS}
+        self.row_ids: List[Optional[str]] = []  # None marks a deleted row
+        self.rows: Dict[str, int] = {}
+        self.metadatas: Dict[str, dict] = {}
+        self.documents: Dict[str, str] = {}
+        self._size = 0  # Rows in use; the arrays grow geometrically ahead of it
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._load()
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        with self._lock:
+            self._tombstone(ids)
+            start = self._append(vectors, metadatas)
+            for offset, (doc_id, metadata, document) in enumerate(zip(ids, metadatas, documents)):
+                self.row_ids.append(doc_id)
+                self.rows[doc_id] = start + offset
+                self.metadatas[doc_id] = metadata
+                self.documents[doc_id] = document
+            self._index_added(start, vectors)
+            self._maybe_compact()
+            self._dirty = True
+
+    def delete(self, ids):
+        with self._lock:
+            self._tombstone(ids)
+            for doc_id in ids:
+                self.metadatas.pop(doc_id, None)
+                self.documents.pop(doc_id, None)
+            self._maybe_compact()
+            self._dirty = True
+
+    def query(self, embedding, n_results, where=None):
+        query = _normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            if not self.rows:
+                return []
+            if where:
+                # Pre-filter: score only the rows that match, exactly
+                ranked = self._exact(query, self._matching_rows(where), n_results)
+            else:
+                ranked = self._search(query, n_results)
+            return [
+                (self.row_ids[row], float(score), self.metadatas[self.row_ids[row]])
+                for row, score in ranked
+            ]
+
+    def get(self, ids=None, where=None, include_documents=False):
+        with self._lock:
+            if ids is None and where:
+                selected = [self.row_ids[row] for row in self._matching_rows(where)]
+            else:
+                selected = [doc_id for doc_id in (ids if ids is not None else self.rows) if doc_id in self.rows]
+                if where:
+                    selected = [doc_id for doc_id in selected if matches_where(self.metadatas[doc_id], where)]
+            return {
+                "ids": selected,
+                "metadatas": [self.metadatas[doc_id] for doc_id in selected],
+                "documents": [self.documents[doc_id] for doc_id in selected] if include_documents else [],
+            }
+
+    def count(self):
+        return len(self.rows)
+
+    def persist(self):
+        with self._lock:
+            if self._dirty:
+                self._persist()
+                self._dirty = False
+
+    def _persist(self):
+        with span("vector_store.persist", backend=self.name, size=len(self.rows)):
+            self._compact()
+            os.makedirs(self.path, exist_ok=True)
+            # Replaced atomically, like documents.json: read-only workers may load it any time
+            with open(os.path.join(self.path, "vectors.npy.tmp"), "wb") as f:
+                np.save(f, self.vectors[: self._size])
+            os.replace(os.path.join(self.path, "vectors.npy.tmp"), os.path.join(self.path, "vectors.npy"))
+            with open(os.path.join(self.path, "documents.json.tmp"), "w") as f:
+                json.dump(
+                    {"ids": self.row_ids, "metadatas": self.metadatas, "documents": self.documents}, f
+                )
+            os.replace(
+                os.path.join(self.path, "documents.json.tmp"),
+                os.path.join(self.path, "documents.json"),
+            )
+
+    # Search hooks overridden by the FAISS store
+
+    def _search(self, query, n_results) -> List[Tuple[int, float]]:
+        scores = self.vectors[: self._size] @ query
+        scores[~self.live[: self._size]] = -np.inf
+        return _top_k(scores, np.arange(self._size), min(n_results, len(self.rows)))
+
+    def _index_added(self, start: int, vectors):
+        pass
+
+    def _index_rebuilt(self):
+        pass
+
+    def _index_loaded(self):
+        self._index_rebuilt()
+
+    # Helpers
+
+    def _exact(self, query, candidates, n_results) -> List[Tuple[int, float]]:
+        if len(candidates) == 0:
+            return []
+        return _top_k(self.vectors[candidates] @ query, candidates, n_results)
+
+    def _matching_rows(self, where):
+        mask = self._where_mask(where)
+        if mask is None:  # Keys or operators without a column: check metadata row by row
+            return np.fromiter(
+                (row for doc_id, row in self.rows.items() if matches_where(self.metadatas[doc_id], where)),
+                dtype=np.int64,
+            )
+        return np.flatnonzero(mask & self.live[: self._size])
+
+    def _where_mask(self, where):
+        mask = np.ones(self._size, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    clause_mask = self._where_mask(clause)
+                    if clause_mask is None:
+                        return None
+                    mask &= clause_mask
+                continue
+            if key not in self.columns:
+                return None
+            if not isinstance(condition, dict):
+                values = [condition]
+            elif set(condition) == {"$in"}:
+                values = condition["$in"]
+            elif set(condition) == {"$eq"}:
+                values = [condition["$eq"]]
+            else:
+                return None
+            codes = [self.codes[key][value] for value in values if value in self.codes[key]]
+            mask &= np.isin(self.columns[key][: self._size], codes)
+        return mask
+
+    def _append(self, vectors, metadatas) -> int:
+        if self.vectors.shape[1] == 0:
+            self.dimension = vectors.shape[1]
+            self.vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        needed = self._size + len(vectors)
+        if needed > len(self.vectors):
+            capacity = max(needed, 2 * len(self.vectors), 1024)
+            self.vectors = _grow(self.vectors, self._size, capacity)
+            self.live = _grow(self.live, self._size, capacity)
+            for key in COLUMN_KEYS:
+                self.columns[key] = _grow(self.columns[key], self._size, capacity)
+        start = self._size
+        self.vectors[start:needed] = vectors
+        self.live[start:needed] = True
+        self._size = needed
+        self._encode_columns(start, metadatas)
+        return start
+
+    def _encode_columns(self, start, metadatas):
+        for key in COLUMN_KEYS:
+            codes, column = self.codes[key], self.columns[key]
+            for offset, metadata in enumerate(metadatas):
+                value = metadata.get(key)
+                column[start + offset] = -1 if value is None else codes.setdefault(value, len(codes))
+
+    def _tombstone(self, ids):
+        for doc_id in ids:
+            row = self.rows.pop(doc_id, None)
+            if row is not None:
+                self.row_ids[row] = None
+                self.live[row] = False
+
+    def _maybe_compact(self):
+        if self._size and (self._size - len(self.rows)) / self._size > 0.25:
+            self._compact()
+
+    def _compact(self):
+        if self._size == len(self.rows):
+            return
+        keep = np.flatnonzero(self.live[: self._size])
+        self.vectors = self.vectors[keep]
+        self.live = np.ones(len(keep), dtype=bool)
+        for key in COLUMN_KEYS:
+            self.columns[key] = self.columns[key][keep]
+        self.row_ids = [self.row_ids[row] for row in keep]
+        self.rows = {doc_id: row for row, doc_id in enumerate(self.row_ids)}
+        self._size = len(keep)
+        self._index_rebuilt()
+
+    def _load(self):
+        documents_path = os.path.join(self.path, "documents.json")
+        if not os.path.exists(documents_path):
+            return
+        with span("vector_store.load", backend=self.name):
+            with open(documents_path) as f:
+                saved = json.load(f)
+            self.vectors = np.load(os.path.join(self.path, "vectors.npy"))
+            self.dimension = self.vectors.shape[1] if self.vectors.size else self.dimension
+            self._size = len(self.vectors)
+            self.row_ids = saved["ids"]  # Saved compacted, so every row is live
+            self.rows = {doc_id: row for row, doc_id in enumerate(self.row_ids)}
+            self.metadatas = saved["metadatas"]
+            self.documents = saved["documents"]
+            self.live = np.ones(self._size, dtype=bool)
+            self.columns = {key: np.zeros(self._size, dtype=np.int32) for key in COLUMN_KEYS}
+            self._encode_columns(0, [self.metadatas[doc_id] for doc_id in self.row_ids])
+            self._index_loaded()
+
+
+class FaissVectorStore(NumpyVectorStore):
+    """NumpyVectorStore whose unfiltered search goes through a FAISS index.
+
+    index_type "flat" is exact, "hnsw" is a graph index (M, efSearch) and "ivf" is an
+    inverted-file index (nlist, nprobe) trained once enough vectors exist; until then
+    IVF queries fall back to exact search. Filtered queries always use the exact
+    pre-filtered path. Requires faiss-cpu.
+    """
+
+    name = "faiss"
+
+    def __init__(
+        self,
+        path: str,
+        index_type: str = "hnsw",
+        hnsw_m: int = 32,
+        hnsw_ef_search: int = 64,
+        hnsw_ef_construction: int = 128,
+        ivf_nlist: int = 1024,
+        ivf_nprobe: int = 16,
+    ):
+        import faiss  # Optional dependency, only needed for this backend
+
+        if index_type not in ("flat", "hnsw", "ivf"):
+            raise ValueError(f"Unsupported FAISS index type: {index_type}")
+        self.faiss = faiss
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.index = None
+        super().__init__(path)
+        self.name = f"faiss_{index_type}"
+
+    def _search(self, query, n_results):
+        if self.index is None or not self.index.is_trained:
+            return super()._search(query, n_results)
+        # Over-fetch so tombstoned rows can be skipped without coming up short
+        k = min(self._size, n_results + (self._size - len(self.rows)) + 8)
+        scores, rows = self.index.search(query.reshape(1, -1), k)
+        ranked = [
+            (int(row), float(score))
+            for row, score in zip(rows[0], scores[0])
+            if row >= 0 and self.row_ids[row] is not None
+        ]
+        return ranked[:n_results]
+
+    def _index_added(self, start, vectors):
+        if self.index is None:
+            self._index_rebuilt()
+        elif self.index.is_trained:
+            self.index.add(vectors)
+        elif self.index_type == "ivf" and self._size >= self.ivf_nlist * 39:
+            self._index_rebuilt()  # Enough data to train the coarse quantizer now
+
+    def _persist(self):
+        super()._persist()
+        if self.index is not None and self.index.is_trained:
+            self.faiss.write_index(self.index, f"{self._index_file()}.tmp")
+            os.replace(f"{self._index_file()}.tmp", self._index_file())
+
+    def _index_loaded(self):
+        # Reuse the saved index when it matches the saved vectors; HNSW builds are slow
+        if os.path.exists(self._index_file()):
+            index = self.faiss.read_index(self._index_file())
+            if index.ntotal == self._size and index.d == self.dimension:
+                if self.index_type == "hnsw":
+                    index.hnsw.efSearch = self.hnsw_ef_search
+                elif self.index_type == "ivf":
+                    index.nprobe = self.ivf_nprobe
+                self.index = index
+                return
+        self._index_rebuilt()
+
+    def _index_file(self):
+        return os.path.join(self.path, f"faiss_{self.index_type}.index")
+
+    def _index_rebuilt(self):
+        if not self.dimension:
+            return
+        with span("faiss.build", index_type=self.index_type, size=self._size):
+            if self.index_type == "flat":
+                index = self.faiss.IndexFlatIP(self.dimension)
+            elif self.index_type == "hnsw":
+                index = self.faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, self.faiss.METRIC_INNER_PRODUCT)
+                index.hnsw.efConstruction = self.hnsw_ef_construction
+                index.hnsw.efSearch = self.hnsw_ef_search
+            else:
+                quantizer = self.faiss.IndexFlatIP(self.dimension)
+                index = self.faiss.IndexIVFFlat(
+                    quantizer, self.dimension, self.ivf_nlist, self.faiss.METRIC_INNER_PRODUCT
+                )
+                index.nprobe = self.ivf_nprobe
+                if self._size < self.ivf_nlist * 39:  # FAISS wants ~39 points per centroid
+                    self.index = index  # Untrained: queries use the exact path for now
+                    return
+                index.train(self.vectors[: self._size])
+            index.add(self.vectors[: self._size])
+        self.index = index
+
+
+def chroma_hnsw_metadata(settings) -> dict:
+    """The configured Chroma HNSW parameters as collection metadata; unset ones use Chroma's."""
+    parameters = {
+        "hnsw:M": settings.chroma_hnsw_m,
+        "hnsw:construction_ef": settings.chroma_hnsw_construction_ef,
+        "hnsw:search_ef": settings.chroma_hnsw_search_ef,
+    }
+    return {key: value for key, value in parameters.items() if value is not None}
+
+
+def create_vector_store(settings) -> VectorStore:
+    backend = settings.vector_backend
+    if backend == "chroma":
+        return ChromaVectorStore(
+            settings.chroma_path, settings.chroma_collection_name, chroma_hnsw_metadata(settings)
+        )
+    elif backend == "numpy":
+        return NumpyVectorStore(settings.vector_index_path)
+    elif backend == "faiss":
+        return FaissVectorStore(
+            settings.vector_index_path,
+            index_type=settings.faiss_index_type,
+            hnsw_m=settings.faiss_hnsw_m,
+            hnsw_ef_search=settings.faiss_hnsw_ef_search,
+            hnsw_ef_construction=settings.faiss_hnsw_ef_construction,
+            ivf_nlist=settings.faiss_ivf_nlist,
+            ivf_nprobe=settings.faiss_ivf_nprobe,
+        )
+    raise ValueError(f"Unsupported vector backend: {backend}")
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores, rows, k) -> List[Tuple[int, float]]:
+    k = min(k, len(rows))  # A filter may match fewer rows than were asked for
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(int(rows[i]), float(scores[i])) for i in top]
+
+
+def _grow(array, size, capacity):
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
+
+
+def _as_list(embeddings):
+    return embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings
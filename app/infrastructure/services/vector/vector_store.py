@@ -1,33 +1,216 @@
-from .embedding_service import embedding_model, chroma_collection, update_embeddings
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from .bm25_index import reciprocal_rank_fusion
+from .document_chunker import HEADER_FIELDS, parent_id_of
+from .embedding_batcher import embedding_batcher
+from .embedding_service import get_bm25_index, get_vector_store, refresh_index
+from .retrieval_cache import retrieval_cache
+from app.core.config import Settings
+from app.core.tracing import span
 from numpy.linalg import norm
 
+settings = Settings()
+
+ENTITY_NAMES_TTL = 300.0  # Seconds a name -> id lookup is reused
+
+_entity_names = {}
+_entity_names_lock = threading.Lock()
+
+
+def build_where(collection_name=None, department_id=None, status=None, portfolio_id=None):
+    """Builds a Chroma-style `where` filter; each argument may be a single value or a list."""
+    predicates = []
+    for key, value in (
+        ("collection_name", collection_name),
+        ("department_id", department_id),
+        ("status", status),
+        ("portfolio_id", portfolio_id),
+    ):
+        if value is None or value == []:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            predicates.append({key: {"$in": list(value)}})
+        else:
+            predicates.append({key: value})
+
+    if not predicates:
+        return None
+    return predicates[0] if len(predicates) == 1 else {"$and": predicates}
+
+
+def entity_ids_by_name(collection_name):
+    """Maps lower-cased `name` to `_id` for one collection (e.g. departments), cached briefly."""
+    with _entity_names_lock:
+        cached = _entity_names.get(collection_name)
+        if cached and time.monotonic() - cached[0] < ENTITY_NAMES_TTL:
+            return cached[1]
+
+    with span("vector_store.get_entity_names", collection=collection_name):
+        results = get_vector_store().get(where={"collection_name": collection_name})
+    names = {
+        str(meta["name"]).lower(): meta["_id"]
+        for meta in results["metadatas"]
+        if meta.get("name") and meta.get("_id")
+    }
+    with _entity_names_lock:
+        _entity_names[collection_name] = (time.monotonic(), names)
+    return names
+
+
+@dataclass
+class RetrievalHit:
+    id: str
+    collection: str
+    score: float  # Cosine similarity in vector mode, fused RRF score in hybrid mode
+    metadata: dict  # Flattened Mongo document as stored in the vector store
+    # Fields of the matching chunks, for documents indexed as several chunks (best first)
+    matched_fields: List[str] = field(default_factory=list)
+
+
+def retrieve_hits(
+    userChatQuery,
+    n_results=10,
+    collection_name=None,
+    department_id=None,
+    status=None,
+    portfolio_id=None,
+    mode=None,
+) -> List[RetrievalHit]:
+    """Retrieve the most relevant documents from the vector store, best first.
 
-def retrieve_relevant_text(userChatQuery, n_results=10):
-    """Retrieve relevant documents from ChromaDB with proper similarity search."""
+    The optional filters are pushed down into the vector store's `where` clause so only matching
+    documents are searched. If the filtered search finds nothing, it is retried unfiltered.
+    In "hybrid" mode (the default, see Settings.retrieval_mode) the vector ranking is fused
+    with a BM25 ranking, which catches exact names and codes that MiniLM misses.
+
+    Repeated questions are answered from the retrieval cache until the index next changes,
+    and their query vector comes from the embedding cache (see retrieval_cache.py).
+    """
     if not userChatQuery:
         print("User query is empty.")
-        return None
+        return []
 
-    # Ensure embeddings are updated before querying
-    update_embeddings()
+    refresh_index()  # Read-only workers pick up the index writer's latest version
+    mode = mode or settings.retrieval_mode
+    filters = {
+        "collection_name": collection_name,
+        "department_id": department_id,
+        "status": status,
+        "portfolio_id": portfolio_id,
+    }
+    cache_key = retrieval_cache.result_key(userChatQuery, filters, n_results, mode)
+    cached = retrieval_cache.get_results(cache_key)
+    if cached is not None:
+        return cached
 
+    # Embeddings are kept current by the background sync (see embedding_sync.py)
     # Generate query vector and normalize it
-    query_vector = embedding_model.encode(userChatQuery)
-    query_vector = query_vector / norm(query_vector)  # Normalize the vector
+    with span("embedding.encode_query"):
+        query_vector = embedding_batcher.encode(userChatQuery)  # Batched and cached
+        query_vector = query_vector / norm(query_vector)  # Normalize the vector
+
+    hits = _search(userChatQuery, query_vector, n_results, filters, mode)
+
+    if not hits and build_where(**filters) is not None:
+        print(f"No documents matched {build_where(**filters)}, retrying without filters.")
+        hits = _search(userChatQuery, query_vector, n_results, {}, mode)
+
+    if not hits:
+        print("No relevant data found in the vector store.")
+    retrieval_cache.put_results(cache_key, hits)
+    return hits
+
+
+def retrieve_relevant_text(userChatQuery, n_results=10, **filters):
+    """Retrieved documents as text, one metadata dict per paragraph (see retrieve_hits)."""
+    hits = retrieve_hits(userChatQuery, n_results, **filters)
+    if not hits:
+        return None
+    return "\n\n".join(str(hit.metadata) for hit in hits)
+
+
+def _search(userChatQuery, query_vector, n_results, filters, mode) -> List[RetrievalHit]:
+    where = build_where(**filters)
+    # Over-fetch in vector mode too: chunks of one document collapse into a single hit
+    n_candidates = max(n_results, settings.retrieval_candidates) if mode == "hybrid" else 2 * n_results
+
+    # Search the vector store for relevant documents
+    with span("vector_store.query", n_results=n_candidates, filtered=where is not None):
+        results = get_vector_store().query(query_vector, n_candidates, where=where)
+    metadata_by_id = {doc_id: metadata for doc_id, _, metadata in results}
+    vector_parents = _collapse_chunks([(doc_id, similarity) for doc_id, similarity, _ in results])
+
+    if mode != "hybrid":
+        ranked = [(parent_id, score) for parent_id, (score, _) in vector_parents.items()][:n_results]
+        chunks_by_parent = {parent_id: chunks for parent_id, (_, chunks) in vector_parents.items()}
+    else:
+        with span("bm25.search", n_results=n_candidates):
+            lexical_parents = _collapse_chunks(
+                get_bm25_index().search(userChatQuery, n_candidates, filters)
+            )
+        ranked = reciprocal_rank_fusion(
+            [list(vector_parents), list(lexical_parents)], k=settings.retrieval_rrf_k
+        )[:n_results]
+        chunks_by_parent = {}
+        for parents in (vector_parents, lexical_parents):
+            for parent_id, (_, chunks) in parents.items():
+                merged = chunks_by_parent.setdefault(parent_id, [])
+                merged.extend(chunk for chunk in chunks if chunk not in merged)
+
+        # Lexical-only hits were not returned by the vector query
+        missing = [
+            chunk for parent_id, _ in ranked for chunk in chunks_by_parent[parent_id]
+            if chunk not in metadata_by_id
+        ]
+        if missing:
+            with span("vector_store.get", size=len(missing)):
+                fetched = get_vector_store().get(ids=missing)
+            metadata_by_id.update(zip(fetched["ids"], fetched["metadatas"]))
 
-    # Search ChromaDB for relevant documents
-    results = chroma_collection.query(
-        query_embeddings=[query_vector.tolist()],  # Ensure correct format
-        n_results=n_results,
-    )
+    hits = []
+    for parent_id, score in ranked:
+        chunks = [chunk for chunk in chunks_by_parent[parent_id] if chunk in metadata_by_id]
+        if not chunks:
+            continue
+        metadata, matched_fields = _merge_chunks([metadata_by_id[chunk] for chunk in chunks])
+        hits.append(
+            RetrievalHit(
+                id=parent_id,
+                collection=metadata.get("collection_name", "unknown"),
+                score=round(score, 4),
+                metadata=metadata,
+                matched_fields=matched_fields,
+            )
+        )
+    return hits
 
-    if results and results.get("metadatas"):
-        retrieved_data = results["metadatas"]  # List of metadata dicts
 
-        # Combine retrieved documents into readable format
-        context = "\n\n".join([str(doc) for doc in retrieved_data])
+def _collapse_chunks(ranking) -> Dict[str, Tuple[float, List[str]]]:
+    """Groups a best-first (chunk id, score) ranking by parent document, keeping the order and
+    score of each document's best chunk."""
+    parents: Dict[str, Tuple[float, List[str]]] = {}
+    for chunk_id, score in ranking:
+        parent_id = parent_id_of(chunk_id)
+        if parent_id in parents:
+            parents[parent_id][1].append(chunk_id)
+        else:
+            parents[parent_id] = (score, [chunk_id])
+    return parents
 
-        return context  # Return relevant document details
 
-    print("No relevant data found in ChromaDB.")
-    return None
+def _merge_chunks(chunk_metadata: List[dict]) -> Tuple[dict, List[str]]:
+    """Combines the metadata of a document's matching chunks, best chunk first."""
+    if len(chunk_metadata) == 1 and "chunk" not in chunk_metadata[0]:
+        return chunk_metadata[0], []  # Indexed whole
+    metadata, matched_fields = {}, []
+    for meta in chunk_metadata:
+        for key, value in meta.items():
+            if key in ("chunk", "parent_id", "content_hash") or key in metadata:
+                continue
+            metadata[key] = value
+            if key not in HEADER_FIELDS:
+                matched_fields.append(key)
+    return metadata, matched_fields
@@ -1,4 +1,7 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from app.presentation.chat_api import chatRouter
 from app.presentation.project_api import projectApiRouter
 from app.presentation.browser_plugin_api import browserPluginApiRouter
@@ -6,17 +9,107 @@ from app.presentation.program_api import programApiRouter
 from app.presentation.task_api import taskApiRouter
 from app.application.agents.pdf_agent import pdfRouter
 from app.presentation.office_add_in_api import officePluginRouter
+from app.presentation.admin_api import adminRouter
+from app.application.orchestrator.use_cases import agent_registry, intent_router
+from app.core import tracing
+from app.core.config import Settings
+from app.core.readiness import readiness
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
+from app.infrastructure.services.vector.embedding_indexer import embedding_indexer
+from app.infrastructure.services.vector.embedding_registry import embedding_registry
+from app.infrastructure.services.vector.embedding_service import (
+    get_vector_store,
+    persist_vector_store,
+    set_read_only,
+)
+from app.infrastructure.services.vector.embedding_sync import embedding_sync
+from app.infrastructure.services.vector.index_lock import index_lock
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+settings = Settings()
+tracing.configure(settings.tracing_exporters, settings.tracing_ring_size)
+
+
+async def warm_agents():
+    await agent_registry.warmup(settings.agent_warmup)
+
+
+# Heavy subsystems that can be initialized ahead of first use, by name
+WARMUPS = {
+    "embedding_model": embedding_registry.get,
+    "vector_store": get_vector_store,
+    "intent_router": intent_router.load,
+    "agents": warm_agents,
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers elect one index writer; the others serve the index files read-only and reload
+    # them when the writer publishes a new version (see index_lock.py)
+    index_writer = index_lock.try_acquire("server")
+    set_read_only(not index_writer)
+    if not index_writer:
+        print(f"Serving the vector indexes read-only; {index_lock.holder() or 'another process'} writes them")
+    warmups = {name: WARMUPS[name] for name in settings.startup_warmup}
+    if settings.startup_warmup_background:
+        warmup_task = asyncio.create_task(readiness.warm_all(warmups))
+    else:
+        await readiness.warm_all(warmups)
+        warmup_task = None
+    if index_writer:
+        # Keep the vector index current in the background instead of on every query
+        embedding_indexer.start()
+        embedding_sync.start()
+    yield
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    if index_writer:
+        await embedding_sync.stop()
+        await asyncio.to_thread(embedding_indexer.stop)
+        # Flush BM25 and in-memory FAISS/NumPy updates not yet persisted
+        await asyncio.to_thread(persist_vector_store)
+        index_lock.release()
+    await agent_registry.shutdown()
+    # Release pooled LLM connections on shutdown
+    await llm_gateway.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allows all origins
+    allow_origins=settings.cors_allow_origins,
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
 )
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Traces each request and reports its spans in the Server-Timing header.
+
+    Headers are sent before a streamed body is generated, so for streaming responses (no
+    Content-Length) the header only covers the work done before the first byte. Their trace
+    stays open until the body finishes; /chat/query/stream reports the complete timings in a
+    final `timing` event.
+    """
+    with tracing.trace(f"{request.method} {request.url.path}") as current:
+        with tracing.span("request", path=request.url.path):
+            response = await call_next(request)
+        response.headers["Server-Timing"] = current.server_timing()
+    if "content-length" not in response.headers:
+        response.body_iterator = traced_body(current, request.url.path, response.body_iterator)
+    return response
+
+
+async def traced_body(current, path, body_iterator):
+    with tracing.resume(current), tracing.span("response.stream", path=path):
+        async for chunk in body_iterator:
+            yield chunk
+
+
 app.include_router(chatRouter, prefix="/chat", tags=["ChatAPI"])
 app.include_router(
     browserPluginApiRouter, prefix="/browserPlugin", tags=["BrowserPluginAPI"]
@@ -26,6 +119,14 @@ app.include_router(programApiRouter, prefix="/program", tags=["ProgramAPI"])
 app.include_router(taskApiRouter, prefix="/task", tags=["TaskAPI"])
 app.include_router(pdfRouter, prefix="/upload", tags=["UploadAPI"])
 app.include_router(officePluginRouter, prefix="/officeAddins", tags=["MsOfficeAPI"])
+app.include_router(adminRouter, prefix="/admin", tags=["AdminAPI"])
+
+@app.get("/ready")
+def read_ready():
+    """200 once every startup warm-up finished, 503 (with per-subsystem status) before."""
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import secrets
+from typing import Optional
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException
+from app.application.agents.retrieval_context import retrieval_context_builder
+from app.application.orchestrator.use_cases import chat_flight, context_packer
+from app.core import tracing
+from app.infrastructure.services.llm.llm_gateway import llm_gateway
+from app.infrastructure.services.vector.bulk_reindex import bulk_reindexer
+from app.infrastructure.services.vector.embedding_batcher import embedding_batcher
+from app.infrastructure.services.vector.embedding_indexer import embedding_indexer
+from app.infrastructure.services.vector.embedding_service import bm25_index
+from app.infrastructure.services.vector.embedding_sync import embedding_sync
+from app.infrastructure.services.vector.hnsw_tuning import hnsw_tuner
+from app.infrastructure.services.vector.index_lock import index_lock
+from app.infrastructure.services.vector.retrieval_cache import retrieval_cache
+
+load_dotenv()
+
+# Endpoints that rewrite or rebuild the indexes need this in the X-Admin-Token header;
+# without it configured they are disabled
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+app = FastAPI()
+adminRouter = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin write endpoints are disabled; set ADMIN_API_TOKEN.")
+    if not secrets.compare_digest(x_admin_token or "", ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-Admin-Token.")
+
+
+def require_index_writer():
+    # Only the worker that won the index lock may write the indexes (see index_lock.py)
+    if not index_lock.held:
+        raise HTTPException(
+            status_code=409,
+            detail=f"This worker serves the indexes read-only; retry until the index writer "
+            f"({index_lock.holder() or 'unknown'}) handles the request.",
+        )
+
+
+@adminRouter.get("/llm/cache")
+async def get_llm_cache_stats():
+    return llm_gateway.cache.stats()
+
+
+@adminRouter.get("/chat/coalescing")
+async def get_chat_coalescing_stats():
+    return chat_flight.stats()
+
+
+@adminRouter.get("/chat/context")
+async def get_context_packing_stats():
+    return context_packer.stats()
+
+
+@adminRouter.get("/embeddings/sync")
+async def get_embedding_sync_stats():
+    return embedding_sync.stats()
+
+
+@adminRouter.post("/embeddings/sync", dependencies=[Depends(require_admin), Depends(require_index_writer)])
+async def run_embedding_sync():
+    indexed = await asyncio.to_thread(embedding_sync.sync_once)
+    return {"indexed": indexed}
+
+
+@adminRouter.post("/embeddings/reconcile", dependencies=[Depends(require_admin), Depends(require_index_writer)])
+async def run_embedding_reconcile():
+    return await asyncio.to_thread(embedding_sync.reconcile)
+
+
+@adminRouter.get("/indexer")
+async def get_embedding_indexer_stats():
+    return embedding_indexer.stats()
+
+
+@adminRouter.get("/embeddings/batching")
+async def get_embedding_batching_stats():
+    return embedding_batcher.stats()
+
+
+@adminRouter.get("/embeddings/reindex")
+async def get_reindex_progress():
+    return bulk_reindexer.progress
+
+
+@adminRouter.post("/embeddings/reindex", dependencies=[Depends(require_admin), Depends(require_index_writer)])
+async def start_reindex(workers: Optional[int] = None, batchSize: int = 256, fresh: bool = False):
+    started = bulk_reindexer.start(workers=workers, batch_size=batchSize, fresh=fresh)
+    if not started:
+        return {"message": "A reindex is already running.", "progress": bulk_reindexer.progress}
+    return {"message": "Reindex started.", "progress": bulk_reindexer.progress}
+
+
+@adminRouter.get("/embeddings/hnsw")
+async def get_hnsw_tuning_status():
+    return {"progress": hnsw_tuner.progress, "last_sweep": hnsw_tuner.last_sweep}
+
+
+@adminRouter.post("/embeddings/hnsw/sweep", dependencies=[Depends(require_admin), Depends(require_index_writer)])
+async def start_hnsw_sweep(
+    m: str = "8,16,32",
+    constructionEf: str = "100,200",
+    searchEf: str = "10,50,100,200",
+    queries: int = 200,
+    minRecall: float = 0.95,
+):
+    started = hnsw_tuner.start(
+        "sweep",
+        m_values=[int(value) for value in m.split(",")],
+        construction_ef_values=[int(value) for value in constructionEf.split(",")],
+        search_ef_values=[int(value) for value in searchEf.split(",")],
+        queries=queries,
+        min_recall=minRecall,
+    )
+    if not started:
+        return {"message": "HNSW tuning is already running.", "progress": hnsw_tuner.progress}
+    return {"message": "HNSW sweep started.", "progress": hnsw_tuner.progress}
+
+
+@adminRouter.post("/embeddings/hnsw/compact", dependencies=[Depends(require_admin), Depends(require_index_writer)])
+async def start_hnsw_compaction(
+    m: Optional[int] = None, constructionEf: Optional[int] = None, searchEf: Optional[int] = None
+):
+    started = hnsw_tuner.start("compact", m=m, construction_ef=constructionEf, search_ef=searchEf)
+    if not started:
+        return {"message": "HNSW tuning is already running.", "progress": hnsw_tuner.progress}
+    return {"message": "Compaction started.", "progress": hnsw_tuner.progress}
+
+
+@adminRouter.get("/embeddings/bm25")
+async def get_bm25_index_stats():
+    return bm25_index.stats()
+
+
+@adminRouter.get("/chat/retrieval")
+async def get_retrieval_context_stats():
+    return retrieval_context_builder.stats()
+
+
+@adminRouter.get("/retrieval/cache")
+async def get_retrieval_cache_stats():
+    return retrieval_cache.stats()
+
+
+@adminRouter.delete("/retrieval/cache", dependencies=[Depends(require_admin)])
+async def clear_retrieval_cache():
+    retrieval_cache.clear()
+    return retrieval_cache.stats()
+
+
+@adminRouter.get("/traces")
+async def get_recent_spans(limit: int = 100, minDurationMs: float = 0.0):
+    ring_buffer = tracing.ring_buffer()
+    if ring_buffer is None:
+        return {"spans": [], "message": "Ring buffer exporter is not enabled."}
+    return {"spans": ring_buffer.recent(limit, minDurationMs)}
+
+
+app.include_router(adminRouter)
@@ -2,7 +2,7 @@ from fastapi import FastAPI, APIRouter
 from pydantic import BaseModel
 from typing import Optional
 
-from app.application.orchestrator.use_cases import Orchestrator
+from app.application.orchestrator.use_cases import route_query_coalesced
 
 app = FastAPI()
 browserPluginApiRouter = APIRouter()
@@ -13,6 +13,7 @@ class BrowserRequest(BaseModel):
     action: str
     content: str
     userQuestion: Optional[str] = None
+    sessionId: Optional[str] = None
 
 
 @browserPluginApiRouter.post("/v1/webHelper")
@@ -22,8 +23,9 @@ async def handle_browser_request(request: BrowserRequest):
     )
     # Process user query using Orchestrator if userQuestion is provided
     if request.userQuestion:
-        orchestrator = Orchestrator(userChatQuery=request.userQuestion)
-        response = await orchestrator.route_query()
+        response = await route_query_coalesced(
+            request.userQuestion, sessionId=request.sessionId
+        )
     else:
         response = "No user question provided."
 
@@ -1,5 +1,9 @@
+import json
+from typing import Literal, Optional
 from fastapi import FastAPI, APIRouter
-from app.application.orchestrator.use_cases import Orchestrator
+from fastapi.responses import StreamingResponse
+from app.application.orchestrator.use_cases import Orchestrator, route_query_coalesced
+from app.core import tracing
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,14 +13,51 @@ chatRouter = APIRouter()
 
 
 @chatRouter.get("/query")
-async def query_handler(userChatQuery: str):
+async def query_handler(userChatQuery: str, sessionId: Optional[str] = None):
 
-    # Process user query using Orchestrator
-    orchestrator = Orchestrator(userChatQuery)
-    response = await orchestrator.route_query()
+    # Process user query using Orchestrator, coalescing identical concurrent requests
+    response = await route_query_coalesced(userChatQuery, sessionId=sessionId)
     return {
         "response": response,
     }
 
 
+@chatRouter.get("/query/stream")
+async def stream_query_handler(
+    userChatQuery: str,
+    sessionId: Optional[str] = None,
+    format: Literal["sse", "ndjson"] = "sse",
+):
+    """Streams the routing decision followed by the agent's tokens as they are generated.
+
+    The last event, `timing`, carries the Server-Timing entries of the whole request; the
+    Server-Timing header was sent before generation started and lacks the streaming stages.
+    """
+    orchestrator = Orchestrator(userChatQuery, sessionId=sessionId)
+
+    async def timed_events():
+        async for event, payload in orchestrator.stream_route_query():
+            yield event, payload
+        current = tracing.current_trace()
+        if current is not None:
+            yield "timing", {"serverTiming": current.server_timing()}
+
+    async def sse_events():
+        async for event, payload in timed_events():
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    async def ndjson_events():
+        async for event, payload in timed_events():
+            yield json.dumps({"event": event, **payload}) + "\n"
+
+    if format == "ndjson":
+        return StreamingResponse(ndjson_events(), media_type="application/x-ndjson")
+
+    return StreamingResponse(
+        sse_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 app.include_router(chatRouter)
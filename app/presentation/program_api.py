@@ -4,6 +4,7 @@ from typing import Dict
 from app.domain.projectApis.program_service_mongo_implementation import (
     ProgramServiceMongoImplementation,
 )
+from app.infrastructure.services.vector.embedding_indexer import embedding_indexer
 
 app = FastAPI()
 programApiRouter = APIRouter()
@@ -25,7 +26,9 @@ async def create_program(program_data: Dict):
     if len(program_data) == 1 and isinstance(next(iter(program_data.values())), dict):
         program_data = next(iter(program_data.values()))
 
-    return await program_service.CreateProgram(program_data)
+    created = await program_service.CreateProgram(program_data)
+    embedding_indexer.enqueue("programs", created["program"]["_id"])  # Embedded in the background
+    return created
 
 
 @programApiRouter.get("/program/portfolios")
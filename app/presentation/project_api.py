@@ -3,6 +3,7 @@ from typing import Dict
 from app.domain.projectApis.project_service_mongo_implementation import (
     ProjectServiceMongoImplementation,
 )
+from app.infrastructure.services.vector.embedding_indexer import embedding_indexer
 
 app = FastAPI()
 projectApiRouter = APIRouter()
@@ -21,7 +22,9 @@ async def create_project(project_data: Dict):
     if len(project_data) == 1 and isinstance(next(iter(project_data.values())), dict):
         project_data = next(iter(project_data.values()))
 
-    return await project_service.CreateProject(project_data)
+    project = await project_service.CreateProject(project_data)
+    embedding_indexer.enqueue("projects", project["_id"])  # Embedded in the background
+    return project
 
 
 @projectApiRouter.get("/projects/programs")
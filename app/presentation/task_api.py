@@ -3,6 +3,7 @@ from typing import Dict
 from app.domain.projectApis.task_service_mongo_implementaion import (
     taskServiceMongoImplementation,
 )
+from app.infrastructure.services.vector.embedding_indexer import embedding_indexer
 
 app = FastAPI()
 taskApiRouter = APIRouter()
@@ -21,4 +22,6 @@ async def create_tasks(task_data: Dict):
     if len(task_data) == 1 and isinstance(next(iter(task_data.values())), dict):
         task_data = next(iter(task_data.values()))
 
-    return await tasks_service.CreateTasks(task_data)
+    task = await tasks_service.CreateTasks(task_data)
+    embedding_indexer.enqueue("tasks", task["_id"])  # Embedded in the background
+    return task
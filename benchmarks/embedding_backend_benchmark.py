@@ -0,0 +1,108 @@
+"""Checks the quantized ONNX embedding backend against PyTorch and compares their speed.
+
+Usage:
+    python -m benchmarks.embedding_backend_benchmark [--from-mongo N] [--min-cosine 0.98]
+
+Parity: both backends encode the same texts and the cosine similarity between each pair
+of vectors is reported; the script exits non-zero when any pair falls below --min-cosine.
+Speed: batch throughput (texts/s) over the full set and single-text latency.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from app.core.config import Settings
+from app.core.stats import percentile
+from app.infrastructure.services.vector.embedding_backends import OnnxInt8Backend, TorchBackend
+
+BENCHMARK_DIR = os.path.dirname(__file__)
+EXEMPLARS_FILE = os.path.join(
+    BENCHMARK_DIR, "..", "app", "application", "orchestrator", "routing_exemplars.json"
+)
+
+
+def load_texts(from_mongo):
+    """Short queries from the routing sets, plus indexed-document texts when requested."""
+    with open(os.path.join(BENCHMARK_DIR, "routing_eval_set.json"), encoding="utf-8") as f:
+        texts = [sample["query"] for sample in json.load(f)]
+    with open(EXEMPLARS_FILE, encoding="utf-8") as f:
+        for examples in json.load(f).values():
+            texts.extend(examples)
+
+    if from_mongo:
+        from app.infrastructure.services.vector.embedding_service import db, prepare_chunks
+
+        documents = db.get_all_data()[:from_mongo]
+        texts.extend(text for doc in documents for _, text, _ in prepare_chunks(doc))
+    return texts
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def check_parity(reference, candidate, texts, min_cosine):
+    cosines = np.sum(normalize(reference.encode(texts)) * normalize(candidate.encode(texts)), axis=1)
+    worst = int(np.argmin(cosines))
+    print("\nParity (cosine, torch vs onnx_int8)")
+    print(f"  mean          : {cosines.mean():.4f}")
+    print(f"  min           : {cosines.min():.4f}  ({texts[worst][:60]!r})")
+    print(f"  below {min_cosine:<8}: {int((cosines < min_cosine).sum())}/{len(texts)}")
+    return bool(cosines.min() >= min_cosine)
+
+
+def benchmark(backend, texts, batch_size, latency_samples):
+    backend.encode(texts[:batch_size], batch_size=batch_size)  # Warm up
+
+    start = time.perf_counter()
+    backend.encode(texts, batch_size=batch_size)
+    throughput = len(texts) / (time.perf_counter() - start)
+
+    latencies = []
+    for text in texts[:latency_samples]:
+        start = time.perf_counter()
+        backend.encode(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"\n{backend.name}")
+    print(f"  throughput    : {throughput:.1f} texts/s (batch {batch_size})")
+    print(f"  latency mean  : {statistics.mean(latencies):.2f} ms")
+    print(f"  latency p50   : {percentile(latencies, 50):.2f} ms")
+    print(f"  latency p95   : {percentile(latencies, 95):.2f} ms")
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=settings.embedding_model_name)
+    parser.add_argument("--onnx-file", default=settings.embedding_onnx_file)
+    parser.add_argument("--from-mongo", type=int, default=0, help="Add N documents from MongoDB")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--latency-samples", type=int, default=50)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+
+    texts = load_texts(args.from_mongo)
+    print(f"Loaded {len(texts)} texts")
+
+    torch_backend = TorchBackend(args.model)
+    onnx_backend = OnnxInt8Backend(args.model, args.onnx_file)
+
+    parity_ok = check_parity(torch_backend, onnx_backend, texts, args.min_cosine)
+    benchmark(torch_backend, texts, args.batch_size, args.latency_samples)
+    benchmark(onnx_backend, texts, args.batch_size, args.latency_samples)
+
+    if not parity_ok:
+        print(f"\nFAIL: onnx_int8 vectors diverge from torch below cosine {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
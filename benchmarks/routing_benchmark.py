@@ -0,0 +1,88 @@
+"""Compares the local embedding router against LLM routing on a labelled query set.
+
+Usage:
+    python -m benchmarks.routing_benchmark [--skip-llm] [--eval-file PATH]
+
+Reports accuracy, coverage (share of queries the local router answered without
+falling back) and per-query latency for both routing paths.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from app.application.orchestrator.use_cases import Orchestrator, intent_router
+from app.core.stats import percentile
+
+EVAL_FILE = os.path.join(os.path.dirname(__file__), "routing_eval_set.json")
+
+
+def report(name, latencies_ms, correct, total, answered=None):
+    print(f"\n{name}")
+    print(f"  accuracy      : {correct}/{total} ({correct / total:.1%})")
+    if answered is not None:
+        print(f"  coverage      : {answered}/{total} ({answered / total:.1%})")
+    print(f"  latency mean  : {statistics.mean(latencies_ms):.1f} ms")
+    print(f"  latency p50   : {percentile(latencies_ms, 50):.1f} ms")
+    print(f"  latency p95   : {percentile(latencies_ms, 95):.1f} ms")
+
+
+def benchmark_local(samples):
+    intent_router.load()  # Keep exemplar embedding out of the timings
+
+    latencies, correct, answered, confident_correct = [], 0, 0, 0
+    for sample in samples:
+        start = time.perf_counter()
+        best_label = intent_router.scores(sample["query"])[0][0]
+        decision = intent_router.classify(sample["query"])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        correct += best_label == sample["agent"]
+        if decision:
+            answered += 1
+            confident_correct += decision == sample["agent"]
+
+    report("Local embedding router (top-1)", latencies, correct, len(samples), answered)
+    if answered:
+        print(
+            f"  accuracy when confident: {confident_correct}/{answered} "
+            f"({confident_correct / answered:.1%})"
+        )
+
+
+async def benchmark_llm(samples):
+    latencies, correct = [], 0
+    for sample in samples:
+        orchestrator = Orchestrator(sample["query"])
+        start = time.perf_counter()
+        try:
+            decision = await orchestrator.classify_chunk(sample["query"], "")
+        except Exception as e:
+            print(f"LLM routing failed for {sample['query']!r}: {e}")
+            decision = None
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += decision == sample["agent"]
+
+    report("LLM routing (llama-3.3-70b-versatile)", latencies, correct, len(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--eval-file", default=EVAL_FILE)
+    parser.add_argument("--skip-llm", action="store_true", help="Only run the local router")
+    args = parser.parse_args()
+
+    with open(args.eval_file, encoding="utf-8") as f:
+        samples = json.load(f)
+
+    print(f"Loaded {len(samples)} labelled queries from {args.eval_file}")
+    benchmark_local(samples)
+    if not args.skip_llm:
+        asyncio.run(benchmark_llm(samples))
+
+
+if __name__ == "__main__":
+    main()
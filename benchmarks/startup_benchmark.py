@@ -0,0 +1,115 @@
+"""Measures application cold start: import time of app.main and time until /ready.
+
+Usage:
+    python -m benchmarks.startup_benchmark [--runs 5] [--top 15] [--serve] [--port 8765]
+
+Import time is measured in fresh interpreters, so nothing is cached between runs.
+--top lists the slowest modules from `python -X importtime`. --serve starts uvicorn and
+reports how long it takes to accept requests (GET /) and to become warm (GET /ready == 200).
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), "..")
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def measure_imports(runs):
+    durations = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip().splitlines()[-1]
+        durations.append(float(output) * 1000)
+
+    print(f"\nimport app.main ({runs} fresh interpreters)")
+    print(f"  mean          : {statistics.mean(durations):.0f} ms")
+    print(f"  min / max     : {min(durations):.0f} / {max(durations):.0f} ms")
+
+
+def slowest_imports(top):
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        if not module.startswith("  "):  # Top-level imports only, children are included
+            rows.append((int(cumulative), module.strip()))
+
+    print("\nSlowest top-level imports (cumulative)")
+    for cumulative, module in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+
+def wait_for(url, deadline, expect_status=200):
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == expect_status:
+                    return True
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def measure_serve(port, timeout):
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        base = f"http://127.0.0.1:{port}"
+        accepting = wait_for(f"{base}/", deadline)
+        accepting_at = time.monotonic() - started
+        ready = accepting and wait_for(f"{base}/ready", deadline)
+        ready_at = time.monotonic() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    print("\nuvicorn app.main:app")
+    print(f"  accepting     : {accepting_at:.2f} s" if accepting else "  accepting     : timed out")
+    print(f"  ready         : {ready_at:.2f} s" if ready else "  ready         : timed out")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--serve", action="store_true", help="Also time uvicorn until /ready")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    measure_imports(args.runs)
+    slowest_imports(args.top)
+    if args.serve:
+        measure_serve(args.port, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Compares the vector store backends on synthetic project data at increasing scale.
+
+Usage:
+    python -m benchmarks.vector_store_benchmark [--scales 10000 100000 1000000]
+        [--backends chroma numpy faiss_flat faiss_hnsw faiss_ivf] [--queries 200] [--encode]
+
+Each backend is built from the same synthetic documents (projects, tasks, risks, ... spread
+over departments and statuses) and reports build time, unfiltered query latency p50/p99,
+recall@10 against exact search, p50 of a collection-filtered query and resident memory
+growth. Vectors are clustered 384-d stand-ins for MiniLM embeddings so 1M documents can be
+generated in seconds; --encode embeds the synthetic texts with the configured model instead
+(only practical at the smaller scales). Stores are built in temporary directories.
+"""
+
+import argparse
+import gc
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config import Settings
+from app.core.stats import percentile
+from app.infrastructure.services.vector.vector_backends import (
+    ChromaVectorStore,
+    FaissVectorStore,
+    NumpyVectorStore,
+)
+
+COLLECTIONS = ("projects", "programs", "tasks", "risks", "stakeholders", "issue_tracking")
+STATUSES = ("Active", "Planned", "On Hold", "Completed", "Cancelled")
+TOPICS = (
+    "road resurfacing", "water main replacement", "school renovation", "park upgrade",
+    "library expansion", "stormwater drainage", "bridge inspection", "street lighting",
+    "community centre", "bus shelter", "waste collection", "flood defence",
+)
+
+
+def rss_mb():
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def synthetic_documents(count, seed=0):
+    rng = np.random.default_rng(seed)
+    ids, texts, metadata = [], [], []
+    for i in range(count):
+        collection = COLLECTIONS[rng.integers(len(COLLECTIONS))]
+        topic = TOPICS[rng.integers(len(TOPICS))]
+        meta = {
+            "_id": f"{i:024x}",
+            "collection_name": collection,
+            "name": f"{topic.title()} {i}",
+            "status": STATUSES[rng.integers(len(STATUSES))],
+            "department_id": f"dept-{rng.integers(20)}",
+            "total_budget": int(rng.integers(10_000, 5_000_000)),
+        }
+        ids.append(meta["_id"])
+        texts.append(" ".join(f"{k}: {v}" for k, v in meta.items()))
+        metadata.append(meta)
+    return ids, texts, metadata
+
+
+def synthetic_vectors(count, dimension, seed=0):
+    """Documents scattered around topic centroids, like real embeddings cluster by subject."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((256, dimension)).astype(np.float32)
+    vectors = np.empty((count, dimension), dtype=np.float32)
+    for start in range(0, count, 100_000):
+        end = min(count, start + 100_000)
+        assignments = rng.integers(len(centroids), size=end - start)
+        vectors[start:end] = centroids[assignments] + 0.35 * rng.standard_normal(
+            (end - start, dimension)
+        ).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors, queries, k):
+    """Ground truth row indices by brute-force inner product, in chunks to bound memory."""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, len(vectors), 200_000):
+        chunk = vectors[start:start + 200_000]
+        scores = np.concatenate([best_scores, queries @ chunk.T], axis=1)
+        chunk_rows = np.broadcast_to(np.arange(start, start + len(chunk)), (len(queries), len(chunk)))
+        rows = np.concatenate([best_rows, chunk_rows], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_rows = np.take_along_axis(rows, top, axis=1)
+    return best_rows
+
+
+def create_store(backend, path, settings):
+    if backend == "chroma":
+        return ChromaVectorStore(path, "benchmark")
+    if backend == "numpy":
+        return NumpyVectorStore(path)
+    return FaissVectorStore(
+        path,
+        index_type=backend.split("_", 1)[1],
+        hnsw_m=settings.faiss_hnsw_m,
+        hnsw_ef_search=settings.faiss_hnsw_ef_search,
+        hnsw_ef_construction=settings.faiss_hnsw_ef_construction,
+        ivf_nlist=settings.faiss_ivf_nlist,
+        ivf_nprobe=settings.faiss_ivf_nprobe,
+    )
+
+
+def run_backend(backend, settings, ids, texts, metadata, vectors, queries, truth, batch_size):
+    path = tempfile.mkdtemp(prefix=f"vector-bench-{backend}-")
+    gc.collect()
+    memory_before = rss_mb()
+    try:
+        store = create_store(backend, path, settings)
+        start = time.perf_counter()
+        for offset in range(0, len(ids), batch_size):
+            end = offset + batch_size
+            store.upsert(ids[offset:end], vectors[offset:end], metadata[offset:end], texts[offset:end])
+        if backend != "chroma":
+            store.query(queries[0], 10)  # Lazy IVF training / first-query setup counts as build
+        build_seconds = time.perf_counter() - start
+        memory = rss_mb() - memory_before
+
+        latencies, recalls = [], []
+        row_of = {doc_id: row for row, doc_id in enumerate(ids)}
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            results = store.query(query, 10)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found = {row_of[doc_id] for doc_id, _, _ in results}
+            recalls.append(len(found & set(expected.tolist())) / len(expected))
+
+        filtered = []
+        for i, query in enumerate(queries[:50]):
+            where = {"collection_name": COLLECTIONS[i % len(COLLECTIONS)]}
+            start = time.perf_counter()
+            store.query(query, 10, where=where)
+            filtered.append((time.perf_counter() - start) * 1000)
+
+        return {
+            "build_s": build_seconds,
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "recall": float(np.mean(recalls)),
+            "filtered_p50_ms": percentile(filtered, 50),
+            "memory_mb": memory,
+        }
+    finally:
+        store = None
+        gc.collect()
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["chroma", "numpy", "faiss_flat", "faiss_hnsw", "faiss_ivf"],
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Documents per upsert")
+    parser.add_argument("--encode", action="store_true", help="Embed texts with the real model")
+    args = parser.parse_args()
+
+    print(
+        f"{'docs':>9}  {'backend':<11} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'recall@10':>9} {'filt p50':>9} {'mem MB':>8}"
+    )
+    for scale in args.scales:
+        ids, texts, metadata = synthetic_documents(scale)
+        if args.encode:
+            from app.infrastructure.services.vector.embedding_registry import embedding_registry
+
+            model = embedding_registry.get()
+            vectors = np.asarray(model.encode(texts, batch_size=256), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            questions = [f"status of {topic} {i}" for i, topic in enumerate(TOPICS * args.queries)]
+            queries = np.asarray(model.encode(questions[: args.queries]), dtype=np.float32)
+        else:
+            vectors = synthetic_vectors(scale, args.dimension)
+            # Queries near (not on) stored documents, like a question about a known project
+            rng = np.random.default_rng(1)
+            queries = vectors[rng.integers(scale, size=args.queries)] + 0.3 * rng.standard_normal(
+                (args.queries, args.dimension)
+            ).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        truth = exact_top_k(vectors, queries, 10)
+
+        for backend in args.backends:
+            result = run_backend(
+                backend, settings, ids, texts, metadata, vectors, queries, truth, args.batch_size
+            )
+            print(
+                f"{scale:>9}  {backend:<11} {result['build_s']:>8.1f} {result['p50_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {result['recall']:>9.3f} "
+                f"{result['filtered_p50_ms']:>9.2f} {result['memory_mb']:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
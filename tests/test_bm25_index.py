@@ -0,0 +1,38 @@
+import os
+
+from app.infrastructure.services.vector.bm25_index import BM25Index
+
+
+def test_save_writes_only_when_dirty(tmp_path):
+    path = str(tmp_path / "bm25.json")
+    index = BM25Index(path, save_interval=3600)
+    index.upsert_many(["a"], ["road resurfacing"], [{"status": "Active"}])
+
+    index.save()
+    modified = os.stat(path).st_mtime_ns
+    os.utime(path, ns=(0, 0))
+    index.save()  # Nothing changed since the last save
+
+    assert os.stat(path).st_mtime_ns == 0 != modified
+    assert BM25Index(path).search("road")[0][0] == "a"
+
+
+def test_ids_follow_upserts_and_deletes(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.json"))
+    index.upsert_many(["a", "b"], ["road", "bridge"], [{}, {}])
+    index.delete_many(["a"])
+
+    assert index.ids() == {"b"}
+
+
+def test_reload_picks_up_another_writers_save(tmp_path):
+    path = str(tmp_path / "bm25.json")
+    reader = BM25Index(path)
+    assert reader.search("road") == []
+
+    writer = BM25Index(path)
+    writer.upsert_many(["a"], ["road resurfacing"], [{}])
+    writer.save()
+    reader.reload()
+
+    assert reader.search("road")[0][0] == "a"
@@ -0,0 +1,41 @@
+from app.infrastructure.services.vector.document_chunker import DocumentChunker
+
+PROJECT_ID = "64b7f0c2a1d3e4f5a6b7c8d9"
+
+
+def wordpieces(text):
+    # Stand-in for a tokenizer: long words cost several pieces, like WordPiece splits them
+    return sum(-(-len(word) // 4) for word in text.split())
+
+
+def project(description_words=0):
+    return {
+        "_id": PROJECT_ID,
+        "collection_name": "projects",
+        "name": "Bridge Inspection",
+        "status": "Active",
+        "department_id": "64b7f0c2a1d3e4f5a6b7c8da",
+        "description": " ".join(["inspection"] * description_words),
+        "total_budget": 250000,
+    }
+
+
+def test_object_ids_stay_in_metadata_only():
+    chunks = DocumentChunker().chunk(PROJECT_ID, project(5))
+
+    assert len(chunks) == 1
+    assert PROJECT_ID not in chunks[0].text
+    assert "64b7f0c2a1d3e4f5a6b7c8da" not in chunks[0].text
+    assert chunks[0].metadata["department_id"] == "64b7f0c2a1d3e4f5a6b7c8da"
+
+
+def test_chunks_fit_the_token_counter():
+    chunker = DocumentChunker(max_tokens=64, count_tokens=wordpieces)
+    chunks = chunker.chunk(PROJECT_ID, project(200))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert wordpieces(chunk.text) + 2 <= 64
+        assert PROJECT_ID not in chunk.text
+        assert chunk.metadata["_id"] == PROJECT_ID
+        assert chunk.metadata["parent_id"] == PROJECT_ID
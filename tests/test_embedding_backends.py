@@ -0,0 +1,28 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum")
+
+from app.core.config import Settings
+from app.infrastructure.services.vector.embedding_backends import OnnxInt8Backend, TorchBackend
+
+TEXTS = [
+    "collection_name: projects name: Bridge Inspection status: Active",
+    "What is the total budget of the school renovation project?",
+    "risk_description: Contractor delays on the water main replacement impact: High",
+    "Which tasks are pending review in the Parks department?",
+]
+
+
+def test_onnx_int8_matches_torch():
+    settings = Settings()
+    torch_vectors = TorchBackend(settings.embedding_model_name).encode(TEXTS)
+    onnx_vectors = OnnxInt8Backend(settings.embedding_model_name, settings.embedding_onnx_file).encode(TEXTS)
+
+    assert onnx_vectors.shape == torch_vectors.shape
+    similarity = np.sum(torch_vectors * onnx_vectors, axis=1) / (
+        np.linalg.norm(torch_vectors, axis=1) * np.linalg.norm(onnx_vectors, axis=1)
+    )
+    assert similarity.min() > 0.98  # Quantization error, not a different embedding space
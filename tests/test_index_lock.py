@@ -0,0 +1,32 @@
+import pytest
+
+from app.infrastructure.services.vector.index_lock import IndexLock, IndexLockedError
+
+
+def test_second_index_writer_is_refused(tmp_path):
+    path = str(tmp_path / "index.lock")
+    server = IndexLock(path)
+    server.acquire("server")
+    try:
+        with pytest.raises(IndexLockedError, match="server"):
+            IndexLock(path).acquire("bulk_reindex")
+    finally:
+        server.release()
+
+    reindex = IndexLock(path)
+    reindex.acquire("bulk_reindex")  # Free again once the server let go
+    reindex.release()
+
+
+def test_only_one_worker_is_elected_writer(tmp_path):
+    path = str(tmp_path / "index.lock")
+    first, second = IndexLock(path), IndexLock(path)
+
+    assert first.try_acquire("server")
+    assert not second.try_acquire("server")
+    assert first.held and not second.held
+    assert second.holder().startswith("server (pid ")
+
+    first.release()
+    assert second.try_acquire("server")
+    second.release()
@@ -0,0 +1,58 @@
+import time
+
+from app.infrastructure.services.llm.llm_cache import LLMResponseCache
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    cache = LLMResponseCache(max_entries=8)
+    cache.set("k", "answer", ttl=60)
+    assert cache.get("k") == "answer"
+
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+
+    assert cache.get("k") is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LLMResponseCache(max_entries=2)
+    cache.set("a", "1", ttl=60)
+    cache.set("b", "2", ttl=60)
+    cache.get("a")  # Now "b" is the least recently used
+    cache.set("c", "3", ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_sqlite_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    LLMResponseCache(max_entries=8, sqlite_path=path).set("k", "answer", ttl=60)
+
+    restarted = LLMResponseCache(max_entries=8, sqlite_path=path)
+
+    assert restarted.get("k") == "answer"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("k") == "answer"  # Promoted to the memory tier
+    assert restarted.stats()["memory_hits"] == 1
+
+
+def test_expired_sqlite_entries_are_not_served(tmp_path, monkeypatch):
+    path = str(tmp_path / "llm_cache.db")
+    LLMResponseCache(max_entries=8, sqlite_path=path).set("k", "answer", ttl=60)
+
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+
+    assert LLMResponseCache(max_entries=8, sqlite_path=path).get("k") is None
+
+
+def test_keys_depend_on_model_messages_and_params():
+    messages = [{"role": "user", "content": "hi"}]
+    key = LLMResponseCache.make_key("m", messages, {"temperature": 0})
+
+    assert key == LLMResponseCache.make_key("m", [dict(messages[0])], {"temperature": 0})
+    assert key != LLMResponseCache.make_key("other", messages, {"temperature": 0})
+    assert key != LLMResponseCache.make_key("m", messages, {"temperature": 0, "max_tokens": 5})
@@ -0,0 +1,116 @@
+import asyncio
+import types
+
+import pytest
+
+groq = pytest.importorskip("groq")
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from app.core.config import Settings
+from app.infrastructure.services.llm import llm_gateway as gateway_module
+from app.infrastructure.services.llm.llm_gateway import LLMGateway
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def completion(content, total_tokens=10):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": total_tokens - 1, "total_tokens": total_tokens},
+    }
+
+
+def make_gateway(handler, **overrides):
+    settings = Settings()
+    settings.llm_cache_sqlite_path = None
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    gateway = LLMGateway(settings)
+    gateway._client = groq.AsyncClient(
+        api_key="test",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        max_retries=0,
+    )
+    return gateway
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock that only moves when the gateway sleeps, recording each sleep."""
+    state = types.SimpleNamespace(now=1000.0, slept=[])
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, result=None):
+        state.slept.append(delay)
+        state.now += delay
+        return await real_sleep(0, result)
+
+    monkeypatch.setattr(gateway_module, "time", types.SimpleNamespace(monotonic=lambda: state.now))
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return state
+
+
+def test_rate_limited_call_is_retried_after_retry_after(clock):
+    statuses = [429, 200]
+
+    def handler(request):
+        if statuses.pop(0) == 429:
+            return httpx.Response(429, headers={"retry-after": "2"}, json={"error": {"message": "slow down"}})
+        return httpx.Response(200, json=completion("hello"))
+
+    gateway = make_gateway(handler)
+
+    assert asyncio.run(gateway.chat("test-model", MESSAGES)) == "hello"
+    assert statuses == []
+    assert 2.0 in clock.slept
+
+
+def test_rate_limit_error_surfaces_after_the_last_retry(clock):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(429, json={"error": {"message": "slow down"}})
+
+    gateway = make_gateway(handler, llm_max_retries=2)
+
+    with pytest.raises(groq.RateLimitError):
+        asyncio.run(gateway.chat("test-model", MESSAGES))
+    assert len(calls) == 3
+
+
+def test_requests_per_minute_are_paced(clock):
+    gateway = make_gateway(
+        lambda request: httpx.Response(200, json=completion("ok")), llm_requests_per_minute=2
+    )
+
+    async def main():
+        for _ in range(3):
+            await gateway.chat("test-model", MESSAGES)
+
+    asyncio.run(main())
+    # Two requests fit in the bucket; the third waits for one to refill (60s / 2)
+    assert sum(clock.slept) == pytest.approx(30.0)
+
+
+def test_tokens_per_minute_charge_the_real_usage(clock):
+    # Estimated at 500 tokens (max_tokens) but billed at 900
+    gateway = make_gateway(
+        lambda request: httpx.Response(200, json=completion("ok", total_tokens=900)),
+        llm_tokens_per_minute=1000,
+    )
+
+    async def main():
+        for _ in range(2):
+            await gateway.chat("test-model", MESSAGES, max_tokens=500)
+
+    asyncio.run(main())
+    # 100 tokens left after the first call; 400 more refill at 1000/min in 24s
+    assert sum(clock.slept) == pytest.approx(24.0)
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+pytest.importorskip("tiktoken")
+
+from app.application.orchestrator import memory_store
+from app.application.orchestrator.memory_store import SessionMemoryStore
+from app.infrastructure.db.sqlite_memory import SQLiteMemoryBackend
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # One token per word keeps budgets readable and avoids loading the BPE ranks
+    monkeypatch.setattr(memory_store, "count_tokens", lambda text: len(text.split()))
+
+
+def make_store(backend=None, token_budget=100, max_sessions=10, idle_ttl=3600.0):
+    return SessionMemoryStore(token_budget, max_sessions, idle_ttl, backend=backend)
+
+
+def test_window_drops_oldest_turns_over_the_token_budget():
+    store = make_store(token_budget=10)
+    for n in range(4):
+        store.save_turn("s", f"question {n}", f"answer {n}")  # 6 tokens rendered
+
+    turns = store.get_turns("s")
+    assert [turn.user for turn in turns] == ["question 3"]
+
+
+def test_least_recently_used_session_is_evicted_past_max_sessions():
+    store = make_store(max_sessions=2)
+    store.save_turn("a", "hello", "hi")
+    store.save_turn("b", "hello", "hi")
+    store.get_history("a")  # Now "b" is the least recently used
+    store.save_turn("c", "hello", "hi")
+
+    assert list(store._sessions) == ["a", "c"]
+    assert store.get_history("b") == ""  # Evicted and, without a backend, forgotten
+
+
+def test_idle_sessions_are_evicted(monkeypatch):
+    store = make_store(idle_ttl=60)
+    store.save_turn("idle", "hello", "hi")
+
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+    store.get_history("active")
+
+    assert list(store._sessions) == ["active"]
+
+
+def test_sqlite_backend_round_trips_the_window(tmp_path):
+    path = str(tmp_path / "memory.db")
+    store = make_store(SQLiteMemoryBackend(path), token_budget=10)
+    for n in range(3):
+        store.save_turn("s", f"question {n}", f"answer {n}")
+
+    restarted = make_store(SQLiteMemoryBackend(path), token_budget=10)
+
+    assert restarted.get_history("s") == store.get_history("s") == "User: question 2\nAssistant: answer 2"
+    assert restarted.get_turns("s")[0].tokens == 6
+
+
+def test_clear_removes_persisted_turns(tmp_path):
+    path = str(tmp_path / "memory.db")
+    store = make_store(SQLiteMemoryBackend(path))
+    store.save_turn("s", "hello", "hi")
+    store.clear("s")
+
+    assert make_store(SQLiteMemoryBackend(path)).get_history("s") == ""
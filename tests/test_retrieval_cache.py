@@ -0,0 +1,32 @@
+import time
+
+from app.infrastructure.services.vector.retrieval_cache import RetrievalCache
+
+
+def test_published_version_invalidates_reader_results(tmp_path):
+    path = str(tmp_path / "index_version")
+    writer = RetrievalCache(16, 16, version_path=path)
+    reader = RetrievalCache(16, 16, version_path=path)  # Same file, as another worker would
+    key = reader.result_key("open projects", {}, 5, "hybrid")
+    reader.put_results(key, ["a", "b"])
+    assert reader.get_results(key) == ["a", "b"]
+
+    writer.bump_index_version()
+    assert reader.shared_index_version() is None  # Not on disk yet, so not announced
+    writer.publish_index_version()
+
+    assert reader.shared_index_version() == writer.index_version
+    reader.adopt_index_version(reader.shared_index_version())
+    assert reader.result_key("open projects", {}, 5, "hybrid") != key
+    assert reader.get_results(key) is None
+
+
+def test_results_expire_after_ttl(tmp_path, monkeypatch):
+    cache = RetrievalCache(16, 16, result_ttl=60.0)
+    key = cache.result_key("open projects", {}, 5, "hybrid")
+    cache.put_results(key, ["a"])
+
+    later = time.monotonic() + 61
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+
+    assert cache.get_results(key) is None
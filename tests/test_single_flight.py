@@ -0,0 +1,66 @@
+import asyncio
+
+from app.application.orchestrator.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight()
+    calls = []
+
+    async def answer():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "42"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("q", answer) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["42"] * 10
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": 1, "coalesced": 9, "in_flight": 0}
+
+
+def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("q", fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert [type(e) for e in errors] == [ValueError] * 3
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_key_is_cleared_so_later_calls_run_again():
+    flight = SingleFlight()
+    calls = []
+
+    async def answer():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        first = await flight.do("q", answer)
+        await asyncio.sleep(0)  # Let the done callback forget the key
+        second = await flight.do("q", answer)
+        return first, second
+
+    assert asyncio.run(main()) == (1, 2)
+    assert "q" not in flight._calls
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("a", lambda: asyncio.sleep(0, "a")),
+            flight.do("b", lambda: asyncio.sleep(0, "b")),
+        )
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert flight.stats()["executed"] == 2
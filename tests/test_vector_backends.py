@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.infrastructure.services.vector.vector_backends import NumpyVectorStore
+
+
+def build_store(tmp_path, count=20):
+    store = NumpyVectorStore(str(tmp_path))
+    rng = np.random.default_rng(0)
+    collections = ["departments"] * 3 + ["projects"] * (count - 3)
+    store.upsert(
+        [f"id{i}" for i in range(count)],
+        rng.standard_normal((count, 8)).astype(np.float32),
+        [{"collection_name": name, "_id": f"id{i}"} for i, name in enumerate(collections)],
+        [f"text {i}" for i in range(count)],
+    )
+    return store
+
+
+def test_filtered_query_matching_fewer_rows_than_requested(tmp_path):
+    store = build_store(tmp_path)
+    results = store.query(np.ones(8, dtype=np.float32), 30, where={"collection_name": "departments"})
+    assert sorted(doc_id for doc_id, _, _ in results) == ["id0", "id1", "id2"]
+
+
+def test_filtered_query_matching_nothing(tmp_path):
+    store = build_store(tmp_path)
+    assert store.query(np.ones(8, dtype=np.float32), 10, where={"collection_name": "risks"}) == []
+
+
+def test_query_after_delete_and_reload(tmp_path):
+    store = build_store(tmp_path)
+    store.delete(["id0"])
+    store.persist()
+    reloaded = NumpyVectorStore(str(tmp_path))
+    results = reloaded.query(np.ones(8, dtype=np.float32), 30, where={"collection_name": "departments"})
+    assert sorted(doc_id for doc_id, _, _ in results) == ["id1", "id2"]